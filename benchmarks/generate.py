@@ -0,0 +1,193 @@
+"""Seeded generator of synthetic Divine-Pride item and mob payloads.
+
+Payloads are built from the fixtures in tests/fixtures with ids, names,
+types, flags, stats, drops and skills drawn from the values the real
+database uses, so the mappers take the same code paths as for real data.
+The same seed always generates the same payloads.
+
+Usage: python -m benchmarks.generate {item,mob} [count] [--seed N] [-o FILE.ndjson[.gz]]
+"""
+import argparse
+import copy
+import gzip
+import json
+import os
+import random
+import sys
+
+from dp2rathena import tables
+
+fixtures = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures')
+
+SEED = 0
+
+# (itemTypeId, itemSubTypeIds, locationIds, weight) in roughly the proportions
+# of the real item database
+ITEM_TYPES = [
+    (5, [0], [0], 35),                                      # Etc
+    (2, [512, 513, 514, 515, 516, 517], [256, 1, 512, 769, 16, 32, 4, 64, 136], 20),
+    (1, list(range(256, 279)), [2, 34], 15),                # Weapon
+    (3, [768, 769], [0], 15),                               # Consumable
+    (6, [0], [2, 16, 32, 4, 64, 136, 769], 8),              # Card
+    (9, [519, 522, 525], [1024, 2048, 4096, 8192], 4),      # Costume
+    (4, [1024, 1025, 1026, 1027], [32768], 1),              # Ammo
+    (10, [280, 526, 527, 528, 529, 530], [65536, 131072, 262144, 524288, 1048576, 2097152], 1),
+    (7, [0], [0], 1),                                       # Cash
+]
+
+STATUSES = ['IDLE_ST', 'RMOVE_ST', 'DEAD_ST', 'MOVEITEM_ST', 'BERSERK_ST', 'ANGRY_ST', 'RUSH_ST', 'FOLLOW_ST']
+CONDITIONS = [None, '0', 'IF_HP', 'IF_COMRADEHP', 'IF_SLAVENUM', 'IF_RANGEATTACKED', 'IF_SKILLUSE', 'IF_RUDEATTACK']
+MOB_CLASSES = [0] * 90 + [1] * 8 + [2, 5]
+
+
+def _load(filename):
+    with open(os.path.join(fixtures, filename), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Generator:
+    """Generates payloads from a random.Random seeded with `seed`."""
+
+    def __init__(self, seed=SEED):
+        self.rng = random.Random(seed)
+        self.item_template = _load('item_1101.json')
+        self.mob_templates = [_load('mob_1002.json'), _load('mob_1049.json')]
+        self.item_ids = sorted(tables.load('item_db')['items'])
+        skill_db = tables.load('skill_db')
+        self.skill_ids = sorted(skill_db)
+        self.skill_names = {skill_id: skill['Name'] for skill_id, skill in skill_db.items()}
+        # Real flags take a few hundred distinct values, not every bitmask
+        self.jobs = [self.rng.randrange(1, 0xFFFFF) for _ in range(300)] + [0xFFFFF, 0x3FFFF, 1]
+        self.weights = [weight for *_, weight in ITEM_TYPES]
+
+    def _name(self):
+        return ''.join(self.rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(self.rng.randint(4, 12))).title()
+
+    def item(self, dpid):
+        rng = self.rng
+        item_type, subtypes, locations, _ = rng.choices(ITEM_TYPES, self.weights)[0]
+        name = self._name()
+        item = copy.deepcopy(self.item_template)
+        item.update(
+            id=dpid,
+            aegisName=f'{name}_{dpid}',
+            name=name if rng.random() < 0.7 else f'{name} [{rng.randint(1, 4)}]',
+            itemTypeId=item_type,
+            itemSubTypeId=rng.choice(subtypes),
+            locationId=rng.choice(locations),
+            job=rng.choice(self.jobs) if item_type in (1, 2, 10) else 0xFFFFF,
+            classNum=rng.choice([0, 0, 0, 1, 2, 3, 4]),
+            slots=rng.choice([0, 0, 0, 1, 2, 3, 4]),
+            attack=rng.randint(0, 300) if item_type == 1 else 0,
+            defense=rng.randint(0, 100) if item_type == 2 else 0,
+            matk=rng.choice([0, 0, 0, rng.randint(10, 300)]),
+            weight=rng.randint(0, 3000),
+            price=rng.randint(0, 100000),
+            requiredLevel=rng.choice([None, 0, rng.randint(1, 200)]),
+            itemLevel=rng.randint(1, 4) if item_type in (1, 2) else None,
+            range=rng.randint(1, 14) if item_type == 1 else 0,
+            gender=rng.choice([2, 2, 2, 0, 1]),
+            refinable=item_type in (1, 2) and rng.random() < 0.9,
+        )
+        return item
+
+    def _drop(self):
+        return {
+            'itemId': self.rng.choice(self.item_ids),
+            'chance': self.rng.choice([1, 5, 10, 50, 100, 500, 1000, 3000, 5000, 7000, 10000]),
+            'stealProtected': self.rng.random() < 0.1,
+            'serverTypeName': None,
+            'optionGroup': None,
+        }
+
+    def _skill(self, idx):
+        rng = self.rng
+        condition = rng.choice(CONDITIONS)
+        if condition == 'IF_SKILLUSE':
+            # Reacts to a skill, given by name
+            value = self.skill_names[rng.choice(self.skill_ids)]
+        else:
+            value = str(rng.choice([0, 30, 50, 100]))
+        return {
+            'idx': idx,
+            'skillId': rng.choice(self.skill_ids),
+            'status': rng.choice(STATUSES),
+            'level': rng.randint(1, 10),
+            'chance': rng.choice([10, 50, 100, 200, 500, 1000]),
+            'casttime': rng.choice([0, 0, 500, 1000, 3000]),
+            'delay': rng.choice([0, 1000, 5000, 10000, 60000]),
+            'interruptable': rng.random() < 0.5,
+            'changeTo': None,
+            'condition': condition,
+            'conditionValue': value,
+            'sendType': None,
+            'sendValue': None,
+        }
+
+    def mob(self, dpid):
+        rng = self.rng
+        mob = copy.deepcopy(rng.choice(self.mob_templates))
+        name = self._name()
+        level = rng.randint(1, 175)
+        mvp = 1 if rng.random() < 0.03 else 0
+        mob.update(id=dpid, dbname=name.upper(), name=name)
+        mob['stats'].update(
+            level=level,
+            health=rng.randint(level * 10, level * 1000) * (100 if mvp else 1),
+            sp=rng.choice([1, 1, 0, rng.randint(10, 5000)]),
+            baseExperience=rng.randint(0, level * 500),
+            jobExperience=rng.randint(0, level * 400),
+            atk1=rng.randint(1, level * 20),
+            atk2=rng.randint(1, level * 10),
+            defense=rng.randint(0, 200),
+            magicDefense=rng.randint(0, 200),
+            element=rng.choice([0] + list(range(20, 90))),
+            scale=rng.choice([0, 1, 2]),
+            race=rng.randint(0, 9),
+            mvp=mvp,
+            ai=f'MONSTER_TYPE_{rng.choice([1, 2, 3, 4, 5, 6, 7, 10, 13, 17, 19, 20, 21, 24, 25, 26, 27]):02d}',
+            movementSpeed=rng.choice([100, 150, 200, 400]),
+            rechargeTime=rng.randint(500, 3000),
+            attackSpeed=rng.randint(300, 1500),
+            attackedSpeed=rng.randint(200, 800),
+        )
+        mob['stats']['class'] = 1 if mvp else rng.choice(MOB_CLASSES)
+        mob['drops'] = [self._drop() for _ in range(rng.randint(0, 10))]
+        mob['mvpdrops'] = [self._drop() for _ in range(rng.randint(1, 3))] if mvp else []
+        mob['skill'] = [self._skill(i) for i in range(rng.choice([0, 0, 1, 2, 3, 5, 8, 12]))]
+        return mob
+
+    def items(self, count, start=1):
+        return [self.item(dpid) for dpid in range(start, start + count)]
+
+    def mobs(self, count, start=1001):
+        return [self.mob(dpid) for dpid in range(start, start + count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Writes synthetic Divine-Pride payloads as NDJSON.')
+    parser.add_argument('kind', choices=['item', 'mob'])
+    parser.add_argument('count', type=int, nargs='?', default=1000)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('-o', '--output', help='NDJSON file, gzipped if it ends with .gz. Default: stdout')
+    args = parser.parse_args(argv)
+
+    generator = Generator(args.seed)
+    make = generator.item if args.kind == 'item' else generator.mob
+    start = 1 if args.kind == 'item' else 1001
+    if args.output is None:
+        out = sys.stdout
+    elif args.output.endswith('.gz'):
+        out = gzip.open(args.output, 'wt', encoding='utf-8')
+    else:
+        out = open(args.output, 'w', encoding='utf-8')
+    try:
+        for dpid in range(start, start + args.count):
+            out.write(json.dumps(make(dpid), ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Benchmark suite for the mappers, reference table loading, YAML output,
+the mapping pipeline and CLI start-up.
+
+`run` times each benchmark on payloads synthesized by benchmarks.generate,
+as well as dp2rathena version and --help in a new interpreter, and writes
+the best of several repeats as JSON. Benchmarks suffixed _interpreted,
+_no_numpy and _yaml time the implementations the fast paths replaced, for
+comparison. `compare` reads two such files and exits with status 1 if any
+benchmark got slower than the threshold.
+
+Usage: python -m benchmarks.suite run [--scale {1000,10000,100000}] [--repeat N] [--seed N] [-o FILE.json]
+       python -m benchmarks.suite compare BASELINE.json CURRENT.json [--threshold 0.1]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import generate
+from dp2rathena import codec
+from dp2rathena import converter
+from dp2rathena import emitter
+from dp2rathena import item_mapper
+from dp2rathena import mob_mapper
+from dp2rathena import mob_skill_mapper
+from dp2rathena import rathena
+from dp2rathena import tables
+
+SCALES = [1000, 10000, 100000]
+REPEAT = 3
+THRESHOLD = 0.1
+# Interpreted schemas take up to a third of a second per mob, so they are
+# timed on a fixed number of records at every scale, and yaml.dump on at
+# most REFERENCE
+INTERPRETED = 5
+REFERENCE = 1000
+PROCESSES = [1, 2, 4]
+
+
+def _map_each(map_fn, payloads):
+    return lambda: [map_fn(payload) for payload in payloads]
+
+
+def _without_numpy(fn):
+    def run():
+        numpy, item_mapper.numpy = item_mapper.numpy, None
+        try:
+            fn()
+        finally:
+            item_mapper.numpy = numpy
+    return run
+
+
+def _pipeline(path, processes):
+    return lambda: converter.DumpConverter(path, processes=processes).write_mob(None, io.StringIO())
+
+
+def _startup(*args):
+    command = f'from dp2rathena.cli import dp2rathena; dp2rathena({list(args)!r})'
+    return lambda: subprocess.run([sys.executable, '-c', command], check=True, stdout=subprocess.DEVNULL)
+
+
+def benchmarks(scale, tmp, seed=generate.SEED):
+    """Returns (name, records, fn) for each benchmark at `scale` payloads,
+    writing any input files to directory `tmp`.
+    """
+    generator = generate.Generator(seed)
+    items = generator.items(scale)
+    mobs = generator.mobs(scale)
+    mob_dump = os.path.join(tmp, 'mobs.ndjson')
+    with open(mob_dump, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(mob) + '\n' for mob in mobs)
+
+    item_map = item_mapper.Mapper()
+    mob_map = mob_mapper.Mapper()
+    skill_map = mob_skill_mapper.Mapper()
+    # Load reference tables up front so mapping benchmarks exclude them
+    tables.preload()
+
+    item_db = [item_map.map_item(item) for item in items]
+    mob_db = [mob_map.map_mob(mob) for mob in mobs]
+    # Written as yaml.dump would, with numeric strings quoted
+    mob_yaml = emitter.dump(mob_db, rathena.MOB_HEADER)
+    interpreted_items, interpreted_mobs = items[:INTERPRETED], mobs[:INTERPRETED]
+    reference_items, reference_mobs = item_db[:REFERENCE], mob_db[:REFERENCE]
+
+    return [
+        ('map_item', scale, _map_each(item_map.map_item, items)),
+        ('map_item_interpreted', len(interpreted_items), _map_each(
+            lambda item: item_map._map_schema(item_map.schema, item), interpreted_items)),
+        ('map_items', scale, lambda: item_map.map_items(items)),
+        ('map_items_no_numpy', scale, _without_numpy(lambda: item_map.map_items(items))),
+        ('map_mob', scale, _map_each(mob_map.map_mob, mobs)),
+        ('map_mob_interpreted', len(interpreted_mobs), _map_each(
+            lambda mob: mob_map._map_schema(mob_map.schema, mob), interpreted_mobs)),
+        ('map_mob_skill', scale, _map_each(skill_map.map_mob_skill, mobs)),
+        ('map_mob_skill_interpreted', len(interpreted_mobs), _map_each(
+            lambda mob: [skill_map._map_schema(skill_map.schema, skill, mob) for skill in mob['skill']],
+            interpreted_mobs)),
+        # Tables are shared once loaded, so each run loads them again
+        ('load_item_db', 1, lambda: tables.reload(['item_db'])),
+        ('load_skill_db', 1, lambda: tables.reload(['skill_db'])),
+        ('dump_item_db', scale, lambda: emitter.dump(item_db, rathena.ITEM_HEADER)),
+        ('dump_item_db_yaml', len(reference_items), lambda: codec.dump_yaml(
+            {'Header': rathena.ITEM_HEADER, 'Body': reference_items})),
+        ('dump_mob_db', scale, lambda: emitter.dump(mob_db, rathena.MOB_HEADER, numeric_strings=True)),
+        ('dump_mob_db_yaml', len(reference_mobs), lambda: emitter.remove_numerical_quotes(codec.dump_yaml(
+            {'Header': rathena.MOB_HEADER, 'Body': reference_mobs}))),
+        ('remove_numerical_quotes', scale, lambda: emitter.remove_numerical_quotes(mob_yaml)),
+    ] + [
+        # Mobs read from an NDJSON dump, mapped and written by 1 or more processes
+        (f'convert_mob_dump_p{processes}', scale, _pipeline(mob_dump, processes))
+        for processes in PROCESSES
+    ] + [
+        # Interpreter start included, so compare against a baseline from the same machine
+        ('cli_version', 1, _startup('version')),
+        ('cli_help', 1, _startup('--help')),
+    ]
+
+
+def measure(fn, repeat=REPEAT):
+    """Returns the fastest of `repeat` runs of fn in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(scale, repeat=REPEAT, seed=generate.SEED, only=None):
+    results = dict()
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, records, fn in benchmarks(scale, tmp, seed):
+            if only and name not in only:
+                continue
+            seconds = measure(fn, repeat)
+            results[name] = {'records': records, 'seconds': seconds, 'rate': records / seconds}
+    return {
+        'meta': {
+            'scale': scale,
+            'repeat': repeat,
+            'seed': seed,
+            'python': platform.python_version(),
+            'libyaml': codec.Loader.__name__ == 'CSafeLoader',
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Returns (name, baseline rate, current rate, change, regressed) for each
+    benchmark in both results. A benchmark regressed if its rate dropped by
+    more than `threshold`, e.g. 0.1 for 10%.
+    """
+    rows = list()
+    for name, base in baseline['results'].items():
+        if name not in current['results']:
+            continue
+        old = base['rate']
+        new = current['results'][name]['rate']
+        change = new / old - 1
+        rows.append((name, old, new, change, change < -threshold))
+    return rows
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks dp2rathena mapping and serialization.')
+    # add_subparsers only takes required on Python 3.7+
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    run_parser = commands.add_parser('run', help='Runs the benchmarks and writes results as JSON')
+    run_parser.add_argument('--scale', type=int, choices=SCALES, default=SCALES[0])
+    run_parser.add_argument('--repeat', type=int, default=REPEAT)
+    run_parser.add_argument('--seed', type=int, default=generate.SEED)
+    run_parser.add_argument('--only', nargs='+', help='Benchmarks to run. Default: all')
+    run_parser.add_argument('-o', '--output', help='Results file. Default: stdout')
+    compare_parser = commands.add_parser('compare', help='Flags regressions against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = json.dumps(run(args.scale, args.repeat, args.seed, args.only), indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(results + '\n')
+        else:
+            print(results)
+        return 0
+
+    baseline, current = _read(args.baseline), _read(args.current)
+    if baseline['meta']['scale'] != current['meta']['scale']:
+        print('warning: comparing results at different scales', file=sys.stderr)
+    rows = compare(baseline, current, args.threshold)
+    print(f'{"benchmark":<24} {"baseline/s":>12} {"current/s":>12} {"change":>8}')
+    for name, old, new, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{name:<24} {old:>12.0f} {new:>12.0f} {change:>+7.1%}{flag}')
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
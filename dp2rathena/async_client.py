@@ -0,0 +1,194 @@
+import asyncio
+import ssl
+import weakref
+import zlib
+
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from dp2rathena import codec
+
+
+MAX_REDIRECTS = 5
+REDIRECTS = (301, 302, 303, 307, 308)
+
+
+# Servers send deflate either zlib wrapped, as the spec says, or raw
+def _inflate(body):
+    try:
+        return zlib.decompress(body)
+    except zlib.error:
+        return zlib.decompress(body, -zlib.MAX_WBITS)
+
+
+class _Pool:
+    """Request slots and idle keep-alive connections per origin, for one
+    event loop.
+    """
+
+    def __init__(self, concurrency):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.idle = dict()
+
+
+class Client:
+    """Minimal asyncio HTTP/1.1 client for the Divine-Pride API.
+
+    Requests share a pool of keep-alive connections and at most
+    `concurrency` requests are in flight at once. Connections belong to the
+    event loop they were opened on, so each loop the client is used from
+    gets its own pool. Redirects are followed up to MAX_REDIRECTS times.
+    Errors mirror the blocking tortilla client: any HTTP status >= 400
+    raises an IOError whose message starts with the status code. With
+    `compress` gzip or deflate responses are requested and decoded. A
+    connection dropped or garbled mid-response raises a ConnectionError,
+    which resilience.Policy retries. Unlike requests, HTTP_PROXY and
+    HTTPS_PROXY are not supported: requests always connect directly.
+    `opened` and `reused` count the connections opened and the requests
+    sent on an idle connection.
+    """
+
+    def __init__(self, api_key, url, concurrency=100, timeout=30, debug=False, compress=True):
+        self.api_key = api_key
+        self.base_url = url.rstrip('/')
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.debug = debug
+        self.compress = compress
+        self.opened = 0
+        self.reused = 0
+        # Created lazily so the client binds to the loop it is used from
+        self._pools = weakref.WeakKeyDictionary()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _pool(self):
+        loop = asyncio.get_event_loop()
+        if loop not in self._pools:
+            self._pools[loop] = _Pool(self.concurrency)
+        return self._pools[loop]
+
+    async def close(self):
+        pool = self._pool()
+        # Connections of other loops can't be closed from this one
+        self._pools.clear()
+        for idle in pool.idle.values():
+            while idle:
+                _, writer = idle.pop()
+                writer.close()
+                if hasattr(writer, 'wait_closed'):  # Python 3.7+
+                    await writer.wait_closed()
+
+    async def get(self, *parts):
+        url = '/'.join([self.base_url] + [str(p) for p in parts])
+        target = url + '?' + urlencode({'apiKey': self.api_key})
+        pool = self._pool()
+        async with pool.semaphore:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, reason, headers, body = await asyncio.wait_for(
+                    self._request(pool, target), self.timeout
+                )
+                if self.debug:
+                    print(f'GET {target.split("?")[0]} -> {status} {reason}')
+                if status not in REDIRECTS or 'location' not in headers:
+                    break
+                target = urljoin(target, headers['location'])
+            else:
+                raise IOError(f'{status} {reason} after {MAX_REDIRECTS} redirects for url: {url}')
+        if status >= 400:
+            raise IOError(f'{status} {reason} for url: {url}')
+        return codec.loads_json(body.decode('utf-8')) if body else None
+
+    async def _connect(self, pool, origin, reuse=True):
+        idle = pool.idle.setdefault(origin, list())
+        if reuse and idle:
+            self.reused += 1
+            return idle.pop() + (True,)
+        scheme, host, port = origin
+        context = ssl.create_default_context() if scheme == 'https' else None
+        reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        self.opened += 1
+        return reader, writer, False
+
+    async def _request(self, pool, url):
+        parts = urlsplit(url)
+        origin = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        target = parts.path + ('?' + parts.query if parts.query else '')
+        reader, writer, reused = await self._connect(pool, origin)
+        try:
+            try:
+                status, reason, headers, body = await self._exchange(reader, writer, parts.netloc, target)
+            except ConnectionError:
+                if not reused:
+                    raise
+                # Server closed an idle keep-alive connection, retry on a new one
+                writer.close()
+                reader, writer, _ = await self._connect(pool, origin, reuse=False)
+                status, reason, headers, body = await self._exchange(reader, writer, parts.netloc, target)
+        except BaseException:
+            writer.close()
+            raise
+        if headers.get('connection', '').lower() == 'close':
+            writer.close()
+        else:
+            pool.idle[origin].append((reader, writer))
+        return status, reason, headers, body
+
+    async def _exchange(self, reader, writer, host, target):
+        writer.write((
+            f'GET {target} HTTP/1.1\r\n'
+            f'Host: {host}\r\n'
+            'Accept: application/json\r\n'
+            f'Accept-Encoding: {"gzip, deflate" if self.compress else "identity"}\r\n'
+            'Connection: keep-alive\r\n'
+            '\r\n'
+        ).encode('latin-1'))
+        await writer.drain()
+        try:
+            return await self._response(reader)
+        except (asyncio.IncompleteReadError, ValueError) as err:
+            raise ConnectionResetError(f'Connection dropped mid-response: {err!r}') from err
+
+    # Malformed framing raises ValueError and a truncated body
+    # IncompleteReadError, either of which means the connection can't be used
+    async def _response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Connection closed by server')
+        _, status, reason = (status_line.decode('latin-1').rstrip('\r\n') + ' ').split(' ', 2)
+        headers = dict()
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = list()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionResetError('Connection closed by server')
+                size = int(line.split(b';')[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            headers['connection'] = 'close'
+        encoding = headers.get('content-encoding', '').lower()
+        if encoding == 'gzip':
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            body = _inflate(body)
+        return int(status), reason.strip(), headers, body
@@ -0,0 +1,59 @@
+import contextlib
+import os
+import tempfile
+
+from pathlib import Path
+
+
+# Large writes are much faster than line-sized ones for multi-megabyte dbs
+BUFFER_SIZE = 1024 * 1024
+
+
+def _mode(path):
+    try:
+        return path.stat().st_mode & 0o7777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextlib.contextmanager
+def open_files(paths):
+    """Opens text files which replace `paths` only once all are written.
+
+    Each file is written to a temporary file in the same directory, then
+    flushed to disk and renamed over its path when the block exits without
+    an error, so readers never see a partially written file. On error the
+    temporary files are removed and the existing files are left untouched.
+    """
+    paths = [Path(p) for p in paths]
+    temps = list()
+    files = list()
+    try:
+        for path in paths:
+            fd, temp = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+            temps.append(temp)
+            files.append(open(fd, 'w', encoding='utf-8', buffering=BUFFER_SIZE))
+        yield files
+        for f in files:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        for path, temp in zip(paths, temps):
+            os.chmod(temp, _mode(path))
+            os.replace(temp, path)
+    except BaseException:
+        for f in files:
+            f.close()
+        for temp in temps:
+            with contextlib.suppress(OSError):
+                os.unlink(temp)
+        raise
+
+
+@contextlib.contextmanager
+def open_file(path):
+    """Opens a text file which replaces `path` once written, see open_files."""
+    with open_files([path]) as files:
+        yield files[0]
@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+import time
+
+from pathlib import Path
+
+
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+
+
+def cache_dir():
+    """Returns the per-user cache directory for dp2rathena."""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'dp2rathena'
+
+
+class ResponseCache:
+    """SQLite-backed cache of Divine-Pride API responses.
+
+    Entries are keyed by endpoint, id and request parameters (excluding the
+    API key) and expire `ttl` seconds after being fetched. With `refresh`
+    the cache is write-only, so every id is fetched again and re-stored.
+    Only successful responses are stored, never 404s.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, refresh=False):
+        self.path = Path(path) if path else cache_dir() / 'responses.sqlite'
+        self.ttl = ttl
+        self.refresh = refresh
+        self._db = None
+        self._lock = threading.Lock()
+
+    # Opened lazily so commands that never fetch don't create the file or
+    # import sqlite3, and codec, which imports PyYAML, is imported on first
+    # use for the same reason
+    def _connect(self):
+        if self._db is None:
+            import sqlite3
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' endpoint TEXT NOT NULL,'
+                ' id TEXT NOT NULL,'
+                ' params TEXT NOT NULL,'
+                ' fetched_at REAL NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' PRIMARY KEY (endpoint, id, params))'
+            )
+        return self._db
+
+    @staticmethod
+    def _params_key(params):
+        params = {k: v for k, v in (params or {}).items() if k != 'apiKey'}
+        return json.dumps(params, sort_keys=True)
+
+    def get(self, endpoint, dpid, params=None):
+        from dp2rathena import codec
+
+        if self.refresh:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT payload FROM responses'
+                ' WHERE endpoint = ? AND id = ? AND params = ? AND fetched_at >= ?',
+                (endpoint, str(dpid), self._params_key(params), time.time() - self.ttl),
+            ).fetchone()
+        return None if row is None else codec.loads_json(row[0])
+
+    def set(self, endpoint, dpid, payload, params=None):
+        from dp2rathena import codec
+
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                (endpoint, str(dpid), self._params_key(params), time.time(), codec.dumps_json(payload)),
+            )
+            db.commit()
+
+    def stats(self):
+        """Returns entry counts per endpoint and the size of the cache file."""
+        result = {
+            'path': str(self.path),
+            'size': self.path.stat().st_size if self.path.exists() else 0,
+            'ttl': self.ttl,
+            'endpoints': dict(),
+        }
+        if not self.path.exists():
+            return result
+        with self._lock:
+            rows = self._connect().execute(
+                'SELECT endpoint, COUNT(*), SUM(fetched_at >= ?) FROM responses GROUP BY endpoint',
+                (time.time() - self.ttl,),
+            ).fetchall()
+        for endpoint, total, fresh in rows:
+            result['endpoints'][endpoint] = {'entries': total, 'expired': total - fresh}
+        return result
+
+    def clear(self):
+        with self._lock:
+            db = self._connect()
+            db.execute('DELETE FROM responses')
+            db.commit()
+            db.execute('VACUUM')
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
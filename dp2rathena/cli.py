@@ -1,20 +1,30 @@
-import importlib
+import json
 import os
-import pkg_resources
 import re
 import sys
 
 import click
 
 from pathlib import Path
-from dotenv import load_dotenv, dotenv_values
-from dp2rathena import converter
+from dp2rathena import atomic
+from dp2rathena import cache
+from dp2rathena import crawl as crawler
+from dp2rathena import metrics
+from dp2rathena import network
+from dp2rathena import profiling
+from dp2rathena import ranges
+from dp2rathena import rathena
+from dp2rathena import resilience
 
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 ENV_PATH = Path('.') / '.env'
 CONFIG_PATH = Path.home() / '.dp2rathena.conf'
 DP_KEY = 'DIVINEPRIDE_API_KEY'
+CACHE_KEY = 'cache'
+POLICY_KEY = 'policy'
+TRANSPORT_KEY = 'transport'
+PROFILER_KEY = 'profiler'
 
 
 class ApiKey(click.ParamType):
@@ -30,24 +40,112 @@ class ApiKey(click.ParamType):
         return value
 
 
+class Shard(click.ParamType):
+    name = 'shard'
+
+    def convert(self, value, param=None, ctx=None):
+        if isinstance(value, tuple):
+            return value
+        match = re.fullmatch(r'(\d+)/(\d+)', value)
+        if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            self.fail(f'{value} is not a shard K/N with 1 <= K <= N', param, ctx)
+        return int(match.group(1)), int(match.group(2))
+
+
 @click.group(context_settings=CONTEXT_SETTINGS)
 @click.option(
     '-k', '--api-key',
     type=ApiKey(),
     help='Divine-Pride API Key.'
 )
+@click.option(
+    '--cache/--no-cache', 'use_cache',
+    default=True,
+    help='Reuses Divine-Pride responses cached on disk. Default: cache.'
+)
+@click.option(
+    '--refresh',
+    is_flag=True,
+    help='Fetches every id again and updates the cache.'
+)
+@click.option(
+    '--cache-ttl',
+    type=click.IntRange(min=0),
+    default=cache.DEFAULT_TTL,
+    help=f'Seconds before cached responses expire. Default: {cache.DEFAULT_TTL}'
+)
+@click.option(
+    '--rate',
+    type=click.FloatRange(min=0),
+    default=0,
+    help='Maximum Divine-Pride requests per second, shared by all workers. Default: 0 (unlimited)'
+)
+@click.option(
+    '--retries',
+    type=click.IntRange(min=0),
+    default=resilience.DEFAULT_RETRIES,
+    help='Times a request is retried after a 429, 5xx or timeout, with exponential backoff.'
+        f' Default: {resilience.DEFAULT_RETRIES}'
+)
+@click.option(
+    '--pool-size',
+    type=click.IntRange(min=1),
+    help='Keep-alive connections kept open to Divine-Pride. Default: max(workers, 10)'
+)
+@click.option(
+    '--connect-timeout',
+    type=click.FloatRange(min=0.1),
+    default=network.DEFAULT_CONNECT_TIMEOUT,
+    help=f'Seconds to wait for a connection to Divine-Pride. Default: {network.DEFAULT_CONNECT_TIMEOUT}'
+)
+@click.option(
+    '--read-timeout',
+    type=click.FloatRange(min=0.1),
+    default=network.DEFAULT_READ_TIMEOUT,
+    help=f'Seconds to wait for Divine-Pride to send data. Default: {network.DEFAULT_READ_TIMEOUT}'
+)
+@click.option(
+    '--compress/--no-compress',
+    default=True,
+    help='Requests gzip compressed responses. Default: compress.'
+)
+@click.option(
+    '--profile',
+    is_flag=True,
+    help='Shows the time spent fetching, mapping, serializing and writing records.'
+)
+@click.option(
+    '--profile-file',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Also writes cProfile stats of the main process to this file, e.g. dp2rathena.prof. Implies --profile.'
+)
+@click.option(
+    '--metrics', 'metrics_path',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Writes request, cache, latency and throughput metrics to this file on exit,'
+        ' as JSON if it ends with .json and Prometheus text otherwise.'
+)
 @click.pass_context
-def dp2rathena(ctx, api_key):
+def dp2rathena(
+    ctx, api_key, use_cache, refresh, cache_ttl, rate, retries, pool_size, connect_timeout, read_timeout, compress,
+    profile, profile_file, metrics_path,
+):
     """Converts Divine-Pride API data to rathena DB formats.
 
     \b
     Example:
         dp2rathena config
         dp2rathena item 501
+        dp2rathena --refresh mob 1002
+        dp2rathena --rate 5 item --workers 4 -f ids_to_convert.txt
+        dp2rathena --profile mob -f ids_to_convert.txt -o mob_db.yml
+        dp2rathena --metrics dp2rathena.prom item -f ids_to_convert.txt -o item_db.yml
     """
     if ENV_PATH.exists():
+        from dotenv import dotenv_values
         env_values = dotenv_values(dotenv_path=ENV_PATH)
     elif CONFIG_PATH.exists():
+        from dotenv import dotenv_values
         env_values = dotenv_values(dotenv_path=CONFIG_PATH)
     else:
         env_values = dict()
@@ -58,11 +156,142 @@ def dp2rathena(ctx, api_key):
     else:
         ctx.obj = env_values
 
+    response_cache = cache.ResponseCache(ttl=cache_ttl, refresh=refresh)
+    ctx.obj[CACHE_KEY] = response_cache if use_cache else None
+    ctx.obj[POLICY_KEY] = resilience.Policy(rate=rate, retries=retries)
+    ctx.obj[TRANSPORT_KEY] = network.Transport(pool_size, connect_timeout, read_timeout, compress)
+    ctx.obj[PROFILER_KEY] = profiling.NullProfiler()
+    if profile or profile_file:
+        profiler = profiling.Profiler(profile_file)
+        ctx.obj[PROFILER_KEY] = profiler
+        ctx.call_on_close(lambda: _echo_profile(profiler))
+        profiler.start()
+    metrics.REGISTRY.reset()
+    if metrics_path:
+        ctx.call_on_close(lambda: _write_metrics(metrics_path))
+
+
+# Replaced atomically so collectors never read a partial file
+def _write_metrics(path):
+    with atomic.open_file(path) as f:
+        f.write(metrics.REGISTRY.dumps(path))
+
+
+def _echo_profile(profiler):
+    profiler.stop()
+    click.echo(profiler.summary(), err=True)
+
+
+def _ids_to_convert(file, value, name, shard=None, required=True):
+    if not file and len(value) == 0 and not required:
+        return None
+    if file:
+        if len(value) != 1:
+            raise click.UsageError('One file required for processing.')
+        # Read lazily so large id files are never held in memory
+        f = click.open_file(value[0], 'r')
+        ids = ranges.expand(line.rstrip('\r\n') for line in f)
+    else:
+        if len(value) == 0:
+            raise click.UsageError(f'{name.capitalize()} id required.')
+        for v in value:
+            part = ranges.invalid(v)
+            if part is not None:
+                raise click.UsageError(f'Non-integer {name} id - {part}')
+        ids = ranges.expand(value)
+    if shard:
+        ids = ranges.shard(ids, *shard)
+    return _profiler().iterate('parse_ids', ids)
+
+
+# --output is written to a temporary file and renamed once complete, so
+# it can't be streamed
+def _check_streamable(stream, sort=False, output=None):
+    if stream and sort:
+        raise click.UsageError('--stream cannot be used with --sort.')
+    if stream and output:
+        raise click.UsageError('--stream cannot be used with --output.')
+
+
+def _check_updatable(update, incompatible):
+    if update and incompatible:
+        raise click.UsageError('--update cannot be used with --split or --stream.')
+
+
+def _profiler():
+    return click.get_current_context().obj[PROFILER_KEY]
+
+
+def _echo_output(text):
+    with _profiler().stage('output'):
+        click.echo(text, nl=False)
+
+
+def _echo_chunks(chunks):
+    profiler = _profiler()
+    for chunk in chunks:
+        with profiler.stage('output'):
+            click.echo(chunk, nl=False)
+
+
+# converter imports tortilla, requests, NumPy and the mappers, so it is only
+# imported by commands that convert, not by version, config or --help
+def _converter(ctx, debug, workers, trusted=False, report=None, input_json=None, shard=None, processes=1):
+    from dp2rathena import converter
+
+    if input_json:
+        return converter.DumpConverter(
+            input_json, trusted, validate=report is not None, shard=shard, processes=processes,
+            profiler=ctx.obj[PROFILER_KEY],
+        )
+    api_key = ctx.obj[DP_KEY]
+    conv = converter.Converter(
+        api_key, debug, workers, ctx.obj[CACHE_KEY], trusted, validate=report is not None,
+        policy=ctx.obj[POLICY_KEY], transport=ctx.obj[TRANSPORT_KEY], processes=processes,
+        profiler=ctx.obj[PROFILER_KEY],
+    )
+    if debug:
+        ctx.call_on_close(lambda: _echo_connections(conv))
+    return conv
+
+
+def _echo_connections(conv):
+    stats = conv.transport.stats()
+    click.echo(
+        f'Connections: {stats["Opened"]} opened, {stats["Reused"]} reused'
+        f' for {stats["Requests"]} requests',
+        err=True,
+    )
+
+
+def _split_paths(output):
+    from dp2rathena import converter
+
+    path = Path(output)
+    return {
+        part: path.with_name(f'{path.stem}_{part}{path.suffix}')
+        for part in converter.ITEM_DB_PARTS
+    }
+
+
+def _write_report(conv, report):
+    if report is not None and conv.report is not None:
+        Path(report).write_text(json.dumps(conv.report.to_dict(), indent=2) + '\n', encoding='utf-8')
+
+
+def _version():
+    try:
+        from importlib import metadata
+    except ImportError:  # python < 3.8, where only the slow pkg_resources is available
+        import pkg_resources
+        return pkg_resources.get_distribution('dp2rathena').version
+    return metadata.version('dp2rathena')
+
 
 @dp2rathena.command()
 def version():
     """Shows the version of dp2rathena."""
-    click.echo(pkg_resources.get_distribution('dp2rathena').version)
+    click.echo(_version())
 
 
 @dp2rathena.command()
@@ -73,11 +302,34 @@ def config():
     click.echo('Configuration saved to ' + str(CONFIG_PATH.resolve()))
 
 
+@dp2rathena.group(name='cache')
+def cache_group():
+    """Manages the on-disk Divine-Pride response cache."""
+
+
+@cache_group.command()
+@click.pass_context
+def stats(ctx):
+    """Shows the number of cached responses per endpoint."""
+    result = (ctx.obj[CACHE_KEY] or cache.ResponseCache()).stats()
+    click.echo(f'Path: {result["path"]}')
+    click.echo(f'Size: {result["size"]} bytes')
+    for endpoint, counts in sorted(result['endpoints'].items()):
+        click.echo(f'{endpoint}: {counts["entries"]} entries ({counts["expired"]} expired)')
+
+
+@cache_group.command()
+def clear():
+    """Removes all cached responses."""
+    cache.ResponseCache().clear()
+    click.echo('Cache cleared')
+
+
 @dp2rathena.command()
 @click.option(
     '-f', '--file',
     is_flag=True,
-    help='A file with item ids to convert, newline separated.'
+    help='A file with item ids or ranges to convert, newline separated.'
 )
 @click.option(
     '--sort/--no-sort',
@@ -89,6 +341,62 @@ def config():
     default=True,
     help='Wraps result with rathena Header and Body tags.'
 )
+@click.option(
+    '--update',
+    type=click.Path(exists=True, dir_okay=False, writable=True),
+    help='Converts only the given ids and splices them into this existing file,'
+        ' which is replaced unless --output is given.'
+)
+@click.option(
+    '-o', '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Writes result to this file, replacing it only once conversion succeeds.'
+)
+@click.option(
+    '--split',
+    is_flag=True,
+    help='Splits result by item type into <output>_usable, <output>_equip and <output>_etc files like rathena.'
+)
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of ids fetched concurrently from Divine-Pride. Default: 1'
+)
+@click.option(
+    '-p', '--processes',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of processes mapping and writing records while more are fetched. Default: 1'
+)
+@click.option(
+    '--stream',
+    is_flag=True,
+    help='Writes each record to standard output as soon as it is converted. Not compatible with --sort or --output.'
+)
+@click.option(
+    '--trusted',
+    is_flag=True,
+    help='Skips validation of Divine-Pride data, e.g. for already validated responses.'
+)
+@click.option(
+    '--report',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Validates all records first and writes unrecognised values to this JSON file.'
+        ' Invalid records are output as errors instead of stopping the conversion.'
+)
+@click.option(
+    '--input-json',
+    type=click.Path(exists=True),
+    help='Converts Divine-Pride payloads saved in this directory of <id>.json files'
+        ' or .json/.ndjson file, optionally gzipped, instead of fetching them.'
+        ' Without ids every payload is converted.'
+)
+@click.option(
+    '--shard',
+    type=Shard(),
+    help='Converts only shard K of N, e.g. 2/4, a deterministic 1/N of the ids.'
+)
 @click.option(
     '--debug',
     is_flag=True,
@@ -96,7 +404,7 @@ def config():
 )
 @click.argument('value', nargs=-1)
 @click.pass_context
-def item(ctx, file, sort, wrap, debug, value):
+def item(ctx, file, sort, wrap, update, output, split, workers, processes, stream, trusted, report, input_json, shard, debug, value):
     """Converts item ids to rathena item_db.yml.
 
     \b
@@ -106,39 +414,101 @@ def item(ctx, file, sort, wrap, debug, value):
     \b
         # Pass API key and convert items via STDIN and sort result by id
         dp2rathena -k <your-api-key> item --sort -f -
+    \b
+        # Convert item ids in ids_to_convert.txt, fetching 8 at a time
+        # and mapping on 4 processes
+        dp2rathena item --workers 8 --processes 4 -f ids_to_convert.txt
+    \b
+        # Write each item to item_db.yml as soon as it is converted
+        dp2rathena item --stream -f ids_to_convert.txt > item_db.yml
+    \b
+        # Convert items in patch.txt and splice them into an existing item_db.yml
+        dp2rathena item --update item_db.yml -f patch.txt
+    \b
+        # Write item_db_usable.yml, item_db_equip.yml and item_db_etc.yml
+        dp2rathena item -o item_db.yml --split -f ids_to_convert.txt
+    \b
+        # Convert items 500 to 1999 and 4001 to 4500, the first of 4 shards
+        dp2rathena item --shard 1/4 500-1999,4001-4500
+    \b
+        # Convert every item saved in an NDJSON snapshot, without network access
+        dp2rathena item --input-json items.ndjson.gz -o item_db.yml
+    \b
+        # Convert all items, listing unrecognised values in report.json
+        dp2rathena item --report report.json -f ids_to_convert.txt
     \b
         # Save API key and convert item ids in ids_to_convert.txt
         dp2rathena config
         dp2rathena item -f ids_to_convert.txt
     """
-    if file:
-        if len(value) != 1:
-            raise click.UsageError('One file required for processing.')
-        to_convert = click.open_file(value[0], 'r').read().splitlines()
+    to_convert = _ids_to_convert(file, value, 'item', shard, required=not input_json)
+    if split and not output:
+        raise click.UsageError('--split requires --output.')
+    _check_updatable(update, split or stream)
+    _check_streamable(stream, sort, output)
+    conv = _converter(ctx, debug, workers, trusted, report, input_json, shard, processes)
+    if update:
+        with atomic.open_file(output or update) as f, open(update, encoding='utf-8') as existing:
+            conv.update_item(to_convert, existing, f)
+    elif output and split:
+        paths = _split_paths(output)
+        with atomic.open_files(paths.values()) as files:
+            conv.write_item(to_convert, dict(zip(paths, files)), sort, wrap)
+    elif output:
+        with atomic.open_file(output) as f:
+            conv.write_item(to_convert, f, sort, wrap)
+    elif stream:
+        _echo_chunks(conv.stream_item(to_convert, wrap))
     else:
-        if len(value) == 0:
-            raise click.UsageError('Item id required.')
-        for v in value:
-            if not v.isdigit():
-                raise click.UsageError(f'Non-integer item id - {v}')
-        to_convert = value
-    api_key = ctx.obj[DP_KEY]
-    click.echo(
-        converter.Converter(api_key, debug).convert_item(to_convert, sort, wrap)
-    , nl=False)
+        _echo_output(conv.convert_item(to_convert, sort, wrap))
+    _write_report(conv, report)
 
 
 @dp2rathena.command()
 @click.option(
     '-f', '--file',
     is_flag=True,
-    help='A file with mob ids to convert, newline separated.'
+    help='A file with mob ids or ranges to convert, newline separated.'
 )
 @click.option(
     '--comment/--no-comment',
     default=True,
     help='Comment out unrecognised skills in output. Default: comment'
 )
+@click.option(
+    '-o', '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Writes result to this file, replacing it only once conversion succeeds.'
+)
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of ids fetched concurrently from Divine-Pride. Default: 1'
+)
+@click.option(
+    '-p', '--processes',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of processes mapping and writing records while more are fetched. Default: 1'
+)
+@click.option(
+    '--stream',
+    is_flag=True,
+    help='Writes each record to standard output as soon as it is converted. Not compatible with --output.'
+)
+@click.option(
+    '--input-json',
+    type=click.Path(exists=True),
+    help='Converts Divine-Pride payloads saved in this directory of <id>.json files'
+        ' or .json/.ndjson file, optionally gzipped, instead of fetching them.'
+        ' Without ids every payload is converted.'
+)
+@click.option(
+    '--shard',
+    type=Shard(),
+    help='Converts only shard K of N, e.g. 2/4, a deterministic 1/N of the ids.'
+)
 @click.option(
     '--debug',
     is_flag=True,
@@ -146,7 +516,7 @@ def item(ctx, file, sort, wrap, debug, value):
 )
 @click.argument('value', nargs=-1)
 @click.pass_context
-def mobskill(ctx, file, comment, debug, value):
+def mobskill(ctx, file, comment, output, workers, processes, stream, input_json, shard, debug, value):
     """Converts mob ids to rathena mob_skill_db.txt.
 
     \b
@@ -161,21 +531,16 @@ def mobskill(ctx, file, comment, debug, value):
         dp2rathena config
         dp2rathena mobskill -f ids_to_convert.txt
     """
-    if file:
-        if len(value) != 1:
-            raise click.UsageError('One file required for processing.')
-        to_convert = click.open_file(value[0], 'r').read().splitlines()
+    to_convert = _ids_to_convert(file, value, 'mob', shard, required=not input_json)
+    _check_streamable(stream, output=output)
+    conv = _converter(ctx, debug, workers, input_json=input_json, shard=shard, processes=processes)
+    if output:
+        with atomic.open_file(output) as f:
+            conv.write_mob_skill(to_convert, f, comment)
+    elif stream:
+        conv.write_mob_skill(to_convert, click.get_text_stream('stdout'), comment)
     else:
-        if len(value) == 0:
-            raise click.UsageError('Mob id required.')
-        for v in value:
-            if not v.isdigit():
-                raise click.UsageError(f'Non-integer mob id - {v}')
-        to_convert = value
-    api_key = ctx.obj[DP_KEY]
-    click.echo(
-        converter.Converter(api_key, debug).convert_mob_skill(to_convert, comment)
-    , nl=False)
+        _echo_output(conv.convert_mob_skill(to_convert, comment))
 
 
 
@@ -183,7 +548,7 @@ def mobskill(ctx, file, comment, debug, value):
 @click.option(
     '-f', '--file',
     is_flag=True,
-    help='A file with mob ids to convert, newline separated.'
+    help='A file with mob ids or ranges to convert, newline separated.'
 )
 @click.option(
     '--sort/--no-sort',
@@ -195,6 +560,57 @@ def mobskill(ctx, file, comment, debug, value):
     default=True,
     help='Wraps result with rathena Header and Body tags.'
 )
+@click.option(
+    '--update',
+    type=click.Path(exists=True, dir_okay=False, writable=True),
+    help='Converts only the given ids and splices them into this existing file,'
+        ' which is replaced unless --output is given.'
+)
+@click.option(
+    '-o', '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Writes result to this file, replacing it only once conversion succeeds.'
+)
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of ids fetched concurrently from Divine-Pride. Default: 1'
+)
+@click.option(
+    '-p', '--processes',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of processes mapping and writing records while more are fetched. Default: 1'
+)
+@click.option(
+    '--stream',
+    is_flag=True,
+    help='Writes each record to standard output as soon as it is converted. Not compatible with --sort or --output.'
+)
+@click.option(
+    '--trusted',
+    is_flag=True,
+    help='Skips validation of Divine-Pride data, e.g. for already validated responses.'
+)
+@click.option(
+    '--report',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Validates all records first and writes unrecognised values to this JSON file.'
+        ' Invalid records are output as errors instead of stopping the conversion.'
+)
+@click.option(
+    '--input-json',
+    type=click.Path(exists=True),
+    help='Converts Divine-Pride payloads saved in this directory of <id>.json files'
+        ' or .json/.ndjson file, optionally gzipped, instead of fetching them.'
+        ' Without ids every payload is converted.'
+)
+@click.option(
+    '--shard',
+    type=Shard(),
+    help='Converts only shard K of N, e.g. 2/4, a deterministic 1/N of the ids.'
+)
 @click.option(
     '--debug',
     is_flag=True,
@@ -202,13 +618,16 @@ def mobskill(ctx, file, comment, debug, value):
 )
 @click.argument('value', nargs=-1)
 @click.pass_context
-def mob(ctx, file, sort, wrap, debug, value):
+def mob(ctx, file, sort, wrap, update, output, workers, processes, stream, trusted, report, input_json, shard, debug, value):
     """Converts mob ids to rathena mob_db.yml.
 
     \b
     Examples:
         # Pass API key and convert mob ids 1002 and 20355
         dp2rathena --api-key <your-api-key> mob 1002 20355
+    \b
+        # Convert mob ids 1001 to 1999
+        dp2rathena mob 1001-1999
     \b
         # Pass API key and convert mobs via STDIN and sort result by id
         dp2rathena -k <your-api-key> mob --sort -f -
@@ -217,18 +636,202 @@ def mob(ctx, file, sort, wrap, debug, value):
         dp2rathena config
         dp2rathena mob -f ids_to_convert.txt
     """
-    if file:
-        if len(value) != 1:
-            raise click.UsageError('One file required for processing.')
-        to_convert = click.open_file(value[0], 'r').read().splitlines()
+    to_convert = _ids_to_convert(file, value, 'mob', shard, required=not input_json)
+    _check_updatable(update, stream)
+    _check_streamable(stream, sort, output)
+    conv = _converter(ctx, debug, workers, trusted, report, input_json, shard, processes)
+    if update:
+        with atomic.open_file(output or update) as f, open(update, encoding='utf-8') as existing:
+            conv.update_mob(to_convert, existing, f)
+    elif output:
+        with atomic.open_file(output) as f:
+            conv.write_mob(to_convert, f, sort, wrap)
+    elif stream:
+        _echo_chunks(conv.stream_mob(to_convert, wrap))
     else:
-        if len(value) == 0:
-            raise click.UsageError('Mob id required.')
-        for v in value:
-            if not v.isdigit():
-                raise click.UsageError(f'Non-integer mob id - {v}')
-        to_convert = value
-    api_key = ctx.obj[DP_KEY]
-    click.echo(
-        converter.Converter(api_key, debug).convert_mob(to_convert, sort, wrap)
-    , nl=False)
\ No newline at end of file
+        _echo_output(conv.convert_mob(to_convert, sort, wrap))
+    _write_report(conv, report)
+
+
+@dp2rathena.command()
+@click.option(
+    '-f', '--file',
+    is_flag=True,
+    help='A file with mob ids or ranges to convert, newline separated.'
+)
+@click.option(
+    '--db',
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help='Output path for mob_db.yml.'
+)
+@click.option(
+    '--skills',
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help='Output path for mob_skill_db.txt.'
+)
+@click.option(
+    '--sort/--no-sort',
+    default=False,
+    help='Sorts mob_db.yml by mob id. Default: no sort.'
+)
+@click.option(
+    '--wrap/--no-wrap',
+    default=True,
+    help='Wraps mob_db.yml with rathena Header and Body tags.'
+)
+@click.option(
+    '--comment/--no-comment',
+    default=True,
+    help='Comment out unrecognised skills in mob_skill_db.txt. Default: comment'
+)
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of ids fetched concurrently from Divine-Pride. Default: 1'
+)
+@click.option(
+    '-p', '--processes',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of processes mapping and writing records while more are fetched. Default: 1'
+)
+@click.option(
+    '--trusted',
+    is_flag=True,
+    help='Skips validation of Divine-Pride data, e.g. for already validated responses.'
+)
+@click.option(
+    '--report',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Validates all records first and writes unrecognised values to this JSON file.'
+        ' Invalid records are output as errors instead of stopping the conversion.'
+)
+@click.option(
+    '--shard',
+    type=Shard(),
+    help='Converts only shard K of N, e.g. 2/4, a deterministic 1/N of the ids.'
+)
+@click.option(
+    '--debug',
+    is_flag=True,
+    help='Shows debug information when querying Divine-Pride.'
+)
+@click.argument('value', nargs=-1)
+@click.pass_context
+def mobs(ctx, file, db, skills, sort, wrap, comment, workers, processes, trusted, report, shard, debug, value):
+    """Converts mob ids to both mob_db.yml and mob_skill_db.txt.
+
+    Each mob is fetched from Divine-Pride once for both outputs.
+
+    \b
+    Examples:
+        # Convert mob ids 1002 and 1049
+        dp2rathena mobs --db mob_db.yml --skills mob_skill_db.txt 1002 1049
+    \b
+        # Convert mob ids in ids_to_convert.txt and sort mob_db.yml by id
+        dp2rathena mobs --db mob_db.yml --skills mob_skill_db.txt --sort -f ids_to_convert.txt
+    """
+    to_convert = _ids_to_convert(file, value, 'mob', shard)
+    conv = _converter(ctx, debug, workers, trusted, report, processes=processes)
+    mob_db, mob_skill_db = conv.convert_mobs(to_convert, sort, wrap, comment)
+    with atomic.open_files([db, skills]) as (db_file, skills_file), conv.profiler.stage('output'):
+        db_file.write(mob_db)
+        skills_file.write(mob_skill_db)
+    _write_report(conv, report)
+
+
+@dp2rathena.command()
+@click.argument('kind', type=click.Choice(sorted(rathena.KINDS)))
+@click.option(
+    '-f', '--file',
+    is_flag=True,
+    help='A file with ids or ranges to crawl, newline separated.'
+)
+@click.option(
+    '-o', '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help='Output path, written to as each batch is converted.'
+)
+@click.option(
+    '--checkpoint',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Progress file saved after every batch. Default: <output>.checkpoint'
+)
+@click.option(
+    '--resume',
+    is_flag=True,
+    help='Continues an interrupted crawl after the last completed id in the checkpoint.'
+)
+@click.option(
+    '--batch-size',
+    type=click.IntRange(min=1),
+    default=crawler.BATCH_SIZE,
+    help=f'Number of ids converted between checkpoints. Default: {crawler.BATCH_SIZE}'
+)
+@click.option(
+    '--wrap/--no-wrap',
+    default=True,
+    help='Wraps result with rathena Header and Body tags.'
+)
+@click.option(
+    '-w', '--workers',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of ids fetched concurrently from Divine-Pride. Default: 1'
+)
+@click.option(
+    '--trusted',
+    is_flag=True,
+    help='Skips validation of Divine-Pride data, e.g. for already validated responses.'
+)
+@click.option(
+    '--shard',
+    type=Shard(),
+    help='Converts only shard K of N, e.g. 2/4, a deterministic 1/N of the ids.'
+)
+@click.option(
+    '--debug',
+    is_flag=True,
+    help='Shows debug information when querying Divine-Pride.'
+)
+@click.argument('value', nargs=-1)
+@click.pass_context
+def crawl(ctx, kind, file, output, checkpoint, resume, batch_size, wrap, workers, trusted, shard, debug, value):
+    """Converts a long list or range of ids, resumable after interruptions.
+
+    Converted records are written to the output as each batch completes and
+    progress is saved to a checkpoint file. Ids not found on Divine-Pride are
+    skipped. Resume with the same ids and options as the original crawl.
+
+    \b
+    Examples:
+        # Convert all items from 500 to 30000 to item_db.yml
+        dp2rathena crawl item -o item_db.yml 500-30000
+    \b
+        # Continue the crawl after an interruption
+        dp2rathena crawl item -o item_db.yml --resume 500-30000
+    """
+    to_convert = _ids_to_convert(file, value, kind, shard)
+    checkpoint = checkpoint or f'{output}.checkpoint'
+    state = crawler.load_checkpoint(checkpoint)
+    if resume and state is None:
+        raise click.UsageError(f'No checkpoint to resume from at {checkpoint}.')
+    if not resume and state is not None and not state['Done']:
+        raise click.UsageError(
+            f'Unfinished crawl in {checkpoint}, use --resume to continue it or remove the checkpoint.'
+        )
+    done = resume and state['Done']
+    conv = _converter(ctx, debug, workers, trusted)
+    try:
+        for state in crawler.crawl(conv, kind, to_convert, output, checkpoint, resume, wrap, batch_size):
+            progress = f'{state["Completed"]} ids crawled, {state["Records"]} converted'
+            if state['Done']:
+                click.echo(f'Crawl {"already " if done else ""}complete, {progress}', err=True)
+            else:
+                click.echo(f'{progress}, last id {state["LastId"]}', err=True)
+    except crawler.CheckpointError as err:
+        raise click.UsageError(str(err))
@@ -0,0 +1,39 @@
+import json
+
+import yaml
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+# libyaml bindings are only present when PyYAML was built against libyaml,
+# otherwise fall back to the equivalent pure-Python class
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+# The libyaml emitter folds long double-quoted scalars differently, so output
+# stays with the pure-Python one. Plain records are written by emitter.
+Dumper = yaml.Dumper
+
+# Name of the tortilla response format decoded by loads_json
+JSON_FORMAT = 'dp2rathena-json'
+
+
+def load_yaml(stream):
+    return yaml.load(stream, Loader=Loader)
+
+
+def dump_yaml(data, sort_keys=False):
+    return yaml.dump(data, Dumper=Dumper, sort_keys=sort_keys)
+
+
+def loads_json(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dumps_json(data):
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+    return json.dumps(data)
@@ -1,90 +1,533 @@
+import asyncio
 import bisect
+import collections
+import functools
 import importlib
 import json
-import re
+
+from concurrent.futures import ThreadPoolExecutor
 
 import tortilla
-import yaml
 
+from dp2rathena import async_client
+from dp2rathena import codec
+from dp2rathena import dumps
+from dp2rathena import emitter
 from dp2rathena import item_mapper
+from dp2rathena import metrics
 from dp2rathena import mob_skill_mapper
 from dp2rathena import mob_mapper
+from dp2rathena import network
+from dp2rathena import pipeline
+from dp2rathena import profiling
+from dp2rathena import rathena
+from dp2rathena import resilience
+from dp2rathena import tables
+from dp2rathena import update
+from dp2rathena import validation
+
+
+API_URL = 'https://divine-pride.net/api/database'
+
+ITEM_HEADER = rathena.ITEM_HEADER
+MOB_HEADER = rathena.MOB_HEADER
+
+# Number of payloads validated and mapped together
+BATCH_SIZE = 1000
+
+# rathena splits item_db.yml into these files by item type
+ITEM_DB_PARTS = ('usable', 'equip', 'etc')
+
+tortilla.formats.register_parser(codec.JSON_FORMAT, codec.loads_json)
+
+
+# Skips blank lines and other non-numeric ids
+def _valid_ids(ids):
+    return (i for i in ids if type(i) is int or i.isnumeric())
+
+
+def item_db_part(item):
+    """Returns the ITEM_DB_PARTS file rathena keeps an item in."""
+    # Ambiguous consumables have several '/' separated types, all usable
+    item_type = str(item.get('Type')).split('/')[0]
+    if item_type in ('Healing', 'Usable', 'DelayConsume', 'Cash'):
+        return 'usable'
+    elif item_type in ('Weapon', 'Armor', 'ShadowGear'):
+        return 'equip'
+    return 'etc'
+
+
+# Formats mob_skill_db.txt rows, skipping skills with a negative level and
+# commenting out unknown skills. csv isn't used as rathena doesn't quote values.
+def _mob_skill_rows(skills, comment):
+    for skill in skills:
+        if skill['SkillLv'] < 0:
+            continue
+        row = ','.join('' if value is None else str(value) for value in skill.values())
+        if comment and 'Unknown Skill' in skill['Dummy']:
+            yield '//' + row + '\n'
+        else:
+            yield row + '\n'
+
+
+# Maps a window of payloads, validating it first when given a report.
+# Invalid payloads become error records.
+def _map_window(kind, mapper, map_batch, batch, report, profiler):
+    if report is None:
+        with profiler.stage(f'map_{kind}', len(batch)):
+            return map_batch(batch)
+    with profiler.stage('validate', len(batch)):
+        invalid = validation.validate_batch(mapper, batch, report)
+    with profiler.stage(f'map_{kind}', len(batch)):
+        mapped = list(map_batch([d for i, d in enumerate(batch) if i not in invalid]))
+    mapped = iter(mapped)
+    return [
+        mapper.error_record(data, invalid[i]) if i in invalid else next(mapped)
+        for i, data in enumerate(batch)
+    ]
+
+
+# The Id, ITEM_DB_PARTS file and serialized Body entry of a converted record
+def _dumped_record(kind, record):
+    if kind == 'item':
+        return record.get('Id'), item_db_part(record), emitter.dump_record(record)
+    dpid = record.get('Id') if type(record) is dict else None
+    return dpid, None, emitter.dump_record(record, numeric_strings=True)
+
+
+def _texts(dumped):
+    return (text for _, _, text in dumped)
+
+
+# Mappers are reused by all the windows a pipeline process maps
+@functools.lru_cache(maxsize=None)
+def _worker_mapper(kind, trusted):
+    return (item_mapper if kind == 'item' else mob_mapper).Mapper(trusted=trusted)
+
+
+# Profiler for a window mapped in a pipeline process, whose stages are
+# returned and merged into the profiler of the main process
+def _worker_profiler(profile):
+    return profiling.Profiler() if profile else profiling.NullProfiler()
 
-class Converter:
-    def __init__(self, api_key, debug=False):
-        self.api = tortilla.wrap('https://divine-pride.net/api/database', debug=debug)
+
+# Runs in pipeline processes, mapping and serializing a window of payloads.
+# Returns the dumped records, the window's validation report, if any, and
+# its stage timings when profiling.
+def _dump_window(kind, trusted, validate, profile, batch):
+    mapper = _worker_mapper(kind, trusted or validate)
+    map_batch = mapper.map_items if kind == 'item' else mapper.map_mobs
+    report = validation.Report() if validate else None
+    profiler = _worker_profiler(profile)
+    records = _map_window(kind, mapper, map_batch, batch, report, profiler)
+    with profiler.stage('serialize', len(records)):
+        dumped = [_dumped_record(kind, record) for record in records]
+    return dumped, report, profiler.stages if profile else None
+
+
+def _mob_skill_window(comment, profile, batch):
+    mapper = mob_skill_mapper.Mapper()
+    profiler = _worker_profiler(profile)
+    with profiler.stage('map_mob_skill', len(batch)):
+        skills = [mapper.map_mob_skill(data) for data in batch]
+    with profiler.stage('serialize', len(batch)):
+        rows = [''.join(_mob_skill_rows(mob_skills, comment)) for mob_skills in skills]
+    return rows, profiler.stages if profile else None
+
+
+class _Mapping:
+    """Mapping and serializing of fetched payloads, shared by Converter and
+    AsyncConverter, which set trusted, validate, report, processes and
+    profiler.
+    """
+
+    # Mappers skip their own checks when payloads are trusted or have already
+    # been checked by batch validation
+    def _mapper(self, module):
+        return module.Mapper(trusted=self.trusted or self.validate)
+
+    # Maps payloads `size` at a time with `map_batch`. With batch validation
+    # each batch is checked first and invalid payloads become error records,
+    # collected in self.report
+    def _map_all(self, kind, mapper, map_batch, payloads, size=BATCH_SIZE):
+        if self.validate:
+            self.report = validation.Report()
+        for batch in validation.windows(payloads, size):
+            records = _map_window(
+                kind, mapper, map_batch, batch, self.report if self.validate else None, self.profiler
+            )
+            metrics.REGISTRY.inc('records_mapped_total', len(records), kind=kind)
+            yield from records
+
+    # Loads reference tables before mapping, so the time is charged to them
+    # and processes forked afterwards share them
+    def _require_tables(self, *names):
+        for name in names:
+            with self.profiler.stage(f'_require_{name}'):
+                tables.preload([name])
+
+    # Yields the Id, ITEM_DB_PARTS file and Body entry of each item or mob,
+    # mapping `size` payloads at a time, by default BATCH_SIZE or
+    # pipeline.BATCH_SIZE. With processes > 1 payloads are mapped and
+    # serialized in a pipeline of processes while the next ones are fetched,
+    # see pipeline.run
+    def _dump_all(self, kind, payloads, size=None):
+        if kind == 'mob':
+            self._require_tables('item_db')
+        if self.processes == 1:
+            mapper = self._mapper(item_mapper if kind == 'item' else mob_mapper)
+            map_batch = mapper.map_items if kind == 'item' else mapper.map_mobs
+            for record in self._map_all(kind, mapper, map_batch, payloads, size or BATCH_SIZE):
+                with self.profiler.stage('serialize'):
+                    dumped = _dumped_record(kind, record)
+                yield dumped
+            return
+        if self.validate:
+            self.report = validation.Report()
+        task = functools.partial(_dump_window, kind, self.trusted, self.validate, self.profiler.enabled)
+        for dumped, report, stages in pipeline.run(task, payloads, self.processes, size):
+            if report is not None:
+                self.report.merge(report)
+            if stages is not None:
+                self.profiler.merge(stages)
+            metrics.REGISTRY.inc('records_mapped_total', len(dumped), kind=kind)
+            yield from dumped
+
+    # Payloads are mapped as they arrive and sorted once all are mapped
+    def _dump_items(self, payloads, sort, wrap):
+        items = list(self._dump_all('item', payloads))
+        if sort:
+            items.sort(key=lambda item: item[0])
+        return ''.join(emitter.stream_dumped(_texts(items), ITEM_HEADER if wrap else None))
+
+    def _dump_mob_skills(self, payloads, comment):
+        return ''.join(self._stream_mob_skills(payloads, comment))
+
+    # Yields the mob_skill_db.txt rows of each mob. With processes > 1 mobs
+    # are mapped `size` at a time in a pipeline of processes, see _dump_all
+    def _stream_mob_skills(self, payloads, comment, size=None):
+        self._require_tables('skill_db')
+        if self.processes > 1:
+            task = functools.partial(_mob_skill_window, comment, self.profiler.enabled)
+            for rows, stages in pipeline.run(task, payloads, self.processes, size):
+                if stages is not None:
+                    self.profiler.merge(stages)
+                metrics.REGISTRY.inc('records_mapped_total', len(rows), kind='mob_skill')
+                yield from rows
+            return
+        mapper = mob_skill_mapper.Mapper()
+        for data in payloads:
+            with self.profiler.stage('map_mob_skill'):
+                skills = mapper.map_mob_skill(data)
+            with self.profiler.stage('serialize'):
+                rows = ''.join(_mob_skill_rows(skills, comment))
+            metrics.REGISTRY.inc('records_mapped_total', kind='mob_skill')
+            yield rows
+
+    def _dump_mobs(self, payloads, sort, wrap):
+        mobs = list(self._dump_all('mob', payloads))
+        if sort:
+            mobs.sort(key=lambda mob: mob[0])
+        return ''.join(emitter.stream_dumped(_texts(mobs), MOB_HEADER if wrap else None, numeric_strings=True))
+
+    def remove_numerical_quotes(self, payload):
+        return emitter.remove_numerical_quotes(payload)
+
+
+class Converter(_Mapping):
+    def __init__(
+        self, api_key, debug=False, workers=1, cache=None, trusted=False, validate=False,
+        policy=None, transport=None, processes=1, profiler=None,
+    ):
+        self.transport = transport or network.Transport()
+        self.api = tortilla.wrap(API_URL, debug=debug, timeout=self.transport.timeout)
         self.api.config.params.apiKey = api_key
+        self.api.config.format = codec.JSON_FORMAT
+        self.cache = cache
+        self.policy = policy or resilience.Policy()
+        self.trusted = trusted
+        self.validate = validate
+        self.report = None
+        self.workers = max(1, workers)
+        self.processes = max(1, processes)
+        self.profiler = profiler or profiling.NullProfiler()
+        self.transport.mount(self.api._parent.session, self.workers)
+
+    # Lazily fetches ids in input order, concurrently when workers > 1.
+    # At most two fetches per worker are pending so memory stays bounded.
+    def _fetch_iter(self, fetch, ids):
+        ids = _valid_ids(ids)
+        if self.workers == 1:
+            for i in ids:
+                yield fetch(i)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = collections.deque()
+            for i in ids:
+                pending.append(executor.submit(fetch, i))
+                metrics.REGISTRY.set('fetch_queue_depth', len(pending))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _fetch_all(self, fetch, ids):
+        return list(self._fetch_iter(fetch, ids))
+
+    # Serves responses from the cache when possible, storing fresh ones.
+    # Requests go through the rate limit, retries and circuit breaker of policy
+    def _get(self, endpoint, dpid):
+        if self.cache is not None:
+            payload = self.cache.get(endpoint, dpid, self.api.config.params)
+            if payload is not None:
+                metrics.REGISTRY.inc('cache_hits_total', endpoint=endpoint)
+                return payload
+            metrics.REGISTRY.inc('cache_misses_total', endpoint=endpoint)
+        payload = self.policy.call(self._request, endpoint, dpid)
+        if self.cache is not None:
+            self.cache.set(endpoint, dpid, payload, self.api.config.params)
+        return payload
+
+    def _request(self, endpoint, dpid):
+        return self.api(endpoint).get(dpid)
 
     def fetch_item(self, itemid):
         try:
-            return self.api.item.get(itemid)
+            with self.profiler.stage('fetch_item'), metrics.REGISTRY.time('fetch_seconds', endpoint='item'):
+                return self._get('item', itemid)
         except IOError as err:
             if str(err).startswith('404'):
+                metrics.REGISTRY.inc('not_found_total', endpoint='item')
                 return {'Id': int(itemid), 'Error': 'Item not found'}
             raise err
 
     def convert_item(self, itemids, sort=False, wrap=True):
-        mapper = item_mapper.Mapper()
-        items = list()
-        for itemid in itemids:
-            if type(itemid) is int or itemid.isnumeric():
-                items.append(mapper.map_item(self.fetch_item(itemid)))
+        return self._dump_items(self._fetch_iter(self.fetch_item, itemids), sort, wrap)
+
+    # Yields item_db.yml chunks as each item is fetched
+    def stream_item(self, itemids, wrap=True):
+        items = self._dump_all('item', self._fetch_iter(self.fetch_item, itemids), 1)
+        return emitter.stream_dumped(_texts(items), ITEM_HEADER if wrap else None)
+
+    # Writes item_db.yml to a text stream as items are converted, or split by
+    # item type when `out` maps each of ITEM_DB_PARTS to a text stream
+    def write_item(self, itemids, out, sort=False, wrap=True):
+        items = self._dump_all('item', self._fetch_iter(self.fetch_item, itemids))
         if sort:
-            items.sort(key=lambda item: item['Id'])
-        if wrap:
-            items = {
-                'Header': {
-                    'Type': 'ITEM_DB',
-                    'Version': 1,
-                },
-                'Body': items,
-            }
-        return yaml.dump(items, sort_keys=False)
+            items = sorted(items, key=lambda item: item[0])
+        header = ITEM_HEADER if wrap else None
+        if not isinstance(out, dict):
+            self.profiler.writelines(out, emitter.stream_dumped(_texts(items), header))
+            return
+        writers = {part: emitter.Writer(f, header) for part, f in out.items()}
+        for _, part, text in items:
+            with self.profiler.stage('output'):
+                writers[part].write_dumped(text)
+        with self.profiler.stage('output'):
+            for writer in writers.values():
+                writer.close()
+
+    # Yields converted items as they are fetched, skipping items not found
+    def found_items(self, itemids):
+        mapper = self._mapper(item_mapper)
+        items = self._map_all('item', mapper, mapper.map_items, self._fetch_iter(self.fetch_item, itemids))
+        return (item for item in items if 'Error' not in item)
+
+    # Writes the item_db.yml in `existing` to `out` with only the given items
+    # converted and spliced in, see update.splice. Items not found are skipped.
+    def update_item(self, itemids, existing, out):
+        records = {item['Id']: item for item in self.found_items(itemids)}
+        with self.profiler.stage('output'):
+            update.splice(existing, records, out)
 
     def fetch_mob(self, mobid):
         try:
-            return self.api.monster.get(mobid)
+            with self.profiler.stage('fetch_mob'), metrics.REGISTRY.time('fetch_seconds', endpoint='monster'):
+                return self._get('monster', mobid)
         except IOError as err:
             if str(err).startswith('404'):
+                metrics.REGISTRY.inc('not_found_total', endpoint='monster')
                 return f'Id: {int(mobid)}, Error: Mob not found'
             raise err
 
     def convert_mob_skill(self, mobids, comment=True):
-        mapper = mob_skill_mapper.Mapper()
-        all_mob_skills = list()
-        for mobid in mobids:
-            if type(mobid) is int or mobid.isnumeric():
-                all_mob_skills.append(mapper.map_mob_skill(self.fetch_mob(mobid)))
-
-        result = ''
-        for mob_skills in all_mob_skills:
-            for skill in mob_skills:
-                if skill['SkillLv'] < 0:
-                    continue
-                elif comment and 'Unknown Skill' in skill['Dummy']:
-                    result += '//'
-                for value in skill.values():
-                    result += ('' if value is None else str(value)) + ','
-                result = result[:-1] + '\n'
-        return result
+        return self._dump_mob_skills(self._fetch_iter(self.fetch_mob, mobids), comment)
+
+    # Yields mob_skill_db.txt lines for each mob as it is fetched
+    def stream_mob_skill(self, mobids, comment=True):
+        return self._stream_mob_skills(self._fetch_iter(self.fetch_mob, mobids), comment, 1)
+
+    # Writes mob_skill_db.txt lines to a text stream as mobs are converted
+    def write_mob_skill(self, mobids, out, comment=True):
+        self.profiler.writelines(out, self._stream_mob_skills(self._fetch_iter(self.fetch_mob, mobids), comment))
 
     def convert_mob(self, mobids, sort=False, wrap=True):
-        mapper = mob_mapper.Mapper()
-        mobs = list()
-        for mobid in mobids:
-            if type(mobid) is int or mobid.isnumeric():
-                mobs.append(mapper.map_mob(self.fetch_mob(mobid)))
+        return self._dump_mobs(self._fetch_iter(self.fetch_mob, mobids), sort, wrap)
+
+    # Yields mob_db.yml chunks as each mob is fetched
+    def stream_mob(self, mobids, wrap=True):
+        mobs = self._dump_all('mob', self._fetch_iter(self.fetch_mob, mobids), 1)
+        return emitter.stream_dumped(_texts(mobs), MOB_HEADER if wrap else None, numeric_strings=True)
+
+    # Writes mob_db.yml to a text stream as mobs are converted
+    def write_mob(self, mobids, out, sort=False, wrap=True):
+        mobs = self._dump_all('mob', self._fetch_iter(self.fetch_mob, mobids))
         if sort:
-            mobs.sort(key=lambda mob: mob['Id'])
-        if wrap:
-            mobs = {
-                'Header': {
-                    'Type': 'MOB_DB',
-                    'Version': 2,
-                },
-                'Body': mobs,
-            }
-        return self.remove_numerical_quotes(yaml.dump(mobs, sort_keys=False))
+            mobs = sorted(mobs, key=lambda mob: mob[0])
+        self.profiler.writelines(
+            out, emitter.stream_dumped(_texts(mobs), MOB_HEADER if wrap else None, numeric_strings=True)
+        )
 
-    def remove_numerical_quotes(self, payload):
-        return re.sub(r'(.*)\'(\d+)\'(.*)', r'\1\2\3', payload)
+    # Yields converted mobs as they are fetched, skipping mobs not found
+    def found_mobs(self, mobids):
+        self._require_tables('item_db')
+        mapper = self._mapper(mob_mapper)
+        mobs = self._map_all('mob', mapper, mapper.map_mobs, self._fetch_iter(self.fetch_mob, mobids))
+        return (mob for mob in mobs if type(mob) is dict and 'Error' not in mob)
+
+    # Writes the mob_db.yml in `existing` to `out` with only the given mobs
+    # converted and spliced in, see update.splice. Mobs not found are skipped.
+    def update_mob(self, mobids, existing, out):
+        records = {mob['Id']: mob for mob in self.found_mobs(mobids)}
+        with self.profiler.stage('output'):
+            update.splice(existing, records, out, numeric_strings=True)
+
+    # Fetches each mob once for both mob_db.yml and mob_skill_db.txt
+    def convert_mobs(self, mobids, sort=False, wrap=True, comment=True):
+        payloads = self._fetch_all(self.fetch_mob, mobids)
+        return self._dump_mobs(payloads, sort, wrap), self._dump_mob_skills(payloads, comment)
+
+
+class DumpConverter(Converter):
+    """Converter reading Divine-Pride payloads saved on disk, see dumps.read.
+
+    Nothing is fetched from the API. Converting ids=None streams every
+    payload in the dump, in dump order, optionally only those in shard
+    (index, count). Converting a list of ids looks them up in the dump
+    instead and outputs them in the given order, with ids missing from the
+    dump output as not found, like a Divine-Pride 404.
+    """
+
+    def __init__(self, path, trusted=False, validate=False, shard=None, processes=1, profiler=None):
+        self.path = path
+        self.shard = shard
+        self.cache = None
+        self.policy = resilience.Policy(retries=0)
+        self.transport = network.Transport()
+        self.trusted = trusted
+        self.validate = validate
+        self.report = None
+        self.workers = 1
+        self.processes = max(1, processes)
+        self.profiler = profiler or profiling.NullProfiler()
+        self._index = dict()
+
+    def _payloads(self, endpoint):
+        payloads = self.profiler.iterate('read_dump', dumps.read(self.path, endpoint))
+        if self.shard is None:
+            return payloads
+        index, count = self.shard
+        return (p for p in payloads if p['id'] % count == index - 1)
+
+    def _fetch_iter(self, fetch, ids):
+        endpoint = 'item' if fetch == self.fetch_item else 'monster'
+        if ids is None:
+            return self._payloads(endpoint)
+        # Only the requested payloads are kept while the dump is read
+        ids = list(_valid_ids(ids))
+        wanted = set(int(i) for i in ids)
+        self._index[endpoint] = {p['id']: p for p in self._payloads(endpoint) if p['id'] in wanted}
+        return super()._fetch_iter(fetch, ids)
+
+    def _request(self, endpoint, dpid):
+        try:
+            return self._index[endpoint][int(dpid)]
+        except KeyError:
+            raise IOError(f'404 Client Error: Not Found in {self.path} for {endpoint}/{dpid}')
+
+
+class AsyncConverter(_Mapping):
+    """Converter for callers already running an asyncio event loop.
+
+    Fetches go through a native asyncio client that keeps up to `workers`
+    requests in flight, and the fetch and convert methods are coroutines
+    returning the same output as their Converter counterparts. Ids are
+    fetched all at once, so the streaming, writing and update methods of
+    Converter have no async counterparts.
+    """
+
+    def __init__(
+        self, api_key, debug=False, workers=100, cache=None, trusted=False, validate=False,
+        policy=None, transport=None,
+    ):
+        self.transport = transport or network.Transport()
+        self.api = async_client.Client(
+            api_key, API_URL, concurrency=workers, debug=debug,
+            timeout=self.transport.connect_timeout + self.transport.read_timeout,
+            compress=self.transport.compress,
+        )
+        self.cache = cache
+        self.policy = policy or resilience.Policy()
+        self.workers = workers
+        self.processes = 1
+        self.profiler = profiling.NullProfiler()
+        self.trusted = trusted
+        self.validate = validate
+        self.report = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.api.close()
+
+    async def _fetch_all(self, fetch, ids):
+        return await asyncio.gather(*[fetch(i) for i in _valid_ids(ids)])
+
+    async def _get(self, endpoint, dpid):
+        if self.cache is not None:
+            payload = self.cache.get(endpoint, dpid)
+            if payload is not None:
+                metrics.REGISTRY.inc('cache_hits_total', endpoint=endpoint)
+                return payload
+            metrics.REGISTRY.inc('cache_misses_total', endpoint=endpoint)
+        payload = await self.policy.call_async(self.api.get, endpoint, dpid)
+        if self.cache is not None:
+            self.cache.set(endpoint, dpid, payload)
+        return payload
+
+    async def fetch_item(self, itemid):
+        try:
+            with metrics.REGISTRY.time('fetch_seconds', endpoint='item'):
+                return await self._get('item', itemid)
+        except IOError as err:
+            if str(err).startswith('404'):
+                metrics.REGISTRY.inc('not_found_total', endpoint='item')
+                return {'Id': int(itemid), 'Error': 'Item not found'}
+            raise err
+
+    async def convert_item(self, itemids, sort=False, wrap=True):
+        return self._dump_items(await self._fetch_all(self.fetch_item, itemids), sort, wrap)
+
+    async def fetch_mob(self, mobid):
+        try:
+            with metrics.REGISTRY.time('fetch_seconds', endpoint='monster'):
+                return await self._get('monster', mobid)
+        except IOError as err:
+            if str(err).startswith('404'):
+                metrics.REGISTRY.inc('not_found_total', endpoint='monster')
+                return f'Id: {int(mobid)}, Error: Mob not found'
+            raise err
+
+    async def convert_mob_skill(self, mobids, comment=True):
+        return self._dump_mob_skills(await self._fetch_all(self.fetch_mob, mobids), comment)
+
+    async def convert_mob(self, mobids, sort=False, wrap=True):
+        return self._dump_mobs(await self._fetch_all(self.fetch_mob, mobids), sort, wrap)
+
+    async def convert_mobs(self, mobids, sort=False, wrap=True, comment=True):
+        payloads = await self._fetch_all(self.fetch_mob, mobids)
+        return self._dump_mobs(payloads, sort, wrap), self._dump_mob_skills(payloads, comment)
@@ -0,0 +1,136 @@
+import itertools
+import json
+import os
+
+from pathlib import Path
+
+from dp2rathena import atomic
+from dp2rathena import rathena
+from dp2rathena import validation
+
+
+# Number of ids converted between checkpoints
+BATCH_SIZE = 100
+
+
+class CheckpointError(Exception):
+    """Raised when a checkpoint doesn't match the crawl being resumed."""
+
+
+def load_checkpoint(path):
+    """Returns the state saved in a checkpoint file, or None if missing."""
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    with atomic.open_file(path) as f:
+        f.write(json.dumps(state, indent=2) + '\n')
+
+
+def _found(conv, kind, ids):
+    return conv.found_items(ids) if kind == 'item' else conv.found_mobs(ids)
+
+
+def _skip(ids, state):
+    """Skips the ids completed in `state`, checking they are the same ids."""
+    last = None
+    for last in itertools.islice(ids, state['Completed']):
+        pass
+    if state['Completed'] and last != state['LastId']:
+        raise CheckpointError(
+            f'Id {state["Completed"]} is {last}, not {state["LastId"]} as in the checkpoint.'
+            ' Resume with the same ids and --shard as the original crawl.'
+        )
+
+
+def _check_output(output, state):
+    """Checks `output` is the file written by the checkpointed crawl, with
+    at least as much written as when the checkpoint was saved.
+    """
+    path = Path(output).resolve()
+    if str(path) != state['Output']:
+        raise CheckpointError(f'Checkpoint is for a crawl writing {state["Output"]}, not {path}.')
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        raise CheckpointError(f'Output {path} of the checkpointed crawl is missing.') from None
+    if size < state['Size']:
+        raise CheckpointError(
+            f'Output {path} is {size} bytes, less than the {state["Size"]} in the checkpoint.'
+        )
+
+
+def crawl(conv, kind, ids, output, checkpoint, resume=False, wrap=True, batch_size=BATCH_SIZE):
+    """Converts ids to `output` a batch at a time, saving progress to `checkpoint`.
+
+    Records are appended to `output` as each batch is converted, then the
+    output is flushed to disk and the checkpoint saved with the number of
+    ids completed, the last of them and the size of the output. Ids not found
+    on Divine-Pride are skipped. With `resume` the output is truncated back to
+    the checkpointed size, dropping any partly written batch, and the crawl
+    continues after the last completed id, so `ids` and `output` must be the
+    same as for the original crawl. Yields the saved state after each batch
+    and once done, also when resuming a crawl that was already done.
+    """
+    # emitter imports PyYAML, which commands only need once they convert
+    from dp2rathena import emitter
+
+    header, numeric_strings = rathena.KINDS[kind]
+    header = header if wrap else None
+    ids = (str(i) for i in ids if str(i).isdigit())
+    state = load_checkpoint(checkpoint) if resume else None
+    if state is None:
+        state = {
+            'Type': kind,
+            'Output': str(Path(output).resolve()),
+            'Wrap': wrap,
+            'Completed': 0,
+            'LastId': None,
+            'Records': 0,
+            'Size': 0,
+            'Done': False,
+        }
+        with open(output, 'w', encoding='utf-8') as f:
+            if header is not None:
+                f.write(emitter.dump_header(header, numeric_strings))
+            f.flush()
+            state['Size'] = os.fstat(f.fileno()).st_size
+        save_checkpoint(checkpoint, state)
+    elif (state['Type'], state['Wrap']) != (kind, wrap):
+        raise CheckpointError(f'Checkpoint is for a {state["Type"]} crawl with different options.')
+    elif not state['Done']:
+        _check_output(output, state)
+    if state['Done']:
+        yield dict(state)
+        return
+    _skip(ids, state)
+    os.truncate(output, state['Size'])
+    with open(output, 'a', encoding='utf-8', buffering=atomic.BUFFER_SIZE) as f:
+        for batch in validation.windows(ids, batch_size):
+            for record in _found(conv, kind, batch):
+                with conv.profiler.stage('serialize'):
+                    text = emitter.dump_record(record, numeric_strings)
+                with conv.profiler.stage('output'):
+                    if state['Records'] == 0 and header is not None:
+                        f.write('Body:\n')
+                    f.write(text)
+                state['Records'] += 1
+            with conv.profiler.stage('output'):
+                f.flush()
+                os.fsync(f.fileno())
+            state['Completed'] += len(batch)
+            state['LastId'] = batch[-1]
+            state['Size'] = os.fstat(f.fileno()).st_size
+            save_checkpoint(checkpoint, state)
+            yield dict(state)
+        if state['Records'] == 0:
+            f.write('Body: []\n' if header is not None else '[]\n')
+        f.flush()
+        os.fsync(f.fileno())
+        state['Size'] = os.fstat(f.fileno()).st_size
+    state['Done'] = True
+    save_checkpoint(checkpoint, state)
+    yield dict(state)
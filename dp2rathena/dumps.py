@@ -0,0 +1,69 @@
+import gzip
+import re
+
+from pathlib import Path
+
+from dp2rathena import codec
+
+
+# Payload files in a dump directory, e.g. item_1101.json or mob_1002.json.gz,
+# or just 1101.json in a directory holding a single endpoint
+_FILENAMES = {
+    'item': re.compile(r'(?:item_)?(\d+)\.json(?:\.gz)?'),
+    'monster': re.compile(r'(?:mob_|monster_)?(\d+)\.json(?:\.gz)?'),
+}
+
+
+def _open(path):
+    return gzip.open(path, 'rb') if path.suffix == '.gz' else open(path, 'rb')
+
+
+def _is_json(path):
+    return path.name.endswith(('.json', '.json.gz'))
+
+
+def read_ndjson(path):
+    """Yields payloads from a file with one JSON payload per line,
+    optionally gzip compressed. The file is read a line at a time, so
+    snapshots of any size are streamed in constant memory.
+    """
+    with _open(Path(path)) as f:
+        for line in f:
+            if line.strip():
+                yield codec.loads_json(line)
+
+
+def read_json(path):
+    """Yields the payload, or each payload of a list, in a JSON file."""
+    with _open(Path(path)) as f:
+        data = codec.loads_json(f.read())
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+
+def read_dir(path, endpoint):
+    """Yields the payloads in a directory of per-id JSON files for
+    `endpoint`, in id order.
+    """
+    pattern = _FILENAMES[endpoint]
+    files = list()
+    for child in Path(path).iterdir():
+        match = pattern.fullmatch(child.name)
+        if match:
+            files.append((int(match.group(1)), child))
+    for _, child in sorted(files):
+        yield from read_json(child)
+
+
+def read(path, endpoint):
+    """Yields Divine-Pride `endpoint` payloads saved in `path`: a directory
+    of JSON files, a JSON file or an NDJSON file, any of them gzipped.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return read_dir(path, endpoint)
+    elif _is_json(path):
+        return read_json(path)
+    return read_ndjson(path)
@@ -0,0 +1,183 @@
+import functools
+import re
+
+import yaml
+
+from dp2rathena import codec
+
+
+# Strings PyYAML can write as plain scalars: ASCII, starting with a letter or
+# digit, without a trailing space or characters with meaning mid-scalar
+_PLAIN = re.compile(r"[A-Za-z0-9](?:[A-Za-z0-9_ '().,/+&!?*%@$~=<>;\[\]{}-]*[A-Za-z0-9_'().,/+&!?*%@$~=<>;\[\]{}-])?")
+_NUMERIC = re.compile(r'[0-9]+')
+
+_STR_TAG = 'tag:yaml.org,2002:str'
+_resolver = yaml.resolver.Resolver()
+
+# Line length at which PyYAML starts folding scalars containing spaces
+_WIDTH = 80
+
+
+class _Fallback(Exception):
+    """Raised for values the emitter doesn't write itself."""
+
+
+# Plain scalars which would load as another type, such as 'yes' or '12',
+# are quoted by PyYAML
+@functools.lru_cache(maxsize=65536)
+def _plain(value):
+    if not _PLAIN.fullmatch(value):
+        return False
+    return _resolver.resolve(yaml.ScalarNode, value, (True, False)) == _STR_TAG
+
+
+def _scalar(value, column, numeric_strings):
+    if value is True:
+        return 'true'
+    elif value is False:
+        return 'false'
+    elif value is None:
+        return 'null'
+    elif type(value) is int:
+        return str(value)
+    elif type(value) is str:
+        if _plain(value):
+            if ' ' not in value or column + len(value) <= _WIDTH:
+                return value
+        elif numeric_strings and _NUMERIC.fullmatch(value):
+            return value
+    raise _Fallback
+
+
+# Containers are tracked in `seen` as yaml.dump writes an anchor and alias for
+# one appearing twice, which is left to the fallback
+def _container(value, seen):
+    if id(value) in seen:
+        raise _Fallback
+    seen.add(id(value))
+
+
+def _mapping(out, mapping, indent, prefix, numeric_strings, seen):
+    _container(mapping, seen)
+    pad = ' ' * indent
+    for key, value in mapping.items():
+        if type(key) is not str or not _plain(key):
+            raise _Fallback
+        line = prefix + key + ':'
+        prefix = pad
+        if type(value) is dict:
+            if len(value) == 0:
+                _container(value, seen)
+                out.append(line + ' {}\n')
+            else:
+                out.append(line + '\n')
+                _mapping(out, value, indent + 2, pad + '  ', numeric_strings, seen)
+        elif type(value) is list:
+            _container(value, seen)
+            if len(value) == 0:
+                out.append(line + ' []\n')
+            else:
+                out.append(line + '\n')
+                _sequence(out, value, indent, numeric_strings, seen)
+        else:
+            out.append(line + ' ' + _scalar(value, len(line) + 1, numeric_strings) + '\n')
+
+
+# Block sequences are written indentless, at the indent of their parent key
+def _sequence(out, sequence, indent, numeric_strings, seen):
+    prefix = ' ' * indent + '- '
+    for value in sequence:
+        if type(value) is dict and len(value) > 0:
+            _mapping(out, value, indent + 2, prefix, numeric_strings, seen)
+        elif type(value) in (dict, list):
+            raise _Fallback
+        else:
+            out.append(prefix + _scalar(value, len(prefix), numeric_strings) + '\n')
+
+
+def remove_numerical_quotes(text):
+    return re.sub(r'(.*)\'(\d+)\'(.*)', r'\1\2\3', text)
+
+
+def dump_record(record, numeric_strings=False):
+    """Returns a rathena Body entry, as yaml.dump([record]) would.
+
+    Records made of ints, bools and simple strings are written directly.
+    Anything else, such as strings which need quoting or folding, goes
+    through yaml.dump for the whole record. With `numeric_strings` strings of
+    digits are written unquoted, as rathena mob_db expects for e.g. Ai.
+    """
+    out = list()
+    try:
+        if type(record) is not dict:
+            raise _Fallback
+        _mapping(out, record, 2, '- ', numeric_strings, set())
+    except _Fallback:
+        text = codec.dump_yaml([record])
+        return remove_numerical_quotes(text) if numeric_strings else text
+    return ''.join(out)
+
+
+def dump_header(header, numeric_strings=False):
+    """Returns the Header section of a rathena document."""
+    lines = list()
+    _mapping(lines, {'Header': header}, 0, '', numeric_strings, set())
+    return ''.join(lines)
+
+
+class Writer:
+    """Writes a rathena Header/Body document to a text stream a record at a
+    time, the same as stream. Used to split output across several files.
+    """
+
+    def __init__(self, out, header=None, numeric_strings=False):
+        self.out = out
+        self.header = header
+        self.numeric_strings = numeric_strings
+        self.empty = True
+        if header is not None:
+            out.write(dump_header(header, numeric_strings))
+
+    def write(self, record):
+        self.write_dumped(dump_record(record, self.numeric_strings))
+
+    # Writes a Body entry already serialized by dump_record
+    def write_dumped(self, text):
+        if self.empty and self.header is not None:
+            self.out.write('Body:\n')
+        self.empty = False
+        self.out.write(text)
+
+    def close(self):
+        if self.empty:
+            self.out.write('Body: []\n' if self.header is not None else '[]\n')
+
+
+def stream(records, header=None, numeric_strings=False):
+    """Yields a rathena Header/Body document one chunk per Body entry.
+
+    Without a header only the Body entries are written, as a list.
+    """
+    texts = (dump_record(record, numeric_strings) for record in records)
+    return stream_dumped(texts, header, numeric_strings)
+
+
+def stream_dumped(texts, header=None, numeric_strings=False):
+    """Yields a rathena document as stream does, from Body entries already
+    serialized by dump_record, e.g. in another process.
+    """
+    empty = True
+    if header is not None:
+        yield dump_header(header, numeric_strings)
+    for text in texts:
+        if empty and header is not None:
+            yield 'Body:\n'
+        empty = False
+        yield text
+    if empty:
+        yield 'Body: []\n' if header is not None else '[]\n'
+
+
+def dump(records, header=None, numeric_strings=False):
+    """Returns a rathena Header/Body document, see stream."""
+    return ''.join(stream(records, header, numeric_strings))
@@ -1,8 +1,28 @@
 from enum import Enum
 
 import copy
+import itertools
 import re
 
+from dp2rathena import schema
+
+try:
+    import numpy
+except ImportError:  # optional dependency
+    numpy = None
+
+
+# Maps each distinct bitmask to the flags whose bits are all set in it, testing
+# every bitmask against every flag at once when NumPy is installed
+def _match_flags(bitmasks, flags):
+    bitmasks = list(bitmasks)
+    if numpy is None or len(bitmasks) == 0:
+        return {b: [name for name, mask in flags if b & mask == mask] for b in bitmasks}
+    names = [name for name, _ in flags]
+    masks = numpy.array([mask for _, mask in flags], dtype=numpy.int64)
+    hits = (numpy.array(bitmasks, dtype=numpy.int64)[:, None] & masks) == masks
+    return {b: list(itertools.compress(names, row)) for b, row in zip(bitmasks, hits.tolist())}
+
 class RAType(Enum):
     HEALING = 'Healing'             # Healing item.
     USABLE = 'Usable'               # Usable item.
@@ -145,7 +165,10 @@ class DPType(Enum):
     REGENERATION = 'Regeneration'       # Used for stat buffs and healing items
 
 class Mapper:
-    def __init__(self):
+    # With trusted=True field validation is skipped, for payloads which are
+    # cached or were already checked with validation.validate_batch
+    def __init__(self, trusted=False):
+        self.trusted = trusted
         self.schema = {
             'Id': 'id',                       # Item ID.
             'AegisName': 'aegisName',         # Server name to reference the item in scripts and lookups, no spaces.
@@ -357,25 +380,42 @@ class Mapper:
             0x200000: RALocation.SHADOW_LEFT_ACCESSORY,  # DP location: Accessory
         }
 
+        # Payload fields read when mapping, checked for presence
+        self.fields = [
+            'name', 'itemTypeId', 'itemSubTypeId', 'weight', 'job',
+            'locationId', 'itemLevel', 'requiredLevel', 'classNum', 'itemMoveInfo',
+        ]
+
+        # Accepted values of payload fields
+        self.rules = {
+            'itemTypeId': lambda v: v in self.item_type_map,
+            'itemSubTypeId': lambda v: v in self.item_subtype_map,
+            'locationId': lambda v: v is None or 0 <= v <= 0x3FFFFF,
+            'job': lambda v: v is None or 0 <= v <= 0xFFFFF,
+            'itemLevel': lambda v: v is None or 0 <= v <= 4,
+            'classNum': lambda v: v is None or v >= 0,
+            'requiredLevel': lambda v: v is None or 0 <= v <= 999,
+        }
+
+        self._map_record = schema.compile_schema(self.schema)
+        self._map_trade = schema.compile_schema(self.trade_schema)
+
+        # Used by map_items, with bitmask flags decoded for the whole batch
+        self._matched = None
+        self._map_batch_record = schema.compile_schema(dict(
+            self.schema,
+            Jobs=self._batch_job,
+            Locations=self._batch_locationId,
+        ))
+
     def _validate(self, data, *argv):
+        if self.trusted:
+            return
         for arg in argv:
             assert arg in data
-            v = data[arg]
-            msg = f'Unrecognised {arg}: {v}'
-            if arg == 'itemTypeId':
-                assert v in self.item_type_map, msg
-            elif arg == 'itemSubTypeId':
-                assert v in self.item_subtype_map, msg
-            elif arg == 'locationId' and v is not None:
-                assert v >= 0 and v <= 0x3FFFFF, msg
-            elif arg == 'job' and v is not None:
-                assert v >= 0 and v <= 0xFFFFF, msg
-            elif arg == 'itemLevel' and v is not None:
-                assert v >= 0 and v <= 4, msg
-            elif arg == 'classNum' and v is not None:
-                assert v >= 0, msg
-            elif arg == 'requiredLevel' and v is not None:
-                assert v >= 0 and v <= 999, msg
+            if arg in self.rules:
+                v = data[arg]
+                assert self.rules[arg](v), f'Unrecognised {arg}: {v}'
 
     def _name(self, data):
         self._validate(data, 'name')
@@ -433,7 +473,9 @@ class Mapper:
             return 0
         return int(w * 10)
 
-    def _job(self, data):
+    # `matched` are the values of the job_map flags set in data['job'], when
+    # already decoded
+    def _job(self, data, matched=None):
         self._validate(data, 'job')
         job_id = data['job']
         if job_id is None or job_id == 0:
@@ -452,12 +494,13 @@ class Mapper:
         else:
             if job_id & 0xFFFFF == 0xFFFFF:
                 return None
-            for k, v in self.job_map.items():
-                if job_id & v == v:
-                    # Note: rathena groups Novice and Supernovice permissions
-                    if k == RAJob.NOVICE:
-                        jobs[RAJob.SUPERNOVICE.value] = True
-                    jobs[k.value] = True
+            if matched is None:
+                matched = [k.value for k, v in self.job_map.items() if job_id & v == v]
+            for k in matched:
+                # Note: rathena groups Novice and Supernovice permissions
+                if k == RAJob.NOVICE.value:
+                    jobs[RAJob.SUPERNOVICE.value] = True
+                jobs[k] = True
 
         # Result is sorted alphabetically in rathena
         return dict(sorted(jobs.items()))
@@ -486,7 +529,9 @@ class Mapper:
         else:
             return None
 
-    def _locationId(self, data):
+    # `matched` are the values of the location_map flags set in
+    # data['locationId'], when already decoded
+    def _locationId(self, data, matched=None):
         self._validate(data, 'locationId', 'itemTypeId')
         location_id = data['locationId']
         locs = dict()
@@ -497,9 +542,10 @@ class Mapper:
             else:
                 return None
 
-        for k, v in self.location_map.items():
-            if location_id & k == k:
-                locs[self.location_map[k].value] = True
+        if matched is None:
+            matched = [v.value for k, v in self.location_map.items() if location_id & k == k]
+        for v in matched:
+            locs[v] = True
 
         # Clean up 'both' locations
         if RALocation.LEFT_HAND.value in locs and RALocation.RIGHT_HAND.value in locs:
@@ -530,7 +576,7 @@ class Mapper:
 
     def _itemMoveInfo(self, data):
         self._validate(data, 'itemMoveInfo')
-        result = self._map_schema(copy.copy(self.trade_schema), data['itemMoveInfo'])
+        result = self._map_trade(data['itemMoveInfo'])
         cleaned = {'Override': 100} # rathena outputs 100 by default
 
         # Note: rathena excludes this section when no trade restrictions exist
@@ -545,6 +591,7 @@ class Mapper:
             return None
         return cleaned
 
+    # Reference implementation of the compiled schema functions
     def _map_schema(self, schema, data):
         if schema is None:
             return None
@@ -570,7 +617,45 @@ class Mapper:
                 result[k] = v
         return result
 
+    def error_record(self, data, message):
+        return {'Id': data['id'], 'Error': message}
+
     def map_item(self, data):
         if data is None or 'Error' in data:
             return data
-        return self._map_schema(self.schema, data)
+        return self._map_record(data)
+
+    def _batch_job(self, data):
+        return self._job(data, self._matched['job'].get(data.get('job')))
+
+    def _batch_locationId(self, data):
+        return self._locationId(data, self._matched['location'].get(data.get('locationId')))
+
+    def map_items(self, payloads):
+        """Maps a batch of payloads, returning the same as map_item for each.
+
+        The job and locationId bitmasks are decoded once per distinct value in
+        the batch instead of per item, all values at once with NumPy when it
+        is installed.
+        """
+        payloads = list(payloads)
+        records = [d for d in payloads if d is not None and 'Error' not in d]
+        jobs = {d.get('job') for d in records}
+        locations = {d.get('locationId') for d in records}
+        self._matched = {
+            'job': _match_flags(
+                [v for v in jobs if type(v) is int and 0 < v <= 0xFFFFF],
+                [(k.value, v) for k, v in self.job_map.items()],
+            ),
+            'location': _match_flags(
+                [v for v in locations if type(v) is int and 0 < v <= 0x3FFFFF],
+                [(v.value, k) for k, v in self.location_map.items()],
+            ),
+        }
+        try:
+            return [
+                d if d is None or 'Error' in d else self._map_batch_record(d)
+                for d in payloads
+            ]
+        finally:
+            self._matched = None
@@ -0,0 +1,180 @@
+import bisect
+import contextlib
+import json
+import threading
+import time
+
+
+PREFIX = 'dp2rathena_'
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HELP = {
+    'requests_total': 'Requests sent to Divine-Pride, including retries.',
+    'retries_total': 'Requests retried after a 429, 5xx or timeout.',
+    'not_found_total': 'Ids Divine-Pride has no record of.',
+    'cache_hits_total': 'Responses served from the on-disk cache.',
+    'cache_misses_total': 'Responses not in the on-disk cache.',
+    'records_mapped_total': 'Records converted to rathena format.',
+    'fetch_seconds': 'Time to fetch a record, including the cache, rate limiting and retries.',
+    'fetch_queue_depth': 'Fetches submitted to workers and not yet consumed.',
+    'pipeline_queue_depth': 'Batches submitted to mapping processes and not yet consumed.',
+    'duration_seconds': 'Seconds since metrics were reset.',
+    'records_per_second': 'Records mapped per second since metrics were reset.',
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    # Cumulative counts per upper bound, as Prometheus expects
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    """Counters, gauges and latency histograms for one process.
+
+    Each metric is identified by its name and labels, e.g.
+    inc('records_mapped_total', kind='mob'). Gauges keep their highest value
+    as well as their last, since queues are empty by the time the summary
+    is written.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = dict()
+            self.gauges = dict()
+            self.histograms = dict()
+            self.started = self.clock()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            _, highest = self.gauges.get(key, (0, value))
+            self.gauges[key] = (value, max(highest, value))
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = _Histogram()
+            self.histograms[key].observe(value)
+
+    @contextlib.contextmanager
+    def time(self, name, **labels):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(name, self.clock() - start, **labels)
+
+    # Gauges derived from the counters when the summary is written
+    def _derived(self):
+        elapsed = self.clock() - self.started
+        derived = {_key('duration_seconds', {}): elapsed}
+        for (name, labels), value in self.counters.items():
+            if name == 'records_mapped_total':
+                derived[('records_per_second', labels)] = value / elapsed if elapsed else 0
+        return derived
+
+    def to_dict(self):
+        """Returns the metrics as a JSON serializable summary."""
+        with self._lock:
+            summary = {'counters': dict(), 'gauges': dict(), 'histograms': dict()}
+            for (name, labels), value in sorted(self.counters.items()):
+                summary['counters'][name + _labels(labels)] = value
+            for (name, labels), (value, highest) in sorted(self.gauges.items()):
+                summary['gauges'][name + _labels(labels)] = {'value': value, 'max': highest}
+            for (name, labels), value in sorted(self._derived().items()):
+                summary['gauges'][name + _labels(labels)] = {'value': value}
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                summary['histograms'][name + _labels(labels)] = {
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'mean': histogram.sum / histogram.count,
+                    'max': histogram.max,
+                    'buckets': {str(bound): count for bound, count in histogram.cumulative()},
+                }
+            return summary
+
+    def to_prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = list()
+
+        def header(name, kind):
+            lines.append(f'# HELP {PREFIX}{name} {HELP.get(name, name)}')
+            lines.append(f'# TYPE {PREFIX}{name} {kind}')
+
+        with self._lock:
+            families = dict()
+            for (name, labels), value in self.counters.items():
+                families.setdefault((name, 'counter'), []).append((labels, value))
+            for (name, labels), (value, highest) in self.gauges.items():
+                families.setdefault((name, 'gauge'), []).append((labels, value))
+                families.setdefault((name + '_max', 'gauge'), []).append((labels, highest))
+            for (name, labels), value in self._derived().items():
+                families.setdefault((name, 'gauge'), []).append((labels, value))
+            for (name, kind), samples in sorted(families.items()):
+                header(name, kind)
+                for labels, value in sorted(samples):
+                    lines.append(f'{PREFIX}{name}{_labels(labels)} {value}')
+            for name in sorted({name for name, _ in self.histograms}):
+                header(name, 'histogram')
+                for (metric, labels), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{PREFIX}{name}_bucket{_labels(labels, [("le", bound)])} {count}')
+                    lines.append(f'{PREFIX}{name}_sum{_labels(labels)} {histogram.sum}')
+                    lines.append(f'{PREFIX}{name}_count{_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def dumps(self, path):
+        """Returns the metrics as JSON if `path` ends with .json, otherwise
+        as Prometheus text, e.g. for a node_exporter .prom textfile.
+        """
+        if str(path).endswith('.json'):
+            return json.dumps(self.to_dict(), indent=2) + '\n'
+        return self.to_prometheus()
+
+
+# Metrics of this process, reported with the --metrics option
+REGISTRY = Registry()
@@ -1,15 +1,21 @@
 from enum import Enum
 
 import copy
-import os
 import re
-import yaml
+
+from dp2rathena import schema
+from dp2rathena import tables
 
 
 class Mapper:
-    def __init__(self):
+    # With trusted=True field validation is skipped, for payloads which are
+    # cached or were already checked with validation.validate_batch
+    def __init__(self, trusted=False):
+        self.trusted = trusted
+
         # Lazy load item_db until required
         self.item_db = None
+        self._tables_generation = None
 
         self.schema = {
             'Id': 'id',
@@ -100,28 +106,39 @@ class Mapper:
             5: 'Event',
         }
 
-    # Used for lazy loading item_db.yml as loading is slow
+        # Payload fields read when mapping, checked for presence
+        self.fields = [
+            'stats.sp', 'stats.scale', 'stats.race', 'stats.element',
+            'stats.mvp', 'stats.ai', 'stats.class', 'mvpdrops', 'drops',
+        ]
+
+        # Accepted values of payload fields
+        self.rules = {
+            'scale': lambda v: v in [None, 0, 1, 2],
+            'element': lambda v: v is None or v == 0 or 20 <= v <= 89,
+            'mvp': lambda v: v in [0, 1],
+            'ai': lambda v: v == '' or v.startswith('MONSTER_TYPE_'),
+            'class': lambda v: v in [0, 1, 2, 4, 5],
+        }
+
+        self._map_record = schema.compile_schema(self.schema)
+        self._map_drop = schema.compile_schema(self.drops_schema)
+
+    # Used for lazy loading item_db.yml as loading is slow. The table is
+    # shared by all mappers and picked up again after tables.reload
     def _require_item_db(self):
-        if self.item_db is None:
-            current_path = os.path.join(os.getcwd(), os.path.dirname(__file__))
-            item_db_path = os.path.join(os.path.realpath(current_path), 'db', 'item_db.yml')
-            self.item_db = yaml.load(open(item_db_path, encoding='utf-8'), Loader=yaml.FullLoader)['items']
+        if self._tables_generation != tables.generation:
+            self.item_db = tables.get('item_db')['items']
+            self._tables_generation = tables.generation
 
     def _validate(self, data, *argv):
+        if self.trusted:
+            return
         for arg in argv:
             assert arg in data
-            v = data[arg]
-            msg = f'Unrecognised {arg}: {v}'
-            if arg == 'scale':
-                assert v in [None, 0, 1, 2], msg
-            elif arg == 'element':
-                assert v is None or v == 0 or (v >= 20 and v <= 89), msg
-            elif arg == 'mvp':
-                assert v in [0, 1], msg
-            elif arg == 'ai':
-                assert v == "" or v.startswith('MONSTER_TYPE_'), msg
-            elif arg == 'class':
-                assert v in [0, 1, 2, 4, 5], msg
+            if arg in self.rules:
+                v = data[arg]
+                assert self.rules[arg](v), f'Unrecognised {arg}: {v}'
 
     def _sp(self, data):
         self._validate(data['stats'], 'sp')
@@ -183,11 +200,12 @@ class Mapper:
         result = list()
         for item in data[field]:
             if item['chance'] > 0:
-                result.append(self._map_schema(copy.copy(self.drops_schema), item))
+                result.append(self._map_drop(item))
         if len(result) == 0:
             return None
         return result
 
+    # Reference implementation of the compiled schema functions
     def _map_schema(self, schema, data):
         if schema is None:
             return None
@@ -213,11 +231,17 @@ class Mapper:
                 result[k] = v
         return result
 
+    def error_record(self, data, message):
+        return {'Id': data['id'], 'AegisName': data['dbname'], 'Error': message}
+
     def map_mob(self, data):
         if data is None or 'Error' in data:
             return data
         elif 'stats' not in data or len(data['stats']) == 0:
-            return {'Id': data['id'], 'AegisName': data['dbname'], 'Error': 'Mob stat data missing'}
+            return self.error_record(data, 'Mob stat data missing')
         elif 'name' not in data or data['name'] is None:
-            return {'Id': data['id'], 'AegisName': data['dbname'], 'Error': 'General mob data missing'}
-        return self._map_schema(self.schema, data)
+            return self.error_record(data, 'General mob data missing')
+        return self._map_record(data)
+
+    def map_mobs(self, payloads):
+        return [self.map_mob(data) for data in payloads]
@@ -1,15 +1,17 @@
 from enum import Enum
 
 import copy
-import os
 import re
-import yaml
+
+from dp2rathena import schema
+from dp2rathena import tables
 
 
 class Mapper:
     def __init__(self):
         # Lazy load skill_db until required
         self.skill_db = None
+        self._tables_generation = None
 
         # Structure = {'AL_TELEPORT': 26}
         self.skill_name_db = dict()
@@ -107,15 +109,15 @@ class Mapper:
 
         self.emote_skills = ['NPC_EMOTION', 'NPC_EMOTION_ON']
 
-    # Used for lazy loading skill_db.yml as loading is slow
-    def _require_skill_db(self):
-        if self.skill_db is None:
-            current_path = os.path.join(os.getcwd(), os.path.dirname(__file__))
-            skill_db_path = os.path.join(os.path.realpath(current_path), 'db', 'skill_db.yml')
-            self.skill_db = yaml.load(open(skill_db_path, encoding='utf-8'), Loader=yaml.FullLoader)
+        self._map_record = schema.compile_schema(self.schema, keep_empty=True, parent=True)
 
-            for k, v in self.skill_db.items():
-                self.skill_name_db[v['Name']] = k
+    # Used for lazy loading skill_db.yml as loading is slow. The table is
+    # shared by all mappers and picked up again after tables.reload
+    def _require_skill_db(self):
+        if self._tables_generation != tables.generation:
+            self.skill_db = tables.get('skill_db')
+            self.skill_name_db = tables.index('skill_db', 'Name')
+            self._tables_generation = tables.generation
 
 
     # Helper for checking skill db values
@@ -237,6 +239,7 @@ class Mapper:
             return data['sendValue']
         return None
 
+    # Reference implementation of the compiled schema function
     def _map_schema(self, schema, data, parent_data):
         if schema is None:
             return None
@@ -259,5 +262,5 @@ class Mapper:
             return data
         skills = list()
         for skill in data['skill']:
-            skills.append(self._map_schema(self.schema, skill, data))
+            skills.append(self._map_record(skill, data))
         return skills
@@ -0,0 +1,62 @@
+DEFAULT_CONNECT_TIMEOUT = 5  # seconds
+DEFAULT_READ_TIMEOUT = 30  # seconds
+
+ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class Transport:
+    """HTTP settings for Divine-Pride requests and connection counters.
+
+    Requests share a pool of up to `pool_size` keep-alive connections per
+    host, so concurrent workers reuse TLS connections instead of opening new
+    ones. Each request may take `connect_timeout` seconds to connect and
+    `read_timeout` seconds between bytes of the response. With `compress`
+    gzip or deflate responses are requested, which shrinks large mob
+    payloads several times over.
+    """
+
+    def __init__(
+        self,
+        pool_size=None,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        compress=True,
+    ):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.compress = compress
+        self._adapters = list()
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def accept_encoding(self):
+        return ACCEPT_ENCODING if self.compress else 'identity'
+
+    # Keeps `pool_size` connections, by default one per worker so concurrent
+    # fetches don't discard and reopen connections
+    def mount(self, session, workers=1):
+        import requests.adapters  # slow to import, so only imported once fetching
+
+        size = self.pool_size or max(workers, requests.adapters.DEFAULT_POOLSIZE)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept-Encoding'] = self.accept_encoding
+        self._adapters.append(adapter)
+
+    def stats(self):
+        """Returns the number of requests sent and connections opened, with
+        the difference being requests sent on a reused connection.
+        """
+        requests_sent = opened = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests_sent += pool.num_requests
+                opened += pool.num_connections
+        return {'Requests': requests_sent, 'Opened': opened, 'Reused': max(0, requests_sent - opened)}
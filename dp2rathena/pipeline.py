@@ -0,0 +1,45 @@
+import collections
+
+from concurrent.futures import ProcessPoolExecutor
+
+from dp2rathena import metrics
+from dp2rathena import validation
+
+
+# Number of payloads sent to a mapping process at once. Large enough to
+# amortise pickling and scheduling, small enough to keep every process busy
+BATCH_SIZE = 200
+
+# Batches queued per process before fetching waits for results
+DEPTH = 2
+
+
+def _started():
+    pass
+
+
+def run(task, payloads, processes, batch_size=None, depth=DEPTH):
+    """Yields task(batch) for each batch of payloads, computed in a pool of
+    `processes` processes, in input order.
+
+    Payloads are pulled from the iterable, typically a concurrent fetch, only
+    while fewer than processes * depth batches are queued or running, so a
+    slow consumer or mapping stage holds fetching back instead of buffering
+    the whole conversion. Results are yielded as soon as their batch and
+    those before it are done, so with a `batch_size` of 1 records are
+    streamed as they are mapped. `task` must be picklable, e.g. a module
+    level function or a functools.partial of one.
+    """
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        # Workers are started before any payload is pulled, as forking once
+        # fetch threads are running can deadlock the child processes
+        for future in [pool.submit(_started) for _ in range(processes)]:
+            future.result()
+        pending = collections.deque()
+        for batch in validation.windows(payloads, batch_size or BATCH_SIZE):
+            pending.append(pool.submit(task, batch))
+            metrics.REGISTRY.set('pipeline_queue_depth', len(pending))
+            while pending and (len(pending) >= processes * depth or pending[0].done()):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,170 @@
+import cProfile
+import contextlib
+import threading
+import time
+
+
+# Stages timed by --profile, in the order they are shown
+STAGES = [
+    'parse_ids',
+    'read_dump',
+    'fetch_item',
+    'fetch_mob',
+    '_require_item_db',
+    '_require_skill_db',
+    'validate',
+    'map_item',
+    'map_mob',
+    'map_mob_skill',
+    'serialize',
+    'output',
+]
+
+_DONE = object()
+
+
+class _Nothing:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOTHING = _Nothing()
+
+
+class NullProfiler:
+    """Profiler used without --profile, with the same hooks timing nothing."""
+
+    enabled = False
+
+    def stage(self, name, calls=1):
+        return _NOTHING
+
+    def iterate(self, name, iterable, count=True):
+        return iterable
+
+    def writelines(self, out, chunks):
+        out.writelines(chunks)
+
+    def merge(self, stages):
+        pass
+
+
+class Profiler:
+    """Wall time spent in each stage of a conversion.
+
+    Stages are timed where the converter and commands enter them, with
+    `stage` around a block of work and `iterate` around a lazy iterable. A
+    stage is charged only for its own time: time spent in stages it calls,
+    such as fetches pulled by a lazy map, is charged to those instead. Stages
+    run in worker threads are timed per thread, and stages run in pipeline
+    processes are timed there and merged, so with workers or processes > 1
+    their times overlap and can add up to more than the total. With `path`
+    the run is also profiled with cProfile, in this process only, and its
+    stats written to `path` on stop.
+    """
+
+    enabled = True
+
+    def __init__(self, path=None, clock=time.perf_counter):
+        self.path = path
+        self.clock = clock
+        self.stages = dict()
+        self.started = None
+        self.elapsed = None
+        self._cprofile = cProfile.Profile() if path else None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = list()
+            return self._local.stack
+
+    def _enter(self):
+        self._stack().append(0)
+        return self.clock()
+
+    # Charges the time since start, less nested stages, to the stage and the
+    # whole of it to the enclosing stage's nested time
+    def _exit(self, name, start, calls=1):
+        elapsed = self.clock() - start
+        stack = self._stack()
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        with self._lock:
+            count, seconds = self.stages.get(name, (0, 0))
+            self.stages[name] = (count + calls, seconds + elapsed - nested)
+
+    @contextlib.contextmanager
+    def stage(self, name, calls=1):
+        """Charges the time spent in the block to stage `name`, counted as
+        `calls` calls, e.g. the number of records mapped in a batch.
+        """
+        start = self._enter()
+        try:
+            yield
+        finally:
+            self._exit(name, start, calls)
+
+    def iterate(self, name, iterable, count=True):
+        """Yields from iterable, charging the time to produce each value to
+        stage `name` and, with `count`, a call per value.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = self._enter()
+            value = _DONE
+            try:
+                value = next(iterator, _DONE)
+            finally:
+                self._exit(name, start, int(count and value is not _DONE))
+            if value is _DONE:
+                return
+            yield value
+
+    def writelines(self, out, chunks):
+        """Writes chunks to a text stream, charging the writes to 'output'."""
+        for chunk in chunks:
+            with self.stage('output'):
+                out.write(chunk)
+
+    def merge(self, stages):
+        """Adds the stages timed by another Profiler, e.g. in a pipeline
+        process.
+        """
+        with self._lock:
+            for name, (calls, seconds) in stages.items():
+                count, total = self.stages.get(name, (0, 0))
+                self.stages[name] = (count + calls, total + seconds)
+
+    def start(self):
+        self.started = self.clock()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self.started is None or self.elapsed is not None:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.path)
+        self.elapsed = self.clock() - self.started
+
+    def summary(self):
+        """Returns a table of calls and seconds per stage, in STAGES order."""
+        total = self.elapsed if self.elapsed is not None else self.clock() - self.started
+        names = STAGES + sorted(self.stages)
+        rows = [(name, *self.stages[name]) for name in dict.fromkeys(names) if name in self.stages]
+        other = max(0, total - sum(seconds for _, _, seconds in rows))
+        lines = [f'{"Stage":<20} {"Calls":>8} {"Seconds":>10} {"%":>6}']
+        for name, calls, seconds in rows + [('other', '', other)]:
+            share = seconds / total * 100 if total else 0
+            lines.append(f'{name:<20} {calls:>8} {seconds:>10.3f} {share:>6.1f}')
+        lines.append(f'{"total":<20} {"":>8} {total:>10.3f} {100:>6.1f}')
+        return '\n'.join(lines)
@@ -0,0 +1,48 @@
+import re
+
+
+_RANGE = re.compile(r'\s*(\d+)\s*-\s*(\d+)\s*')
+
+
+def invalid(value):
+    """Returns the first part of an id expression which isn't an id or an
+    ascending range, or None if the whole expression is valid.
+    """
+    for part in value.split(','):
+        match = _RANGE.fullmatch(part)
+        if match:
+            if int(match.group(1)) > int(match.group(2)):
+                return part.strip()
+        elif not part.strip().isdigit():
+            return part.strip()
+    return None
+
+
+def expand(values):
+    """Yields ids from id expressions such as '501', '500-1999' or
+    '500-1999,4001-4500'.
+
+    Ranges are inclusive and expanded lazily, so large ranges are never held
+    in memory. Ids are yielded as strings like plain ids. Parts which aren't
+    ranges are yielded as is, empty parts and descending ranges are dropped.
+    """
+    for value in values:
+        for part in value.split(','):
+            match = _RANGE.fullmatch(part)
+            if match:
+                for i in range(int(match.group(1)), int(match.group(2)) + 1):
+                    yield str(i)
+            elif part.strip():
+                yield part.strip()
+
+
+def shard(ids, index, count):
+    """Yields the ids in shard `index` of `count`, numbered from 1.
+
+    An id belongs to shard id % count + 1, so each shard gets an even share
+    of any range and a given id always lands in the same shard regardless of
+    the order or the other ids it is listed with. Non-integer ids are dropped.
+    """
+    for i in ids:
+        if i.isdigit() and int(i) % count == index - 1:
+            yield i
@@ -0,0 +1,11 @@
+# rathena db file formats written by dp2rathena, kept free of imports so
+# commands can refer to them without loading the converter or PyYAML
+
+ITEM_HEADER = {'Type': 'ITEM_DB', 'Version': 1}
+MOB_HEADER = {'Type': 'MOB_DB', 'Version': 2}
+
+# rathena Header and whether digit strings are written unquoted, by type
+KINDS = {
+    'item': (ITEM_HEADER, False),
+    'mob': (MOB_HEADER, True),
+}
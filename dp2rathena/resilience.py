@@ -0,0 +1,209 @@
+import random
+import re
+import threading
+import time
+
+from dp2rathena import metrics
+
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds
+MAX_BACKOFF = 30  # seconds
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30  # seconds
+
+_STATUS = re.compile(r'(\d{3}) ')
+
+
+class CircuitOpenError(IOError):
+    """Raised instead of calling Divine-Pride while the circuit is open."""
+
+
+def is_transient(err):
+    """Returns whether a failed request is worth retrying: rate limiting
+    (429), server errors (5xx), timeouts and dropped connections.
+    """
+    # Slow to import, so only imported once a request has failed
+    import asyncio
+    import requests
+
+    if isinstance(err, CircuitOpenError):
+        return False
+    if isinstance(err, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if isinstance(err, (requests.Timeout, requests.ConnectionError)):
+        return True
+    match = _STATUS.match(str(err))
+    if match:
+        status = int(match.group(1))
+        return status == 429 or 500 <= status < 600
+    return False
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second on average and up to
+    `burst` at once, shared by all threads.
+
+    Each caller reserves the next free slot under a lock and then waits
+    outside it, so concurrent workers are spaced evenly at the rate instead
+    of waking together and bursting.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    # Returns how long to wait before the reserved request may be made. The
+    # bucket goes negative while requests are queued for future slots.
+    def reserve(self):
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        import asyncio
+
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """Fails fast after `threshold` consecutive transient failures.
+
+    Once open, calls raise CircuitOpenError without reaching Divine-Pride for
+    `reset_timeout` seconds. A single trial call is then let through: success
+    closes the circuit and failure opens it again.
+    """
+
+    def __init__(self, threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if self._trial or self.clock() - self._opened_at < self.reset_timeout:
+            return 'open'
+        return 'half-open'
+
+    def before(self):
+        with self._lock:
+            state = self.state
+            if state == 'open':
+                remaining = max(0, self.reset_timeout - (self.clock() - self._opened_at))
+                raise CircuitOpenError(
+                    f'Divine-Pride unavailable after {self.failures} failures, retrying in {remaining:.0f}s'
+                )
+            if state == 'half-open':
+                self._trial = True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self._opened_at = self.clock()
+            self._trial = False
+
+
+class Policy:
+    """Paces, retries and guards requests to Divine-Pride.
+
+    Every attempt waits for the rate limiter, if any, and checks the circuit
+    breaker. Transient failures are retried up to `retries` times with
+    exponential backoff and full jitter, a random delay of up to
+    `backoff` * 2 ** attempt seconds capped at MAX_BACKOFF, so clients
+    throttled together don't retry together. `jitter` is the randomised
+    fraction of each delay, 0 for fixed delays. Other errors, such as 404s,
+    are raised immediately and don't count against the circuit.
+    """
+
+    def __init__(
+        self, rate=None, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, jitter=1, breaker=None, sleep=time.sleep
+    ):
+        self.limiter = RateLimiter(rate) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.jitter = jitter
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.attempts = 0
+        self.retried = 0
+
+    def delay(self, attempt):
+        delay = min(MAX_BACKOFF, self.backoff * 2 ** attempt)
+        return delay - random.uniform(0, delay * self.jitter)
+
+    def call(self, request, *args):
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            self.breaker.before()
+            self.attempts += 1
+            metrics.REGISTRY.inc('requests_total')
+            try:
+                result = request(*args)
+            except Exception as err:
+                if not is_transient(err):
+                    # Divine-Pride answered, so it is up even if the id isn't
+                    self.breaker.success()
+                    raise
+                self.breaker.failure()
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                metrics.REGISTRY.inc('retries_total')
+                self.sleep(self.delay(attempt))
+            else:
+                self.breaker.success()
+                return result
+
+    async def call_async(self, request, *args):
+        import asyncio
+
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+            self.breaker.before()
+            self.attempts += 1
+            metrics.REGISTRY.inc('requests_total')
+            try:
+                result = await request(*args)
+            except Exception as err:
+                if not is_transient(err):
+                    # Divine-Pride answered, so it is up even if the id isn't
+                    self.breaker.success()
+                    raise
+                self.breaker.failure()
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                metrics.REGISTRY.inc('retries_total')
+                await asyncio.sleep(self.delay(attempt))
+            else:
+                self.breaker.success()
+                return result
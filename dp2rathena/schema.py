@@ -0,0 +1,52 @@
+import copy
+
+
+def compile_schema(schema, keep_empty=False, parent=False):
+    """Compiles a mapper schema into a function mapping one record.
+
+    The result matches Mapper._map_schema but runs as straight-line code:
+    the schema is walked once here instead of for every record, nothing is
+    deep-copied and each callable is invoked exactly once.
+
+    By default (item and mob mappers) fields whose value is None or 0 are
+    omitted. With `keep_empty` (mob skill mapper) every field is kept and
+    unresolved field names are passed through. With `parent` the compiled
+    function and schema callables take a second `parent_data` argument.
+    """
+    args = 'data, parent_data' if parent else 'data'
+    namespace = {'_schema': schema, '_deepcopy': copy.deepcopy}
+    lines = [
+        f'def _map_record({args}):',
+        '    if data is None:',
+        '        return dict(_schema)',
+        '    result = {}',
+    ]
+    for i, (key, source) in enumerate(schema.items()):
+        namespace[f'k{i}'] = key
+        namespace[f's{i}'] = source
+        if callable(source):
+            if keep_empty:
+                lines.append(f'    result[k{i}] = s{i}({args})')
+            else:
+                lines.append(f'    v = s{i}({args})')
+                lines.append(f'    if v is not None:')
+                lines.append(f'        result[k{i}] = v')
+        elif type(source) is dict:
+            namespace[f's{i}'] = compile_schema(source, keep_empty, parent)
+            lines.append(f'    result[k{i}] = s{i}({args})')
+        elif type(source) is str or type(source) is int:
+            if keep_empty:
+                lines.append(f'    result[k{i}] = data[s{i}] if s{i} in data else s{i}')
+            else:
+                lines.append(f'    v = data.get(s{i})')
+                lines.append(f'    if v is not None and v != 0:')
+                lines.append(f'        result[k{i}] = v')
+        elif source is None:
+            if keep_empty:
+                lines.append(f'    result[k{i}] = None')
+        else:
+            lines.append(f'    result[k{i}] = _deepcopy(s{i})')
+    lines.append('    return result')
+
+    exec(compile('\n'.join(lines), '<schema>', 'exec'), namespace)
+    return namespace['_map_record']
@@ -0,0 +1,124 @@
+import functools
+import hashlib
+import os
+import pickle
+import threading
+
+from pathlib import Path
+
+from dp2rathena import cache
+from dp2rathena import codec
+
+
+DB_PATH = Path(__file__).resolve().parent / 'db'
+
+# Reference tables used by the mappers
+NAMES = ('item_db', 'skill_db')
+
+# Tables and indexes loaded by this process, by (name, field)
+_shared = dict()
+_lock = threading.Lock()
+
+# Incremented by reload, so holders of a table can tell it may be outdated
+generation = 0
+
+
+@functools.lru_cache(maxsize=None)
+def _version():
+    try:
+        from importlib import metadata
+        return metadata.version('dp2rathena')
+    except Exception:  # python < 3.8 or not installed
+        return 'unknown'
+
+
+# Identifies this install, so installs sharing the user cache directory
+# keep separate compiled tables
+def _install():
+    return f'{_version()}-{hashlib.sha1(str(DB_PATH).encode()).hexdigest()[:12]}'
+
+
+def _compiled_path(name, digest):
+    return cache.cache_dir() / 'tables' / f'{name}-{_install()}-{digest}.pickle'
+
+
+def load(name):
+    """Returns the parsed contents of db/<name>.yml.
+
+    Parsing the bundled YAML is slow, so the result is pickled into the user
+    cache directory under the package version, install location and hash of
+    the source file, and reused until the source changes. Any problem with
+    the compiled copy falls back to YAML. The cache directory belongs to the
+    user running dp2rathena, so its pickles are trusted like the package
+    itself: anyone able to write there can run code as that user.
+    """
+    source = (DB_PATH / f'{name}.yml').read_bytes()
+    digest = hashlib.sha1(source).hexdigest()
+    compiled = _compiled_path(name, digest)
+    try:
+        with open(compiled, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        pass
+
+    data = codec.load_yaml(source)
+    try:
+        compiled.parent.mkdir(parents=True, exist_ok=True)
+        tmp = compiled.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, compiled)
+        # Drop this install's copies compiled from older versions of the source
+        for stale in compiled.parent.glob(f'{name}-{_install()}-*.pickle'):
+            if stale != compiled:
+                stale.unlink()
+    except OSError:
+        pass
+    return data
+
+
+def _get(key, build):
+    try:
+        return _shared[key]
+    except KeyError:
+        pass
+    with _lock:
+        if key not in _shared:
+            _shared[key] = build()
+        return _shared[key]
+
+
+def get(name):
+    """Returns the contents of db/<name>.yml, loaded once per process and
+    shared by all callers, so it must not be modified.
+    """
+    return _get((name, None), lambda: load(name))
+
+
+def index(name, field):
+    """Returns {entry[field]: key} for the entries of table `name`, e.g.
+    skill ids by name, built once per process like get.
+    """
+    return _get((name, field), lambda: {v[field]: k for k, v in get(name).items()})
+
+
+def preload(names=NAMES):
+    """Loads tables now rather than on first use, e.g. before timing a
+    conversion or forking processes which then share the loaded tables.
+    """
+    for name in names:
+        get(name)
+
+
+def reload(names=None):
+    """Loads tables again from db/*.yml after they change on disk, by
+    default every table loaded so far. Mappers use the new tables from
+    their next record.
+    """
+    global generation
+    with _lock:
+        names = set(names or (name for name, _ in _shared))
+        for key in [key for key in _shared if key[0] in names]:
+            del _shared[key]
+        generation += 1
+    preload(sorted(names))
@@ -0,0 +1,178 @@
+import collections
+import functools
+import re
+
+from dp2rathena import emitter
+
+
+# The first Body entry, after any blank or comment lines, with its indent
+_FIRST_ENTRY = re.compile(r'^Body:[ \t]*\r?\n(?:[ \t]*(?:#.*)?\r?\n)*( *)- ', re.M)
+# A blank or comment line, which belongs with the entry after it
+_GAP_LINE = re.compile(r'[ \t]*(?:#.*)?\r?\n?\Z')
+_EMPTY_BODY = 'Body: []\n'
+_CHUNK_SIZE = 1024 * 1024
+
+
+# Patterns for Body entries written at `indent`, as rathena indents them by
+# 2 and yaml.dump doesn't: the Id line of an entry, the start of an entry,
+# and either the start of an entry or, with group 1 unset, the section after
+# Body
+@functools.lru_cache(maxsize=None)
+def _patterns(indent):
+    return (
+        re.compile(rf'^{indent}- Id: (\d+)[ \t]*\r?$', re.M),
+        re.compile(rf'^({indent}- )', re.M),
+        re.compile(rf'^(?:({indent}- )|[^ #\r\n])', re.M),
+    )
+
+
+def _indent(existing):
+    """Returns the indent of the Body entries in a rathena db file, '' if
+    it has none, and rewinds it.
+    """
+    buffer = ''
+    while True:
+        chunk = existing.read(_CHUNK_SIZE)
+        buffer += chunk
+        match = _FIRST_ENTRY.search(buffer)
+        if match or not chunk:
+            existing.seek(0)
+            return match.group(1) if match else ''
+
+
+def _split_gap(text):
+    """Splits the blank and comment lines off the end of a section."""
+    end = len(text)
+    while end:
+        start = text.rfind('\n', 0, end - 1) + 1
+        if not _GAP_LINE.match(text, start, end):
+            break
+        end = start
+    return text[:end], text[end:]
+
+
+def _sections(existing, indent=''):
+    """Splits a rathena db file into its raw text sections.
+
+    Yields ('preamble', None, text) for everything before the first Body
+    entry (comments and Header), ('record', id, text) for each entry, keyed
+    by its leading Id if any, and ('suffix', None, text) for any section
+    after the Body, such as Footer. Blank and comment lines after the
+    preamble or an entry are yielded as ('gap', None, text), so an entry ends
+    at its last indented line. The file is read in large chunks which are
+    split with regular expressions rather than line by line.
+    """
+    record_pattern, entry_pattern, boundary_pattern = _patterns(indent)
+    kind, dpid = 'preamble', None
+    buffer = ''
+    while True:
+        chunk = existing.read(_CHUNK_SIZE)
+        buffer += chunk
+        # Only complete lines are split, the rest waits for the next chunk
+        end = buffer.rfind('\n') + 1 if chunk else len(buffer)
+        start = 0
+        pos = 0 if kind == 'preamble' else 1
+        while True:
+            pattern = entry_pattern if kind == 'preamble' else boundary_pattern
+            match = pattern.search(buffer, pos, end)
+            if match is None:
+                break
+            yield from _with_gap(kind, dpid, buffer[start:match.start()])
+            start = match.start()
+            if match.group(1) is None:
+                yield 'suffix', None, buffer[start:] + existing.read()
+                return
+            record_id = record_pattern.match(buffer, start)
+            kind, dpid = 'record', int(record_id.group(1)) if record_id else None
+            pos = start + 1
+        if not chunk:
+            yield from _with_gap(kind, dpid, buffer[start:])
+            return
+        buffer = buffer[start:]
+
+
+def _with_gap(kind, dpid, text):
+    text, gap = _split_gap(text)
+    yield kind, dpid, text
+    if gap:
+        yield 'gap', None, gap
+
+
+def record_ids(existing):
+    """Returns the Ids of the Body entries in a seekable rathena db file."""
+    return _record_ids(existing, _indent(existing))
+
+
+def _record_ids(existing, indent):
+    record_pattern = _patterns(indent)[0]
+    ids = set()
+    carry = ''
+    while True:
+        chunk = existing.read(_CHUNK_SIZE)
+        text = carry + chunk
+        end = text.rfind('\n') + 1 if chunk else len(text)
+        ids.update(int(i) for i in record_pattern.findall(text, 0, end))
+        if not chunk:
+            return ids
+        carry = text[end:]
+
+
+def splice(existing, records, out, numeric_strings=False):
+    """Writes a rathena db file with `records`, a dict by Id, spliced in.
+
+    `existing` is a seekable text stream read twice, first for its Ids and
+    then to copy it to `out` section by section. Entries with an Id in
+    `records` are replaced, others are copied as is without being parsed or
+    re-serialized. New Ids are inserted before the first entry with a larger
+    Id, and before any comments in front of it, so sorted files stay sorted,
+    or appended to the Body otherwise. Comment and blank lines between
+    entries are kept. Records are indented like the existing entries.
+    """
+    indent = _indent(existing)
+    existing_ids = _record_ids(existing, indent)
+    existing.seek(0)
+    pending = collections.deque(sorted(i for i in records if i not in existing_ids))
+
+    def dump(record):
+        text = emitter.dump_record(record, numeric_strings)
+        if indent:
+            text = ''.join(indent + line for line in text.splitlines(True))
+        return text
+
+    def insert(before=None):
+        while pending and (before is None or pending[0] < before):
+            out.write(dump(records[pending.popleft()]))
+
+    # Comments are written after any records inserted in front of them
+    gap = ''
+    for kind, dpid, text in _sections(existing, indent):
+        if kind == 'gap':
+            gap = text
+        elif kind == 'preamble':
+            # An empty Body is written inline and must become a block
+            head, empty, tail = text.partition(_EMPTY_BODY)
+            if pending and empty and (head == '' or head.endswith('\n')):
+                out.write(head + 'Body:\n')
+                insert()
+                out.write(tail)
+            elif pending and text == '[]\n':
+                insert()
+            else:
+                out.write(text)
+        elif kind == 'record':
+            if dpid is not None:
+                insert(dpid)
+            out.write(gap)
+            gap = ''
+            if dpid in records:
+                out.write(dump(records[dpid]))
+            elif text.endswith('\n'):
+                out.write(text)
+            else:
+                out.write(text + '\n')
+        else:
+            insert()
+            out.write(gap + text)
+            gap = ''
+    insert()
+    out.write(gap)
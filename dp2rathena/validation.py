@@ -0,0 +1,115 @@
+import collections
+import itertools
+
+
+class Report:
+    """Problems found in Divine-Pride payloads by validate_batch.
+
+    Every missing or unrecognised field is recorded, not just the first, and
+    summary counts how often each unrecognised value was seen per field.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.invalid = 0
+        self.errors = list()
+        self.summary = collections.defaultdict(collections.Counter)
+
+    def add(self, dpid, field, value, message):
+        self.errors.append({'Id': dpid, 'Field': field, 'Value': value, 'Error': message})
+        self.summary[field][str(value)] += 1
+
+    # Adds the problems found by validating another batch, e.g. in another process
+    def merge(self, other):
+        self.records += other.records
+        self.invalid += other.invalid
+        self.errors.extend(other.errors)
+        for field, counts in other.summary.items():
+            self.summary[field].update(counts)
+
+    def to_dict(self):
+        return {
+            'Records': self.records,
+            'Invalid': self.invalid,
+            'Summary': {field: dict(counts) for field, counts in self.summary.items()},
+            'Errors': self.errors,
+        }
+
+
+# Mark fields absent from a payload, as None is a valid field value, and
+# fields of absent sections, which are reported by the mappers themselves
+_MISSING = object()
+_SKIP = object()
+
+
+def _column(payloads, path):
+    for payload in payloads:
+        container = payload
+        for key in path[:-1]:
+            container = container.get(key) if isinstance(container, dict) else None
+        if not container:
+            yield _SKIP
+        else:
+            yield container.get(path[-1], _MISSING)
+
+
+def _accepts(rule, value):
+    try:
+        return bool(rule(value))
+    except Exception:
+        return False
+
+
+def validate_batch(mapper, payloads, report=None):
+    """Checks payloads against the fields and rules of an item or mob mapper.
+
+    Unlike Mapper._validate this never raises. Payloads are checked one field
+    at a time across the whole batch and each distinct value is tested once,
+    so repeated values such as itemTypeId or element cost a dict lookup.
+    Problems are added to `report`. Returns a dict mapping the index of each
+    invalid payload to its first error message.
+    """
+    report = Report() if report is None else report
+    checked = [
+        (i, p) for i, p in enumerate(payloads)
+        if isinstance(p, dict) and 'Error' not in p
+    ]
+    invalid = dict()
+    for field in mapper.fields:
+        path = field.split('.')
+        rule = mapper.rules.get(path[-1])
+        verdicts = dict()
+        column = _column((p for _, p in checked), path)
+        for (i, payload), value in zip(checked, column):
+            if value is _SKIP:
+                continue
+            elif value is _MISSING:
+                message = f'Missing {field}'
+                value = None
+            elif rule is None:
+                continue
+            else:
+                try:
+                    ok = verdicts[value]
+                except KeyError:
+                    ok = verdicts[value] = _accepts(rule, value)
+                except TypeError:  # unhashable
+                    ok = _accepts(rule, value)
+                if ok:
+                    continue
+                message = f'Unrecognised {path[-1]}: {value}'
+            report.add(payload.get('id'), field, value, message)
+            invalid.setdefault(i, message)
+    report.records += len(checked)
+    report.invalid += len(invalid)
+    return invalid
+
+
+def windows(iterable, size):
+    """Splits an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        window = list(itertools.islice(iterator, size))
+        if not window:
+            return
+        yield window
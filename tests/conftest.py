@@ -1,3 +1,5 @@
+import asyncio
+import json
 import os
 import pytest
 
@@ -36,3 +38,51 @@ def fixture():
         current_path = os.path.join(os.getcwd(), os.path.dirname(__file__))
         return os.path.join(os.path.realpath(current_path), 'fixtures', filename)
     return _fixture
+
+
+@pytest.fixture
+def run_async():
+    """
+    Runs a coroutine on a new event loop, like asyncio.run on Python 3.7+.
+    """
+    def _run_async(coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+    return _run_async
+
+
+@pytest.fixture(autouse=True, scope='session')
+def cache_home(tmp_path_factory):
+    """
+    Keeps caches written during tests out of the user's cache directory.
+    """
+    previous = os.environ.get('XDG_CACHE_HOME')
+    os.environ['XDG_CACHE_HOME'] = str(tmp_path_factory.mktemp('cache'))
+    yield os.environ['XDG_CACHE_HOME']
+    if previous is None:
+        del os.environ['XDG_CACHE_HOME']
+    else:
+        os.environ['XDG_CACHE_HOME'] = previous
+
+
+@pytest.fixture
+def offline(fixture, monkeypatch):
+    """
+    Serves Divine-Pride payloads from fixtures instead of the live API.
+    Returns the list of requests made.
+    """
+    from dp2rathena import converter
+
+    requests = list()
+
+    def _request(self, endpoint, dpid):
+        requests.append((endpoint, dpid))
+        filename = fixture(f'{"mob" if endpoint == "monster" else endpoint}_{dpid}.json')
+        if not os.path.exists(filename):
+            raise IOError(f'404 Client Error: Not Found for url: {endpoint}/{dpid}')
+        return json.loads(open(filename, encoding='utf-8').read())
+    monkeypatch.setattr(converter.Converter, '_request', _request)
+    return requests
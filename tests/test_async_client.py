@@ -0,0 +1,190 @@
+import asyncio
+import gzip
+import json
+import os
+import zlib
+
+import pytest
+
+from dp2rathena import async_client
+from dp2rathena import converter
+from dp2rathena import resilience
+
+
+api_key = os.getenv('DIVINEPRIDE_API_KEY')
+
+
+@pytest.fixture
+def server(fixture):
+    """
+    Local stand-in for the Divine-Pride API serving json fixtures.
+    """
+    connections = list()
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        while True:
+            request = await reader.readline()
+            if not request:
+                break
+            headers = list()
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                headers.append(line.lower())
+            gzipped = b'accept-encoding: gzip, deflate\r\n' in headers
+            path = request.split()[1]
+            if path.startswith(b'/dropped/'):
+                # Close the connection partway through the body
+                if b'/monster/' in path:
+                    writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n')
+                else:
+                    writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n{"id"')
+                await writer.drain()
+                break
+            if path.startswith((b'/moved/', b'/loop/')):
+                location = path.replace(b'/moved/', b'/api/database/', 1)
+                writer.write(b'HTTP/1.1 301 Moved Permanently\r\nLocation: %s\r\nContent-Length: 0\r\n\r\n' % location)
+                continue
+            _, endpoint, dpid = request.split()[1].split(b'?')[0].decode().rsplit('/', 2)
+            filename = fixture(f'{"mob" if endpoint == "monster" else endpoint}_{dpid}.json')
+            if not os.path.exists(filename):
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n')
+            elif endpoint == 'monster':
+                body = open(filename, 'rb').read()
+                writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n')
+                for i in range(0, len(body), 1000):
+                    chunk = body[i:i + 1000]
+                    writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                writer.write(b'0\r\n\r\n')
+            elif gzipped:
+                body = gzip.compress(open(filename, 'rb').read())
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+            else:
+                body = open(filename, 'rb').read()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+            await writer.drain()
+        writer.close()
+
+    async def _server(test, port=0):
+        server = await asyncio.start_server(handle, '127.0.0.1', port)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await test(f'http://127.0.0.1:{port}/api/database', connections)
+        finally:
+            # Let handlers observe the closed connections before shutdown
+            await asyncio.sleep(0.01)
+            server.close()
+            await server.wait_closed()
+    return _server
+
+
+def test_client_get(fixture, server, run_async):
+    expected = json.loads(open(fixture('item_1101.json'), encoding='utf-8').read())
+
+    async def test(url, connections):
+        async with async_client.Client(api_key, url, concurrency=2) as client:
+            assert await client.get('item', 1101) == expected
+            results = await asyncio.gather(*[client.get('item', 1101) for _ in range(10)])
+            assert results == [expected] * 10
+            with pytest.raises(IOError, match='^404'):
+                await client.get('item', -1)
+        # Keep-alive connections are reused up to the concurrency cap
+        assert len(connections) == 2
+        assert (client.opened, client.reused) == (2, 10)
+    run_async(server(test))
+
+
+def test_client_compress(fixture, server, run_async):
+    expected = json.loads(open(fixture('item_1101.json'), encoding='utf-8').read())
+
+    async def test(url, connections):
+        for compress in (True, False):
+            async with async_client.Client(api_key, url, compress=compress) as client:
+                assert await client.get('item', 1101) == expected
+    run_async(server(test))
+
+
+def test_client_redirect(fixture, server, run_async):
+    expected = json.loads(open(fixture('item_1101.json'), encoding='utf-8').read())
+
+    async def test(url, connections):
+        async with async_client.Client(api_key, url.replace('/api/database', '/moved')) as client:
+            assert await client.get('item', 1101) == expected
+            assert (client.opened, client.reused) == (1, 1)
+        async with async_client.Client(api_key, url.replace('/api/database', '/loop')) as client:
+            with pytest.raises(IOError, match='^301'):
+                await client.get('item', 1101)
+    run_async(server(test))
+
+
+def test_client_dropped(server, run_async):
+    async def test(url, connections):
+        async with async_client.Client(api_key, url.replace('/api/database', '/dropped')) as client:
+            for endpoint in ('item', 'monster'):
+                with pytest.raises(ConnectionError) as err:
+                    await client.get(endpoint, 1101)
+                assert resilience.is_transient(err.value)
+    run_async(server(test))
+
+
+def test_client_loops(fixture, server, run_async):
+    client = async_client.Client(api_key, 'http://127.0.0.1')
+    expected = json.loads(open(fixture('item_1101.json'), encoding='utf-8').read())
+
+    async def test(url, connections):
+        client.base_url = url
+        assert await client.get('item', 1101) == expected
+        assert await client.get('item', 1101) == expected
+        return int(url.split(':')[-1].split('/')[0])
+    port = run_async(server(test))
+    # Connections left idle on the first loop aren't reused once it's closed
+    run_async(server(test, port))
+    assert (client.opened, client.reused) == (2, 2)
+
+
+def test_inflate():
+    body = b'{"id": 1101}'
+    assert async_client._inflate(zlib.compress(body)) == body
+    deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    assert async_client._inflate(deflate.compress(body) + deflate.flush()) == body
+
+
+def test_async_converter(fixture, server, monkeypatch, run_async):
+    async def test(url, connections):
+        monkeypatch.setattr(converter, 'API_URL', url)
+        async with converter.AsyncConverter(api_key, workers=10) as convert:
+            assert await convert.fetch_item(-1) == {'Id': -1, 'Error': 'Item not found'}
+            assert await convert.fetch_mob(-1) == 'Id: -1, Error: Mob not found'
+            expected = open(fixture('item_1101_nowrap.yml'), encoding='utf-8').read()
+            assert await convert.convert_item([1101], sort=False, wrap=False) == expected
+            expected = open(fixture('mob_1002_1049.yml'), encoding='utf-8').read()
+            assert await convert.convert_mob([1049, '', 1002], sort=True) == expected
+            expected = open(fixture('mob_skill_1049_1002.txt'), encoding='utf-8').read()
+            assert await convert.convert_mob_skill([1049, 1002]) == expected
+            mobs, skills = await convert.convert_mobs([1049, 1002])
+            assert skills == expected
+            assert mobs.startswith('Header:')
+    run_async(server(test))
+
+
+def test_async_converter_methods():
+    # Sync Converter methods aren't inherited, as they would be given coroutines
+    methods = {
+        name: asyncio.iscoroutinefunction(method)
+        for name, method in vars(converter.AsyncConverter).items()
+        if callable(method) and not name.startswith('_')
+    }
+    assert methods == {
+        'close': True,
+        'fetch_item': True,
+        'convert_item': True,
+        'fetch_mob': True,
+        'convert_mob_skill': True,
+        'convert_mob': True,
+        'convert_mobs': True,
+    }
+    public = {name for name in dir(converter.AsyncConverter) if not name.startswith('_')}
+    assert public == set(methods) | {'remove_numerical_quotes'}
+    assert not issubclass(converter.AsyncConverter, converter.Converter)
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from dp2rathena import atomic
+
+
+def test_open_file(tmp_path):
+    path = tmp_path / 'item_db.yml'
+    with atomic.open_file(path) as f:
+        f.write('new\n')
+        assert not path.exists()
+    assert path.read_text(encoding='utf-8') == 'new\n'
+    os.chmod(path, 0o640)
+    with atomic.open_file(str(path)) as f:
+        f.write('newer\n')
+    assert path.read_text(encoding='utf-8') == 'newer\n'
+    assert path.stat().st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['item_db.yml']
+
+
+def test_open_files_error(tmp_path):
+    first = tmp_path / 'first.yml'
+    second = tmp_path / 'second.yml'
+    first.write_text('old\n', encoding='utf-8')
+    with pytest.raises(RuntimeError):
+        with atomic.open_files([first, second]) as (f1, f2):
+            f1.write('new\n')
+            raise RuntimeError('conversion failed')
+    assert first.read_text(encoding='utf-8') == 'old\n'
+    assert sorted(os.listdir(tmp_path)) == ['first.yml']
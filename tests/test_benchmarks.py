@@ -0,0 +1,68 @@
+import json
+
+from benchmarks import generate
+from benchmarks import suite
+from dp2rathena import dumps
+from dp2rathena import item_mapper
+from dp2rathena import mob_mapper
+from dp2rathena import mob_skill_mapper
+
+
+def test_generator_seeded():
+    assert generate.Generator(1).items(5) == generate.Generator(1).items(5)
+    assert generate.Generator(1).mobs(5) == generate.Generator(1).mobs(5)
+    assert generate.Generator(1).mobs(5) != generate.Generator(2).mobs(5)
+    assert [item['id'] for item in generate.Generator().items(3, start=10)] == [10, 11, 12]
+
+
+def test_generator_mappable():
+    generator = generate.Generator()
+    items = generator.items(300)
+    mobs = generator.mobs(300)
+    item_map = item_mapper.Mapper()
+    mob_map = mob_mapper.Mapper()
+    assert all(item_map.map_item(item)['Id'] == item['id'] for item in items)
+    assert all(mob_map.map_mob(mob)['Id'] == mob['id'] for mob in mobs)
+    skill_map = mob_skill_mapper.Mapper()
+    assert sum(len(skill_map.map_mob_skill(mob)) for mob in mobs) > 0
+
+
+def test_generate_main(tmp_path):
+    path = tmp_path / 'mobs.ndjson.gz'
+    generate.main(['mob', '3', '-o', str(path)])
+    assert [mob['id'] for mob in dumps.read(path, 'monster')] == [1001, 1002, 1003]
+
+
+def test_run():
+    only = ['map_item', 'map_items_no_numpy', 'map_mob_interpreted', 'load_skill_db', 'convert_mob_dump_p2']
+    numpy = item_mapper.numpy
+    results = suite.run(30, repeat=1, only=only)
+    assert item_mapper.numpy is numpy
+    assert results['meta']['scale'] == 30
+    assert set(results['results']) == set(only)
+    assert results['results']['map_item']['records'] == 30
+    assert results['results']['map_mob_interpreted']['records'] == suite.INTERPRETED
+    assert all(result['rate'] > 0 for result in results['results'].values())
+
+
+def test_compare(tmp_path, capsys):
+    baseline = {'meta': {'scale': 1000}, 'results': {
+        'map_item': {'rate': 1000},
+        'map_mob': {'rate': 1000},
+        'dump_mob_db': {'rate': 1000},
+    }}
+    current = {'meta': {'scale': 1000}, 'results': {
+        'map_item': {'rate': 950},
+        'map_mob': {'rate': 800},
+        'remove_numerical_quotes': {'rate': 1000},
+    }}
+    rows = suite.compare(baseline, current, threshold=0.1)
+    assert [(name, regressed) for name, *_, regressed in rows] == [('map_item', False), ('map_mob', True)]
+    assert suite.compare(baseline, current, threshold=0.25)[1][-1] is False
+
+    (tmp_path / 'baseline.json').write_text(json.dumps(baseline))
+    (tmp_path / 'current.json').write_text(json.dumps(current))
+    args = ['compare', str(tmp_path / 'baseline.json'), str(tmp_path / 'current.json')]
+    assert suite.main(args) == 1
+    assert 'REGRESSION' in capsys.readouterr().out
+    assert suite.main(args + ['--threshold', '0.5']) == 0
@@ -0,0 +1,46 @@
+import pytest
+
+from dp2rathena import cache
+from dp2rathena import converter
+
+
+def test_response_cache(tmp_path):
+    responses = cache.ResponseCache(tmp_path / 'responses.sqlite')
+    assert not responses.path.exists()
+    assert responses.get('item', 501) is None
+    responses.set('item', 501, {'id': 501, 'name': 'Red Potion'}, {'apiKey': 'secret'})
+    assert responses.get('item', 501) == {'id': 501, 'name': 'Red Potion'}
+    assert responses.get('item', '501', {'apiKey': 'other'}) == {'id': 501, 'name': 'Red Potion'}
+    assert responses.get('item', 501, {'server': 'kRO'}) is None
+    assert responses.get('monster', 501) is None
+    stats = responses.stats()
+    assert stats['endpoints'] == {'item': {'entries': 1, 'expired': 0}}
+    assert stats['size'] > 0
+    responses.clear()
+    assert responses.get('item', 501) is None
+
+
+def test_response_cache_ttl(tmp_path):
+    responses = cache.ResponseCache(tmp_path / 'responses.sqlite', ttl=0)
+    responses.set('item', 501, {'id': 501})
+    assert responses.get('item', 501) is None
+    assert responses.stats()['endpoints'] == {'item': {'entries': 1, 'expired': 1}}
+
+
+def test_response_cache_refresh(tmp_path):
+    cache.ResponseCache(tmp_path / 'responses.sqlite').set('item', 501, {'id': 501})
+    responses = cache.ResponseCache(tmp_path / 'responses.sqlite', refresh=True)
+    assert responses.get('item', 501) is None
+    responses.set('item', 501, {'id': 501, 'name': 'Red Potion'})
+    assert cache.ResponseCache(tmp_path / 'responses.sqlite').get('item', 501) == {'id': 501, 'name': 'Red Potion'}
+
+
+def test_converter_cache(fixture, offline, tmp_path):
+    responses = cache.ResponseCache(tmp_path / 'responses.sqlite')
+    convert = converter.Converter('api-key', cache=responses)
+    expected = open(fixture('mob_1002_1049.yml'), encoding='utf-8').read()
+    assert convert.convert_mob([1002, 1049]) == expected
+    assert convert.convert_mob([1002, 1049]) == expected
+    assert convert.fetch_mob(-1) == 'Id: -1, Error: Mob not found'
+    assert convert.fetch_mob(-1) == 'Id: -1, Error: Mob not found'
+    assert offline == [('monster', 1002), ('monster', 1049), ('monster', -1), ('monster', -1)]
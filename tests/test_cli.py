@@ -1,6 +1,10 @@
+import json
 import os
 import re
+import subprocess
+import sys
 
+import click
 import pytest
 
 from pathlib import Path
@@ -8,6 +12,9 @@ from click.testing import CliRunner
 from dp2rathena import cli
 
 
+API_KEY = '12345678aaaabbbb00000000ffffffff'
+
+
 def test_config_filesystem():
     runner = CliRunner()
     result = runner.invoke(cli.dp2rathena, ['config'], input="123")
@@ -47,6 +54,28 @@ def test_version():
     assert re.fullmatch(r'\d+\.\d+\.\d+', result.output.rstrip())
 
 
+def test_lazy_imports(tmp_path):
+    # Commands that don't convert must not pay for importing the converter
+    heavy = [
+        'dp2rathena.converter', 'pkg_resources', 'tortilla', 'requests', 'numpy', 'asyncio',
+        'yaml', 'orjson', 'sqlite3', 'dotenv',
+    ]
+    script = (
+        'import sys\n'
+        'from dp2rathena import cli\n'
+        'try:\n'
+        '    cli.dp2rathena(["version"])\n'
+        'except SystemExit:\n'
+        f'    print([m for m in {heavy!r} if m in sys.modules])\n'
+    )
+    # Without a .env or config file, which would need dotenv to read
+    env = dict(os.environ, HOME=str(tmp_path), PYTHONPATH=str(Path(__file__).resolve().parents[1]))
+    result = subprocess.run(
+        [sys.executable, '-c', script], capture_output=True, text=True, check=True, cwd=tmp_path, env=env
+    )
+    assert result.stdout.splitlines()[-1] == '[]'
+
+
 def test_config():
     runner = CliRunner()
     config_path = Path.home() / '.dp2rathena.conf'
@@ -282,4 +311,313 @@ def test_mob_valid(fixture):
         expected = f.read()
         result = runner.invoke(cli.dp2rathena, ['mob', '-f', fixture('1049_1002.txt')])
         assert result.exit_code == 0
-        assert result.output == expected
\ No newline at end of file
+        assert result.output == expected
+
+def test_mob_workers(fixture, offline):
+    runner = CliRunner()
+    with open(fixture('mob_1002_1049.yml'), encoding='utf-8') as f:
+        expected = f.read()
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '--workers', '2', '1002', '1049'])
+        assert result.exit_code == 0
+        assert result.output == expected
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '-w', '2', '--sort', '1049', '1002'])
+        assert result.exit_code == 0
+        assert result.output == expected
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '--workers', '0', '1002'])
+    assert result.exit_code == 2
+
+
+def test_processes(fixture, offline, monkeypatch):
+    from dp2rathena import converter, pipeline
+    run = pipeline.run
+    inputs = list()
+
+    def _run(task, payloads, *args, **kwargs):
+        inputs.append(payloads)
+        return run(task, payloads, *args, **kwargs)
+    monkeypatch.setattr(converter.pipeline, 'run', _run)
+    runner = CliRunner()
+    with open(fixture('item_900_1101.yml'), encoding='utf-8') as f:
+        expected = f.read()
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'item', '--processes', '2', '--sort', '1101', '900'])
+    assert result.exit_code == 0
+    assert result.output == expected
+    with open(fixture('mob_1049_1002.yml'), encoding='utf-8') as f:
+        expected = f.read()
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '-p', '2', '-w', '2', '1049', '1002'])
+    assert result.exit_code == 0
+    assert result.output == expected
+    with open(fixture('mob_skill_1049_1002.txt'), encoding='utf-8') as f:
+        expected = f.read()
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mobskill', '-p', '2', '1049', '1002'])
+    assert result.exit_code == 0
+    assert result.output == expected
+    # Payloads are mapped as they are fetched, not once all are fetched
+    assert len(inputs) == 3
+    assert not any(isinstance(payloads, list) for payloads in inputs)
+
+
+def test_ranges(fixture, offline):
+    runner = CliRunner()
+    with open(fixture('mob_1002_1049.yml'), encoding='utf-8') as f:
+        expected = f.read()
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, '--no-cache', 'mob', '--sort', '1049,1002-1002'])
+    assert result.exit_code == 0
+    assert result.output == expected
+    assert offline == [('monster', '1049'), ('monster', '1002')]
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '1049-1002'])
+    assert result.exit_code == 2
+    assert 'Non-integer mob id - 1049-1002' in result.output
+    del offline[:]
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, '--no-cache', 'mob', '-f', '-'], input='1001-1003\nhello\n1049\n')
+    assert result.exit_code == 0
+    assert offline == [('monster', '1001'), ('monster', '1002'), ('monster', '1003'), ('monster', '1049')]
+
+
+def test_shard(fixture, offline):
+    runner = CliRunner()
+    args = ['-k', API_KEY, '--no-cache', 'mob', '--shard']
+    result = runner.invoke(cli.dp2rathena, args + ['1/2', '1002', '1049'])
+    assert result.exit_code == 0
+    assert offline == [('monster', '1002')]
+    with open(fixture('mob_1002.yml'), encoding='utf-8') as f:
+        assert result.output == f.read()
+    del offline[:]
+    result = runner.invoke(cli.dp2rathena, args + ['2/2', '-f', '-'], input='1000-1009\n')
+    assert result.exit_code == 0
+    assert offline == [('monster', str(i)) for i in range(1001, 1010, 2)]
+    for shard in ['0/2', '3/2', '2', 'a/b']:
+        result = runner.invoke(cli.dp2rathena, args + [shard, '1002'])
+        assert result.exit_code == 2
+        assert 'is not a shard K/N' in result.output
+
+
+def test_cache(offline):
+    runner = CliRunner()
+    result = runner.invoke(cli.dp2rathena, ['cache', 'clear'])
+    assert result.exit_code == 0
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '1002'])
+    assert result.exit_code == 0
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '1002'])
+    assert result.exit_code == 0
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, '--refresh', 'mob', '1002'])
+    assert result.exit_code == 0
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, '--no-cache', 'mob', '1002'])
+    assert result.exit_code == 0
+    assert offline == [('monster', '1002')] * 3
+    result = runner.invoke(cli.dp2rathena, ['cache', 'stats'])
+    assert result.exit_code == 0
+    assert 'monster: 1 entries (0 expired)' in result.output
+
+
+def test_mobs(fixture, offline):
+    runner = CliRunner()
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mobs', '1002'])
+    assert result.exit_code == 2
+    assert 'Missing option' in result.output
+    with runner.isolated_filesystem():
+        args = ['-k', API_KEY, '--no-cache', 'mobs', '--db', 'mob_db.yml', '--skills', 'mob_skill_db.txt']
+        result = runner.invoke(cli.dp2rathena, args)
+        assert result.exit_code == 2
+        assert 'Mob id required' in result.output
+        result = runner.invoke(cli.dp2rathena, args + ['1002', '1049'])
+        assert result.exit_code == 0
+        assert offline == [('monster', '1002'), ('monster', '1049')]
+        with open(fixture('mob_1002_1049.yml'), encoding='utf-8') as f:
+            assert Path('mob_db.yml').read_text(encoding='utf-8') == f.read()
+        with open(fixture('mob_skill_1002_1049.txt'), encoding='utf-8') as f:
+            assert Path('mob_skill_db.txt').read_text(encoding='utf-8') == f.read()
+
+
+def test_stream(fixture, offline):
+    runner = CliRunner()
+    with open(fixture('mob_1049_1002.yml'), encoding='utf-8') as f:
+        expected = f.read()
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '--stream', '-f', fixture('1049_1002.txt')])
+        assert result.exit_code == 0
+        assert result.output == expected
+    with open(fixture('mob_skill_1049_1002.txt'), encoding='utf-8') as f:
+        expected = f.read()
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mobskill', '--stream', '-f', '-'], input='1049\n\n1002\n')
+        assert result.exit_code == 0
+        assert result.output == expected
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'item', '--stream', '--sort', '1101'])
+    assert result.exit_code == 2
+    assert '--stream cannot be used with --sort' in result.output
+    # Checked before any output is written
+    with runner.isolated_filesystem():
+        for command in (['item', '--sort'], ['mob'], ['mobskill']):
+            args = ['-k', API_KEY] + command + ['-o', 'out.txt', '--stream', '1101', '1002']
+            result = runner.invoke(cli.dp2rathena, args)
+            assert result.exit_code == 2
+            assert '--stream cannot be used with' in result.output
+            assert not Path('out.txt').exists()
+
+
+def test_report(fixture, offline):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        args = ['-k', API_KEY, '--no-cache', 'item', '--sort', '--report', 'report.json', '1101', '900']
+        result = runner.invoke(cli.dp2rathena, args)
+        assert result.exit_code == 0
+        with open(fixture('item_900_1101.yml'), encoding='utf-8') as f:
+            assert result.output == f.read()
+        report = json.loads(Path('report.json').read_text(encoding='utf-8'))
+        assert report == {'Records': 1, 'Invalid': 0, 'Summary': {}, 'Errors': []}
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '--trusted', '1002'])
+        assert result.exit_code == 0
+        with open(fixture('mob_1002.yml'), encoding='utf-8') as f:
+            assert result.output == f.read()
+
+
+def test_output(fixture, offline):
+    runner = CliRunner()
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'item', '--split', '1101'])
+    assert result.exit_code == 2
+    assert '--split requires --output' in result.output
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mob', '-o', 'mob_db.yml', '1049', '1002'])
+        assert result.exit_code == 0
+        assert result.output == ''
+        with open(fixture('mob_1049_1002.yml'), encoding='utf-8') as f:
+            assert Path('mob_db.yml').read_text(encoding='utf-8') == f.read()
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'mobskill', '-o', 'mob_skill_db.txt', '1002'])
+        assert result.exit_code == 0
+        with open(fixture('mob_skill_1002.txt'), encoding='utf-8') as f:
+            assert Path('mob_skill_db.txt').read_text(encoding='utf-8') == f.read()
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'item', '-o', 'item_db.yml', '--split', '1101'])
+        assert result.exit_code == 0
+        with open(fixture('item_1101.yml'), encoding='utf-8') as f:
+            assert Path('item_db_equip.yml').read_text(encoding='utf-8') == f.read()
+        assert Path('item_db_usable.yml').exists()
+        assert Path('item_db_etc.yml').exists()
+        assert not Path('item_db.yml').exists()
+
+
+def test_update(fixture, offline):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open(fixture('mob_1049.yml'), encoding='utf-8') as f:
+            Path('mob_db.yml').write_text(f.read(), encoding='utf-8')
+        args = ['-k', API_KEY, 'mob', '--update', 'mob_db.yml']
+        result = runner.invoke(cli.dp2rathena, args + ['--stream', '1002'])
+        assert result.exit_code == 2
+        assert '--update cannot be used with' in result.output
+        result = runner.invoke(cli.dp2rathena, args + ['-o', 'new_mob_db.yml', '1002'])
+        assert result.exit_code == 0
+        # Mob 1049 is kept as it was, even though it differs from the API now
+        with open(fixture('mob_1002.yml'), encoding='utf-8') as f:
+            mob_1002 = f.read().partition('Body:\n')[2]
+        header, body, mob_1049 = Path('mob_db.yml').read_text(encoding='utf-8').partition('Body:\n')
+        expected = header + body + mob_1002 + mob_1049
+        assert Path('new_mob_db.yml').read_text(encoding='utf-8') == expected
+        result = runner.invoke(cli.dp2rathena, args + ['1002'])
+        assert result.exit_code == 0
+        assert Path('mob_db.yml').read_text() == Path('new_mob_db.yml').read_text()
+
+        with open(fixture('item_1101.yml'), encoding='utf-8') as f:
+            expected = f.read()
+            Path('item_db.yml').write_text(expected, encoding='utf-8')
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, 'item', '--update', 'item_db.yml', '900', '1101'])
+        assert result.exit_code == 0
+        assert Path('item_db.yml').read_text(encoding='utf-8') == expected
+
+
+def test_crawl(fixture, offline):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        args = ['-k', API_KEY, '--no-cache', 'crawl', 'mob', '-o', 'mob_db.yml', '--batch-size', '2']
+        result = runner.invoke(cli.dp2rathena, args + ['--resume', '1001-1003,1049'])
+        assert result.exit_code == 2
+        assert 'No checkpoint to resume from' in result.output
+        result = runner.invoke(cli.dp2rathena, args + ['1001-1003,1049'])
+        assert result.exit_code == 0
+        assert 'Crawl complete, 4 ids crawled, 2 converted' in result.output
+        with open(fixture('mob_1002_1049.yml'), encoding='utf-8') as f:
+            assert Path('mob_db.yml').read_text(encoding='utf-8') == f.read()
+        result = runner.invoke(cli.dp2rathena, args + ['--resume', '1001-1003,1049'])
+        assert result.exit_code == 0
+        assert 'Crawl already complete, 4 ids crawled, 2 converted' in result.output
+        state = json.loads(Path('mob_db.yml.checkpoint').read_text(encoding='utf-8'))
+        state.update(Done=False, Completed=1, LastId='1001')
+        Path('mob_db.yml.checkpoint').write_text(json.dumps(state), encoding='utf-8')
+        result = runner.invoke(cli.dp2rathena, args + ['1001-1003,1049'])
+        assert result.exit_code == 2
+        assert 'use --resume to continue it' in result.output
+        result = runner.invoke(cli.dp2rathena, args + ['--resume', '1002-1003,1049'])
+        assert result.exit_code == 2
+        assert 'not 1001 as in the checkpoint' in result.output
+
+
+def test_transport(offline):
+    runner = CliRunner()
+    args = ['-k', API_KEY, '--no-cache', '--no-compress', '--read-timeout', '10', '--pool-size', '2']
+    result = runner.invoke(cli.dp2rathena, args + ['mob', '--debug', '1002'])
+    assert result.exit_code == 0
+    assert 'Connections: 0 opened, 0 reused for 0 requests' in result.output
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, '--connect-timeout', '0', 'mob', '1002'])
+    assert result.exit_code == 2
+
+
+def test_input_json(fixture):
+    runner = CliRunner()
+    # No API key or network access is needed
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli.dp2rathena, ['mob', '--input-json', fixture('')])
+        assert result.exit_code == 0
+        with open(fixture('mob_1002_1049.yml'), encoding='utf-8') as f:
+            assert result.output == f.read()
+        result = runner.invoke(cli.dp2rathena, ['mobskill', '--input-json', fixture(''), '1002'])
+        assert result.exit_code == 0
+        with open(fixture('mob_skill_1002.txt'), encoding='utf-8') as f:
+            assert result.output == f.read()
+        with open(fixture('item_1101.json'), encoding='utf-8') as f:
+            Path('items.ndjson').write_text(json.dumps(json.load(f)) + '\n', encoding='utf-8')
+        result = runner.invoke(cli.dp2rathena, ['item', '--input-json', 'items.ndjson', '--shard', '2/2'])
+        assert result.exit_code == 0
+        with open(fixture('item_1101.yml'), encoding='utf-8') as f:
+            assert result.output == f.read()
+    result = runner.invoke(cli.dp2rathena, ['item', '--input-json', 'missing.ndjson'])
+    assert result.exit_code == 2
+
+
+def test_profile(offline):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        args = ['-k', API_KEY, '--no-cache', '--profile-file', 'run.prof', 'mob', '1002', '-o', 'mob_db.yml']
+        result = runner.invoke(cli.dp2rathena, args)
+        assert result.exit_code == 0
+        stages = [line.split()[0] for line in result.output.splitlines()]
+        assert stages == ['Stage', 'parse_ids', 'fetch_mob', '_require_item_db', 'map_mob', 'serialize', 'output', 'other', 'total']
+        assert Path('run.prof').exists()
+        # Stages timed in pipeline processes are included
+        echo = click.echo
+        args = ['-k', API_KEY, '--profile', 'mobskill', '-p', '2', '1002', '1049']
+        result = runner.invoke(cli.dp2rathena, args)
+        assert result.exit_code == 0
+        rows = {line.split()[0]: line.split()[1:] for line in result.output.splitlines() if '.' in line}
+        assert rows['map_mob_skill'][0] == '2'
+        assert rows['serialize'][0] == '2'
+        assert click.echo is echo
+    result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, '--no-cache', 'item', '1101'])
+    assert 'Stage' not in result.output
+
+
+def test_metrics(offline):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        args = ['-k', API_KEY, '--metrics', 'metrics.json', 'mob', '--workers', '2', '1002', '1049', '1002', '9999']
+        result = runner.invoke(cli.dp2rathena, args)
+        assert result.exit_code == 0
+        summary = json.loads(Path('metrics.json').read_text())
+        assert summary['counters']['records_mapped_total{kind="mob"}'] == 4
+        assert summary['counters']['not_found_total{endpoint="monster"}'] == 1
+        counters = summary['counters']
+        misses = counters['cache_misses_total{endpoint="monster"}']
+        assert counters.get('cache_hits_total{endpoint="monster"}', 0) + misses == 4
+        assert counters['requests_total'] == misses
+        assert summary['gauges']['fetch_queue_depth']['max'] >= 1
+        assert summary['histograms']['fetch_seconds{endpoint="monster"}']['count'] == 4
+        result = runner.invoke(cli.dp2rathena, ['-k', API_KEY, '--metrics', 'dp2rathena.prom', 'item', '1101'])
+        assert result.exit_code == 0
+        assert 'dp2rathena_records_mapped_total{kind="item"} 1' in Path('dp2rathena.prom').read_text()
@@ -0,0 +1,35 @@
+import glob
+import json
+
+import pytest
+import yaml
+
+from dp2rathena import codec
+
+
+def test_dump_yaml(fixture):
+    for filename in glob.glob(fixture('*.yml')):
+        with open(filename, encoding='utf-8') as f:
+            expected = f.read()
+        data = codec.load_yaml(expected)
+        assert data == yaml.load(expected, Loader=yaml.SafeLoader)
+        # Byte-identical to the pure-Python dumper, quoted numbers aside
+        assert codec.dump_yaml(data) == yaml.dump(data, sort_keys=False)
+        if 'item' in filename:
+            assert codec.dump_yaml(data) == expected
+
+
+def test_dump_yaml_long_scalars():
+    for name in ['Épée ' * 30, 'Pokémon ' * 12 + 'x', '"Quoted" Knife ' * 8, 'Ünknown\nItem ' * 10]:
+        data = [{'Id': 501, 'Name': name, 'Drops': [{'Item': name.strip()}]}]
+        assert codec.dump_yaml(data) == yaml.dump(data, sort_keys=False)
+        assert codec.load_yaml(codec.dump_yaml(data)) == data
+
+
+def test_json(fixture, monkeypatch):
+    text = open(fixture('mob_1002.json'), encoding='utf-8').read()
+    assert codec.loads_json(text) == json.loads(text)
+    assert json.loads(codec.dumps_json(json.loads(text))) == json.loads(text)
+    monkeypatch.setattr(codec, 'orjson', None)
+    assert codec.loads_json(text) == json.loads(text)
+    assert codec.dumps_json({'Id': 1}) == '{"Id": 1}'
@@ -1,4 +1,5 @@
 import importlib
+import io
 import json
 import os
 
@@ -122,4 +123,152 @@ def test_remove_numerical_quotes():
     result = convert.remove_numerical_quotes('\'01\'')
     assert result == '01'
     result = convert.remove_numerical_quotes('Tell\'tale')
-    assert result == 'Tell\'tale'
\ No newline at end of file
+    assert result == 'Tell\'tale'
+
+def test_convert_workers(fixture, offline):
+    convert = converter.Converter(api_key, workers=4)
+    expected = open(fixture('item_1101_nowrap.yml'), encoding='utf-8').read()
+    assert convert.convert_item([1101], sort=False, wrap=False) == expected
+    expected = open(fixture('mob_1002_1049.yml'), encoding='utf-8').read()
+    assert convert.convert_mob([1002, '', 1049]) == expected
+    assert convert.convert_mob([1049, 1002], sort=True) == expected
+    expected = open(fixture('mob_1049_1002.yml'), encoding='utf-8').read()
+    assert convert.convert_mob([1049, 1002]) == expected
+    expected = open(fixture('mob_skill_1049_1002.txt'), encoding='utf-8').read()
+    assert convert.convert_mob_skill([1049, 1002]) == expected
+
+
+def test_convert_mobs(fixture, offline):
+    convert = converter.Converter(api_key)
+    mob_db, mob_skill_db = convert.convert_mobs([1049, '', 1002], sort=True)
+    assert mob_db == open(fixture('mob_1002_1049.yml'), encoding='utf-8').read()
+    assert mob_skill_db == open(fixture('mob_skill_1049_1002.txt'), encoding='utf-8').read()
+    assert offline == [('monster', 1049), ('monster', 1002)]
+
+
+def test_stream(fixture, offline):
+    convert = converter.Converter(api_key, workers=2)
+    expected = open(fixture('item_1101_nowrap.yml'), encoding='utf-8').read()
+    assert ''.join(convert.stream_item([1101], wrap=False)) == expected
+    expected = open(fixture('item_1101.yml'), encoding='utf-8').read()
+    assert ''.join(convert.stream_item(iter(['', '1101']))) == expected
+    expected = open(fixture('mob_1049_1002.yml'), encoding='utf-8').read()
+    chunks = list(convert.stream_mob([1049, 1002]))
+    assert len(chunks) == 4
+    assert ''.join(chunks) == expected
+    expected = open(fixture('mob_skill_1002_1049.txt'), encoding='utf-8').read()
+    assert ''.join(convert.stream_mob_skill([1002, 1049])) == expected
+
+
+def test_stream_nonapi():
+    convert = converter.Converter(api_key)
+    assert ''.join(convert.stream_item([], wrap=False)) == '[]\n'
+    assert ''.join(convert.stream_item([])) == 'Header:\n  Type: ITEM_DB\n  Version: 1\nBody: []\n'
+    assert ''.join(convert.stream_mob([''])) == 'Header:\n  Type: MOB_DB\n  Version: 2\nBody: []\n'
+    assert ''.join(convert.stream_mob_skill([])) == ''
+
+
+def test_validate(fixture, offline, monkeypatch):
+    request = converter.Converter._request
+    item = json.loads(open(fixture('item_1101.json'), encoding='utf-8').read())
+
+    def fetch(self, endpoint, dpid):
+        if endpoint == 'item' and int(dpid) == 1:
+            return dict(item, id=1, itemTypeId=99)
+        return request(self, endpoint, dpid)
+    monkeypatch.setattr(converter.Converter, '_request', fetch)
+
+    with pytest.raises(AssertionError):
+        converter.Converter(api_key).convert_item([1101, 1])
+    convert = converter.Converter(api_key, validate=True)
+    expected = open(fixture('item_1101.yml'), encoding='utf-8').read()
+    result = convert.convert_item([1101, 1, 2])
+    assert result == expected.rstrip('\n') + '\n' \
+        + "- Id: 1\n  Error: 'Unrecognised itemTypeId: 99'\n- Id: 2\n  Error: Item not found\n"
+    assert convert.report.to_dict()['Summary'] == {'itemTypeId': {'99': 1}}
+    assert ''.join(convert.stream_item([1101, 1, 2])) == result
+    assert convert.report.invalid == 1
+    expected = open(fixture('mob_1002_1049.yml'), encoding='utf-8').read()
+    assert convert.convert_mob([1002, 1049]) == expected
+    assert convert.report.to_dict()['Errors'] == []
+
+
+def test_write_mob_skill(fixture, offline):
+    convert = converter.Converter(api_key)
+    out = io.StringIO()
+    convert.write_mob_skill([1002, 1049], out)
+    assert out.getvalue() == open(fixture('mob_skill_1002_1049.txt'), encoding='utf-8').read()
+    skills = [
+        {'Dummy': 'Poring@Unknown Skill', 'SkillLv': 1, 'Value': None},
+        {'Dummy': 'Poring@Skipped', 'SkillLv': -1, 'Value': 1},
+        {'Dummy': 'Poring@NPC_EMOTION', 'SkillLv': 1, 'Value': 0},
+    ]
+    assert list(converter._mob_skill_rows(skills, comment=True)) == [
+        '//Poring@Unknown Skill,1,\n',
+        'Poring@NPC_EMOTION,1,0\n',
+    ]
+    assert list(converter._mob_skill_rows(skills, comment=False))[0] == 'Poring@Unknown Skill,1,\n'
+
+
+def test_write(fixture, offline):
+    convert = converter.Converter(api_key)
+    out = io.StringIO()
+    convert.write_item([1101, 900], out, sort=True)
+    assert out.getvalue() == open(fixture('item_900_1101.yml'), encoding='utf-8').read()
+    out = io.StringIO()
+    convert.write_mob([1049, 1002], out)
+    assert out.getvalue() == open(fixture('mob_1049_1002.yml'), encoding='utf-8').read()
+
+    parts = {part: io.StringIO() for part in converter.ITEM_DB_PARTS}
+    convert.write_item([1101, 900], parts)
+    header = 'Header:\n  Type: ITEM_DB\n  Version: 1\n'
+    expected = open(fixture('item_1101.yml'), encoding='utf-8').read()
+    assert parts['equip'].getvalue() == expected
+    assert parts['usable'].getvalue() == header + 'Body: []\n'
+    assert parts['etc'].getvalue() == header + 'Body:\n- Id: 900\n  Error: Item not found\n'
+
+
+def test_item_db_part():
+    assert converter.item_db_part({'Type': 'Healing'}) == 'usable'
+    assert converter.item_db_part({'Type': 'Healing/Usable/DelayConsume/Cash'}) == 'usable'
+    assert converter.item_db_part({'Type': 'ShadowGear'}) == 'equip'
+    assert converter.item_db_part({'Type': 'Card'}) == 'etc'
+    assert converter.item_db_part({'Id': 1, 'Error': 'Item not found'}) == 'etc'
+
+
+def test_processes(fixture, offline, monkeypatch):
+    convert = converter.Converter(api_key, workers=2, processes=2)
+    expected = open(fixture('item_900_1101.yml'), encoding='utf-8').read()
+    assert convert.convert_item([1101, 900], sort=True) == expected
+    expected = open(fixture('mob_1049_1002.yml'), encoding='utf-8').read()
+    assert convert.convert_mob([1049, 1002]) == expected
+    assert ''.join(convert.stream_mob([1049, 1002])) == expected
+    expected = open(fixture('mob_skill_1049_1002.txt'), encoding='utf-8').read()
+    assert convert.convert_mob_skill([1049, 1002]) == expected
+    parts = {part: io.StringIO() for part in converter.ITEM_DB_PARTS}
+    convert.write_item([1101, 900], parts)
+    assert parts['equip'].getvalue() == open(fixture('item_1101.yml'), encoding='utf-8').read()
+    assert 'Item not found' in parts['etc'].getvalue()
+
+    # Batches validated in other processes add up to one report
+    monkeypatch.setattr(converter.pipeline, 'BATCH_SIZE', 1)
+    convert = converter.Converter(api_key, processes=2, validate=True)
+    assert convert.convert_mob([1002, 1049]) == open(fixture('mob_1002_1049.yml'), encoding='utf-8').read()
+    assert (convert.report.records, convert.report.invalid) == (2, 0)
+
+
+def test_processes_stream(offline, monkeypatch):
+    # Streaming maps each record as it is fetched, even in mapping processes
+    batch_sizes = list()
+    run = converter.pipeline.run
+
+    def spy(task, payloads, processes, batch_size=None):
+        batch_sizes.append(batch_size)
+        return run(task, payloads, processes, batch_size)
+    monkeypatch.setattr(converter.pipeline, 'run', spy)
+    convert = converter.Converter(api_key, processes=2)
+    list(convert.stream_item([1101, 900]))
+    list(convert.stream_mob([1049]))
+    list(convert.stream_mob_skill([1049]))
+    convert.write_mob([1049], io.StringIO())
+    assert batch_sizes == [1, 1, 1, None]
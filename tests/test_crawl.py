@@ -0,0 +1,108 @@
+import json
+import re
+
+import pytest
+
+from dp2rathena import converter
+from dp2rathena import crawl
+from dp2rathena import ranges
+from dp2rathena import resilience
+
+
+API_KEY = '12345678aaaabbbb00000000ffffffff'
+
+
+def _ids(*values):
+    return list(ranges.expand(values))
+
+
+def test_crawl(fixture, offline, tmp_path):
+    conv = converter.Converter(API_KEY)
+    output = tmp_path / 'mob_db.yml'
+    checkpoint = tmp_path / 'checkpoint.json'
+    states = list(crawl.crawl(conv, 'mob', _ids('1001-1003', '1049'), output, checkpoint, batch_size=2))
+    assert [(s['Completed'], s['LastId'], s['Done']) for s in states] == [
+        (2, '1002', False), (4, '1049', False), (4, '1049', True)
+    ]
+    with open(fixture('mob_1002_1049.yml'), encoding='utf-8') as f:
+        assert output.read_text(encoding='utf-8') == f.read()
+    state = json.loads(checkpoint.read_text(encoding='utf-8'))
+    assert state['Records'] == 2
+    assert state['Size'] == output.stat().st_size
+    # A finished crawl has nothing left to resume, its state is yielded as is
+    del offline[:]
+    assert list(crawl.crawl(conv, 'mob', _ids('1001-1003', '1049'), output, checkpoint, True)) == [states[-1]]
+    assert offline == []
+
+
+def test_crawl_empty(offline, tmp_path):
+    conv = converter.Converter(API_KEY)
+    output = tmp_path / 'item_db.yml'
+    list(crawl.crawl(conv, 'item', _ids('1-3'), output, tmp_path / 'checkpoint.json'))
+    assert output.read_text(encoding='utf-8') == 'Header:\n  Type: ITEM_DB\n  Version: 1\nBody: []\n'
+    list(crawl.crawl(conv, 'item', _ids('1-3'), output, tmp_path / 'checkpoint.json', wrap=False))
+    assert output.read_text(encoding='utf-8') == '[]\n'
+
+
+def test_crawl_resume(fixture, offline, monkeypatch, tmp_path):
+    conv = converter.Converter(API_KEY, policy=resilience.Policy(retries=0))
+    output = tmp_path / 'mob_db.yml'
+    checkpoint = tmp_path / 'checkpoint.json'
+    request = converter.Converter._request
+
+    def _request(self, endpoint, dpid):
+        if dpid == '1049':
+            raise IOError('503 Server Error: Service Unavailable')
+        return request(self, endpoint, dpid)
+    monkeypatch.setattr(converter.Converter, '_request', _request)
+    with pytest.raises(IOError):
+        list(crawl.crawl(conv, 'mob', _ids('1001-1003', '1049'), output, checkpoint, batch_size=2))
+    state = json.loads(checkpoint.read_text(encoding='utf-8'))
+    assert (state['Completed'], state['LastId'], state['Done']) == (2, '1002', False)
+    # Records written after the last checkpoint are dropped on resume
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write('- Id: 1003\n  AegisName: PARTIAL\n')
+    monkeypatch.setattr(converter.Converter, '_request', request)
+    del offline[:]
+    list(crawl.crawl(conv, 'mob', _ids('1001-1003', '1049'), output, checkpoint, True, batch_size=2))
+    assert offline == [('monster', '1003'), ('monster', '1049')]
+    with open(fixture('mob_1002_1049.yml'), encoding='utf-8') as f:
+        assert output.read_text(encoding='utf-8') == f.read()
+
+
+def test_crawl_mismatch(offline, tmp_path):
+    conv = converter.Converter(API_KEY)
+    output = tmp_path / 'mob_db.yml'
+    checkpoint = tmp_path / 'checkpoint.json'
+    state = {
+        'Type': 'mob', 'Output': str(output), 'Wrap': True, 'Completed': 2,
+        'LastId': '1002', 'Records': 0, 'Size': 0, 'Done': False,
+    }
+    crawl.save_checkpoint(checkpoint, state)
+    output.write_text('')
+    with pytest.raises(crawl.CheckpointError, match='Id 2 is 1005, not 1002'):
+        list(crawl.crawl(conv, 'mob', _ids('1004-1009'), output, checkpoint, True))
+    with pytest.raises(crawl.CheckpointError, match='mob crawl'):
+        list(crawl.crawl(conv, 'item', _ids('1001-1009'), output, checkpoint, True))
+
+
+def test_crawl_resume_output(offline, tmp_path):
+    conv = converter.Converter(API_KEY)
+    output = tmp_path / 'mob_db.yml'
+    checkpoint = tmp_path / 'checkpoint.json'
+    state = {
+        'Type': 'mob', 'Output': str(output.resolve()), 'Wrap': True, 'Completed': 0,
+        'LastId': None, 'Records': 0, 'Size': 32, 'Done': False,
+    }
+    crawl.save_checkpoint(checkpoint, state)
+    with pytest.raises(crawl.CheckpointError, match='missing'):
+        list(crawl.crawl(conv, 'mob', _ids('1001-1009'), output, checkpoint, True))
+    output.write_text('Header:\n')
+    with pytest.raises(crawl.CheckpointError, match='less than the 32'):
+        list(crawl.crawl(conv, 'mob', _ids('1001-1009'), output, checkpoint, True))
+    # Another file is left untouched
+    other = tmp_path / 'other.yml'
+    other.write_text('- Id: 501\n' * 10)
+    with pytest.raises(crawl.CheckpointError, match='not ' + re.escape(str(other.resolve()))):
+        list(crawl.crawl(conv, 'mob', _ids('1001-1009'), other, checkpoint, True))
+    assert other.read_text() == '- Id: 501\n' * 10
@@ -0,0 +1,62 @@
+import gzip
+import json
+
+import pytest
+
+from dp2rathena import converter
+from dp2rathena import dumps
+
+
+@pytest.fixture
+def payloads(fixture):
+    def _payloads(*names):
+        return [json.loads(open(fixture(f'{name}.json'), encoding='utf-8').read()) for name in names]
+    return _payloads
+
+
+def test_read_dir(fixture, payloads):
+    assert list(dumps.read(fixture(''), 'item')) == payloads('item_1101')
+    # mob_skill_schema_*.json files are not mob payloads
+    assert list(dumps.read(fixture(''), 'monster')) == payloads('mob_1002', 'mob_1049')
+
+
+def test_read_dir_gzip(tmp_path, payloads):
+    mob_1002, mob_1049 = payloads('mob_1002', 'mob_1049')
+    (tmp_path / '1049.json').write_text(json.dumps(mob_1049))
+    (tmp_path / 'monster_1002.json.gz').write_bytes(gzip.compress(json.dumps(mob_1002).encode()))
+    (tmp_path / 'notes.txt').write_text('not a payload')
+    assert list(dumps.read(tmp_path, 'monster')) == [mob_1002, mob_1049]
+
+
+@pytest.mark.parametrize('name', ['mobs.ndjson', 'mobs.ndjson.gz', 'mobs.jsonl'])
+def test_read_ndjson(tmp_path, payloads, name):
+    expected = payloads('mob_1049', 'mob_1002')
+    text = '\n'.join(json.dumps(p) for p in expected) + '\n\n'
+    path = tmp_path / name
+    if name.endswith('.gz'):
+        path.write_bytes(gzip.compress(text.encode()))
+    else:
+        path.write_text(text)
+    assert list(dumps.read(path, 'monster')) == expected
+
+
+def test_read_json(fixture, tmp_path, payloads):
+    assert list(dumps.read(fixture('mob_1002.json'), 'monster')) == payloads('mob_1002')
+    path = tmp_path / 'mobs.json.gz'
+    path.write_bytes(gzip.compress(json.dumps(payloads('mob_1002', 'mob_1049')).encode()))
+    assert list(dumps.read(path, 'monster')) == payloads('mob_1002', 'mob_1049')
+
+
+def test_dump_converter(fixture):
+    conv = converter.DumpConverter(fixture(''))
+    with open(fixture('mob_1002_1049.yml'), encoding='utf-8') as f:
+        assert conv.convert_mob(None) == f.read()
+    with open(fixture('mob_1049_1002.yml'), encoding='utf-8') as f:
+        assert conv.convert_mob(['1049', '1002']) == f.read()
+    with open(fixture('item_900_1101.yml'), encoding='utf-8') as f:
+        assert conv.convert_item(['1101', '900'], sort=True) == f.read()
+    with open(fixture('mob_skill_1002.txt'), encoding='utf-8') as f:
+        assert conv.convert_mob_skill(None) == f.read() + conv.convert_mob_skill(['1049'])
+    conv = converter.DumpConverter(fixture(''), shard=(1, 2))
+    with open(fixture('mob_1002.yml'), encoding='utf-8') as f:
+        assert conv.convert_mob(None) == f.read()
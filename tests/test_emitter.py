@@ -0,0 +1,58 @@
+import glob
+import json
+
+import pytest
+import yaml
+
+from dp2rathena import codec
+from dp2rathena import emitter
+from dp2rathena import mob_mapper
+
+
+def test_dump_item_fixtures(fixture):
+    for filename in glob.glob(fixture('item_*.yml')):
+        with open(filename, encoding='utf-8') as f:
+            expected = f.read()
+        data = codec.load_yaml(expected)
+        if 'Header' in data:
+            assert emitter.dump(data['Body'], data['Header']) == expected
+        else:
+            assert emitter.dump(data) == expected
+
+
+# Mob fixtures can't be round-tripped as e.g. 'Ai: 02' loads as an int
+def test_dump_mob_fixtures(fixture):
+    mapper = mob_mapper.Mapper()
+    mobs = [
+        mapper.map_mob(json.load(open(fixture(f'mob_{mobid}.json'), encoding='utf-8')))
+        for mobid in [1002, 1049]
+    ]
+    header = {'Type': 'MOB_DB', 'Version': 2}
+    expected = open(fixture('mob_1002_1049.yml'), encoding='utf-8').read()
+    assert emitter.dump(mobs, header, numeric_strings=True) == expected
+    assert emitter.dump(mobs, header, numeric_strings=True) \
+        == emitter.remove_numerical_quotes(codec.dump_yaml({'Header': header, 'Body': mobs}))
+
+
+@pytest.mark.parametrize('value', [
+    'Red Potion', 'Knife_', '1hSword', '02', '08', 'yes', 'No', 'null', '', ' a', 'a ',
+    'a: b', 'a #b', '-a', "Tell'tale", 'Sword [3]', 'Pokémon', 'a\nb', 1.5, None,
+    ' '.join(['word'] * 30), ' '.join(['Épée'] * 30), {}, [], [[1]], [{}], ['x', 1, None], {'Nested': {'Key': 'value'}},
+])
+@pytest.mark.parametrize('numeric_strings', [False, True])
+def test_dump_record(value, numeric_strings):
+    record = {'Id': 1, 'Value': value, 'Drops': [{'Item': value, 'Rate': 1}]}
+    expected = yaml.dump([record], sort_keys=False)
+    if numeric_strings:
+        expected = emitter.remove_numerical_quotes(expected)
+    assert emitter.dump_record(record, numeric_strings) == expected
+
+
+def test_stream():
+    header = {'Type': 'ITEM_DB', 'Version': 1}
+    assert emitter.dump([], header) == 'Header:\n  Type: ITEM_DB\n  Version: 1\nBody: []\n'
+    assert emitter.dump([]) == '[]\n'
+    assert list(emitter.stream([{'Id': 1}, 'Id: 2, Error: Mob not found'])) == [
+        '- Id: 1\n',
+        "- 'Id: 2, Error: Mob not found'\n",
+    ]
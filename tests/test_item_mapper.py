@@ -1,3 +1,4 @@
+import json
 import os
 
 import pytest
@@ -212,3 +213,30 @@ def test_map_item(fixture):
         mapper.map_item({})
     assert mapper.map_item(None) is None
     assert mapper.map_item({'Error': 'message'}) == {'Error': 'message'}
+
+
+def test_trusted(fixture):
+    mapper = item_mapper.Mapper(trusted=True)
+    assert mapper._name({'name': None}) == ''
+    assert mapper._itemLevel({'itemLevel': 9}) == 9
+    data = json.loads(open(fixture('item_1101.json'), encoding='utf-8').read())
+    assert mapper.map_item(data) == item_mapper.Mapper().map_item(data)
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_map_items(fixture, monkeypatch, numpy):
+    if numpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(item_mapper, 'numpy', None)
+    mapper = item_mapper.Mapper()
+    data = json.loads(open(fixture('item_1101.json'), encoding='utf-8').read())
+    payloads = [None, {'Id': 1, 'Error': 'Item not found'}]
+    for job in [None, 0, 1, 73, 144, 0x8421, 0x12345, 0xFFFFF]:
+        for location in [None, 0, 0x22, 0x88, 0x500, 0x3FFFFF]:
+            payloads.append(dict(data, job=job, locationId=location))
+    payloads.append(dict(data, itemTypeId=4, locationId=0))
+    assert mapper.map_items(payloads) == [mapper.map_item(d) for d in payloads]
+    assert mapper.map_items([]) == []
+    with pytest.raises(AssertionError):
+        mapper.map_items([dict(data, job=-1)])
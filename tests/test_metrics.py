@@ -0,0 +1,63 @@
+import json
+
+from dp2rathena import metrics
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def _registry():
+    clock = Clock()
+    registry = metrics.Registry(clock=clock)
+    registry.inc('requests_total')
+    registry.inc('requests_total', 2)
+    registry.inc('records_mapped_total', 10, kind='mob')
+    registry.set('fetch_queue_depth', 4)
+    registry.set('fetch_queue_depth', 1)
+    with registry.time('fetch_seconds', endpoint='item'):
+        clock.now += 0.2
+    registry.observe('fetch_seconds', 40, endpoint='item')
+    clock.now = 5
+    return registry
+
+
+def test_to_dict():
+    summary = _registry().to_dict()
+    assert summary['counters'] == {'records_mapped_total{kind="mob"}': 10, 'requests_total': 3}
+    assert summary['gauges']['fetch_queue_depth'] == {'value': 1, 'max': 4}
+    assert summary['gauges']['records_per_second{kind="mob"}'] == {'value': 2}
+    assert summary['gauges']['duration_seconds'] == {'value': 5}
+    histogram = summary['histograms']['fetch_seconds{endpoint="item"}']
+    assert (histogram['count'], histogram['sum'], histogram['max']) == (2, 40.2, 40)
+    assert histogram['buckets']['0.1'] == 0
+    assert histogram['buckets']['0.25'] == 1
+    assert histogram['buckets']['30'] == 1
+    assert histogram['buckets']['+Inf'] == 2
+    assert json.loads(_registry().dumps('metrics.json')) == summary
+
+
+def test_to_prometheus():
+    text = _registry().dumps('dp2rathena.prom')
+    assert text == _registry().to_prometheus()
+    lines = text.splitlines()
+    assert '# TYPE dp2rathena_requests_total counter' in lines
+    assert 'dp2rathena_requests_total 3' in lines
+    assert 'dp2rathena_fetch_queue_depth 1' in lines
+    assert 'dp2rathena_fetch_queue_depth_max 4' in lines
+    assert 'dp2rathena_records_mapped_total{kind="mob"} 10' in lines
+    assert '# TYPE dp2rathena_fetch_seconds histogram' in lines
+    assert 'dp2rathena_fetch_seconds_bucket{endpoint="item",le="0.25"} 1' in lines
+    assert 'dp2rathena_fetch_seconds_bucket{endpoint="item",le="+Inf"} 2' in lines
+    assert 'dp2rathena_fetch_seconds_count{endpoint="item"} 2' in lines
+
+
+def test_reset():
+    registry = _registry()
+    registry.reset()
+    assert registry.to_dict()['counters'] == {}
+    assert registry.to_dict()['histograms'] == {}
@@ -235,3 +235,9 @@ def test_map_mob(fixture):
     assert mapper.map_mob({'id': 1, 'dbname': 'x', 'stats': {'level': 9}}) \
         == {'Id': 1, 'AegisName': 'x', 'Error': 'General mob data missing'}
     assert mapper.map_mob({'Error': 'message'}) == {'Error': 'message'}
+
+
+def test_trusted():
+    mapper = mob_mapper.Mapper(trusted=True)
+    assert mapper._element({'stats': {'element': 15}}) == 'Poison'
+    assert mapper._ai({'stats': {'ai': 'AGGRESSIVE'}}) == 'VE'
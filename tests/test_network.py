@@ -0,0 +1,81 @@
+import gzip
+import json
+import threading
+
+import pytest
+import requests
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dp2rathena import converter
+from dp2rathena import network
+
+
+PAYLOAD = json.dumps({'id': 1002, 'drops': [{'itemId': 909, 'chance': 7000}] * 100}).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    encodings = list()
+
+    def do_GET(self):
+        encoding = self.headers.get('Accept-Encoding', '')
+        self.encodings.append(encoding)
+        body = PAYLOAD
+        self.send_response(200)
+        if 'gzip' in encoding:
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    Handler.encodings = list()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/api/database/monster/1002'
+    server.shutdown()
+    server.server_close()
+
+
+def test_transport(url):
+    transport = network.Transport(connect_timeout=1, read_timeout=2)
+    assert transport.timeout == (1, 2)
+    session = requests.Session()
+    transport.mount(session)
+    for _ in range(5):
+        response = session.get(url, timeout=transport.timeout)
+        assert json.loads(response.content) == json.loads(PAYLOAD)
+    assert Handler.encodings == ['gzip, deflate'] * 5
+    assert transport.stats() == {'Requests': 5, 'Opened': 1, 'Reused': 4}
+
+
+def test_transport_uncompressed(url):
+    transport = network.Transport(compress=False)
+    session = requests.Session()
+    transport.mount(session)
+    assert session.get(url).content == PAYLOAD
+    assert Handler.encodings == ['identity']
+
+
+def test_transport_pool_size():
+    session = requests.Session()
+    network.Transport().mount(session, workers=32)
+    assert session.get_adapter('https://divine-pride.net')._pool_maxsize == 32
+    network.Transport(pool_size=4).mount(session, workers=32)
+    assert session.get_adapter('https://divine-pride.net')._pool_maxsize == 4
+
+
+def test_converter():
+    transport = network.Transport(read_timeout=60)
+    conv = converter.Converter('12345678aaaabbbb00000000ffffffff', workers=16, transport=transport)
+    assert conv.transport is transport
+    assert conv.api._parent.defaults['timeout'] == (network.DEFAULT_CONNECT_TIMEOUT, 60)
+    assert conv.api._parent.session.get_adapter(converter.API_URL)._pool_maxsize == 16
+    assert transport.stats() == {'Requests': 0, 'Opened': 0, 'Reused': 0}
@@ -0,0 +1,59 @@
+import itertools
+import multiprocessing
+import os
+import time
+
+from dp2rathena import pipeline
+
+
+def _double(batch):
+    return [i * 2 for i in batch]
+
+
+def _pid(batch):
+    return os.getpid()
+
+
+def test_run():
+    results = list(pipeline.run(_double, range(10), processes=2, batch_size=3))
+    assert results == [[0, 2, 4], [6, 8, 10], [12, 14, 16], [18]]
+    assert list(pipeline.run(_double, [], processes=2)) == []
+    assert {pid for pid in pipeline.run(_pid, range(8), processes=2, batch_size=1)} != {os.getpid()}
+
+
+def test_run_backpressure():
+    pulled = list()
+
+    def payloads():
+        for i in itertools.count():
+            pulled.append(i)
+            yield i
+    results = pipeline.run(_double, payloads(), processes=2, batch_size=2, depth=2)
+    assert next(results) == [0, 2]
+    # Only processes * depth batches are pulled ahead of the consumer
+    assert len(pulled) <= 2 * 2 * 2 + 1
+    results.close()
+
+
+def test_run_workers_started():
+    def payloads():
+        # Workers are forked before the first payload, e.g. a fetch thread
+        assert len(multiprocessing.active_children()) >= 2
+        yield from range(4)
+    assert list(pipeline.run(_double, payloads(), processes=2, batch_size=1)) == [[0], [2], [4], [6]]
+
+
+def test_run_streams():
+    pulled = list()
+
+    def payloads():
+        for i in range(10):
+            pulled.append(i)
+            yield i
+            # Leaves the first batch time to be mapped
+            time.sleep(0.2)
+    results = pipeline.run(_double, payloads(), processes=2, batch_size=1, depth=2)
+    assert next(results) == [0]
+    # Done batches are yielded without waiting for processes * depth queued
+    assert len(pulled) < 2 * 2
+    results.close()
@@ -0,0 +1,87 @@
+import io
+import pstats
+
+from dp2rathena import converter
+from dp2rathena import profiling
+
+
+API_KEY = '12345678aaaabbbb00000000ffffffff'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stages():
+    clock = Clock()
+    profiler = profiling.Profiler(clock=clock)
+
+    def fetch(i):
+        with profiler.stage('fetch'):
+            clock.now += 2
+            return i
+
+    def rows(values):
+        for value in values:
+            with profiler.stage('serialize'):
+                clock.now += 1
+            yield value
+
+    profiler.start()
+    ids = profiler.iterate('parse_ids', ['1', '2', '3'])
+    out = io.StringIO()
+    profiler.writelines(out, rows(fetch(i) for i in ids))
+    with profiler.stage('output'):
+        clock.now += 5
+    profiler.stop()
+    assert out.getvalue() == '123'
+    # Each stage is charged only for its own time
+    assert profiler.stages == {'parse_ids': (3, 0), 'fetch': (3, 6), 'serialize': (3, 3), 'output': (4, 5)}
+    lines = profiler.summary().splitlines()
+    assert lines[1].split() == ['parse_ids', '3', '0.000', '0.0']
+    assert lines[-2].split() == ['other', '0.000', '0.0']
+    assert lines[-1].split() == ['total', '14.000', '100.0']
+
+
+def test_merge():
+    profiler = profiling.Profiler()
+    profiler.stages = {'map_mob': (2, 1.5)}
+    profiler.merge({'map_mob': (3, 0.5), 'serialize': (3, 0.25)})
+    assert profiler.stages == {'map_mob': (5, 2), 'serialize': (3, 0.25)}
+
+
+def test_null_profiler():
+    profiler = profiling.NullProfiler()
+    values = [1, 2]
+    assert profiler.iterate('parse_ids', values) is values
+    with profiler.stage('fetch_item'):
+        pass
+    out = io.StringIO()
+    profiler.writelines(out, ['a', 'b'])
+    assert out.getvalue() == 'ab'
+
+
+def test_converter(offline, tmp_path):
+    profiler = profiling.Profiler(tmp_path / 'run.prof')
+    profiler.start()
+    conv = converter.Converter(API_KEY, profiler=profiler)
+    out = io.StringIO()
+    conv.write_mob([1002, 1049], out)
+    conv.write_mob_skill([1002], io.StringIO())
+    profiler.stop()
+    assert out.getvalue().startswith('Header:')
+    calls = {name: calls for name, (calls, _) in profiler.stages.items()}
+    assert calls.pop('output') > 0
+    assert calls == {
+        'fetch_mob': 3,
+        '_require_item_db': 1,
+        '_require_skill_db': 1,
+        'map_mob': 2,
+        'map_mob_skill': 1,
+        'serialize': 3,
+    }
+    pstats.Stats(str(tmp_path / 'run.prof'))
@@ -0,0 +1,40 @@
+import pytest
+
+from dp2rathena import ranges
+
+
+def test_invalid():
+    assert ranges.invalid('501') is None
+    assert ranges.invalid('500-1999,4001-4500') is None
+    assert ranges.invalid(' 500 - 502 , 7 ') is None
+    assert ranges.invalid('hello') == 'hello'
+    assert ranges.invalid('501,hello') == 'hello'
+    assert ranges.invalid('502-500') == '502-500'
+    assert ranges.invalid('500-') == '500-'
+    assert ranges.invalid('501,') == ''
+    assert ranges.invalid('') == ''
+
+
+def test_expand():
+    assert list(ranges.expand(['501'])) == ['501']
+    assert list(ranges.expand(['500-502,4001-4002', '7'])) == ['500', '501', '502', '4001', '4002', '7']
+    assert list(ranges.expand([' 500 - 501 ', '', '502,,503'])) == ['500', '501', '502', '503']
+    assert list(ranges.expand(['502-500', 'hello'])) == ['hello']
+    # Ranges are expanded lazily
+    assert next(ranges.expand(['1-1000000000000'])) == '1'
+
+
+def test_shard():
+    ids = [str(i) for i in range(500, 2000)]
+    shards = [list(ranges.shard(ids, k, 4)) for k in range(1, 5)]
+    assert sorted(sum(shards, []), key=int) == ids
+    assert all(len(s) == 375 for s in shards)
+    assert list(ranges.shard(reversed(ids), 2, 4)) == list(reversed(shards[1]))
+    assert list(ranges.shard(['501', 'hello', '503'], 1, 1)) == ['501', '503']
+
+
+@pytest.mark.parametrize('count', [1, 3, 7])
+def test_shard_partition(count):
+    ids = [str(i) for i in range(1, 100)]
+    seen = [i for k in range(1, count + 1) for i in ranges.shard(ids, k, count)]
+    assert sorted(seen, key=int) == ids
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+import requests
+
+from dp2rathena import converter
+from dp2rathena import resilience
+
+
+API_KEY = '12345678aaaabbbb00000000ffffffff'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _failing(*errors):
+    errors = list(errors)
+    calls = list()
+
+    def request(*args):
+        calls.append(args)
+        if errors:
+            raise errors.pop(0)
+        return {'id': args[-1]}
+    return request, calls
+
+
+def test_is_transient():
+    assert resilience.is_transient(IOError('429 Client Error: Too Many Requests'))
+    assert resilience.is_transient(IOError('503 Service Unavailable for url: x'))
+    assert resilience.is_transient(requests.Timeout('read timed out'))
+    assert resilience.is_transient(requests.ConnectionError('reset'))
+    assert resilience.is_transient(asyncio.TimeoutError())
+    assert resilience.is_transient(ConnectionResetError())
+    assert not resilience.is_transient(IOError('404 Client Error: Not Found'))
+    assert not resilience.is_transient(IOError('403 Forbidden'))
+    assert not resilience.is_transient(ValueError('bad json'))
+    assert not resilience.is_transient(resilience.CircuitOpenError('503 open'))
+
+
+def test_rate_limiter():
+    clock = Clock()
+    limiter = resilience.RateLimiter(4, clock=clock)
+    delays = [limiter.reserve() for _ in range(5)]
+    assert delays == [0, 0.25, 0.5, 0.75, 1.0]
+    clock.now = 10
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0.25
+    limiter = resilience.RateLimiter(2, burst=3, clock=clock)
+    assert [limiter.reserve() for _ in range(4)] == [0, 0, 0, 0.5]
+
+
+def test_rate_limiter_throughput():
+    clock = Clock()
+    limiter = resilience.RateLimiter(10, clock=clock)
+    # Callers waiting out their reservation finish exactly at the rate
+    for _ in range(100):
+        clock.sleep(limiter.reserve())
+    assert clock.now == pytest.approx(9.9)
+
+
+def test_retry():
+    clock = Clock()
+    policy = resilience.Policy(retries=3, sleep=clock.sleep)
+    request, calls = _failing(IOError('429 Too Many Requests'), IOError('502 Bad Gateway'))
+    assert policy.call(request, 'item', 501) == {'id': 501}
+    assert len(calls) == 3
+    assert policy.retried == 2
+    # Full jitter up to 0.5s then 1s
+    assert 0 <= clock.now <= 1.5
+    assert [resilience.Policy(jitter=0).delay(attempt) for attempt in range(8)] == [0.5, 1, 2, 4, 8, 16, 30, 30]
+    request, calls = _failing(IOError('404 Not Found'))
+    with pytest.raises(IOError, match='404'):
+        policy.call(request, 'item', 501)
+    assert len(calls) == 1
+    request, calls = _failing(*[requests.Timeout()] * 4)
+    with pytest.raises(requests.Timeout):
+        policy.call(request, 'item', 501)
+    assert len(calls) == 4
+
+
+def test_retry_async(run_async):
+    policy = resilience.Policy(retries=1, backoff=0)
+    calls = list()
+
+    async def request(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise asyncio.TimeoutError()
+        return args[-1]
+    assert run_async(policy.call_async(request, 'monster', 1002)) == 1002
+    assert len(calls) == 2
+
+
+def test_circuit_breaker():
+    clock = Clock()
+    breaker = resilience.CircuitBreaker(threshold=2, reset_timeout=30, clock=clock)
+    policy = resilience.Policy(retries=5, jitter=0, breaker=breaker, sleep=clock.sleep)
+    request, calls = _failing(*[IOError('500 Server Error')] * 10)
+    with pytest.raises(resilience.CircuitOpenError):
+        policy.call(request, 'item', 501)
+    assert len(calls) == 2
+    assert breaker.state == 'open'
+    with pytest.raises(resilience.CircuitOpenError):
+        policy.call(request, 'item', 502)
+    assert len(calls) == 2
+    # One trial call once the reset timeout has passed, failing opens it again
+    clock.now += 30
+    assert breaker.state == 'half-open'
+    policy.retries = 0
+    with pytest.raises(IOError, match='500'):
+        policy.call(request, 'item', 503)
+    assert len(calls) == 3
+    assert breaker.state == 'open'
+    clock.now += 30
+    request, calls = _failing()
+    assert policy.call(request, 'item', 504) == {'id': 504}
+    assert breaker.state == 'closed'
+    # Errors from a reachable API such as 404 don't open the circuit
+    request, calls = _failing(*[IOError('404 Not Found')] * 3)
+    for _ in range(3):
+        with pytest.raises(IOError, match='404'):
+            policy.call(request, 'item', 505)
+    assert breaker.state == 'closed'
+
+
+def test_converter(offline, monkeypatch):
+    request = converter.Converter._request
+    failures = [IOError('503 Service Unavailable')]
+
+    def _request(self, endpoint, dpid):
+        if failures:
+            raise failures.pop()
+        return request(self, endpoint, dpid)
+    monkeypatch.setattr(converter.Converter, '_request', _request)
+    conv = converter.Converter(API_KEY, policy=resilience.Policy(backoff=0))
+    assert conv.fetch_item('1101')['id'] == 1101
+    assert conv.policy.attempts == 2
+    assert conv.fetch_item('501') == {'Id': 501, 'Error': 'Item not found'}
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+from dp2rathena import item_mapper
+from dp2rathena import mob_mapper
+from dp2rathena import mob_skill_mapper
+from dp2rathena import schema
+
+
+cases = [
+    ({}, None),
+    ({}, {}),
+    ({'x': None}, {}),
+    ({'x': 'to_map'}, {'to_map': 0}),
+    ({'x': 'to_map'}, {'to_map': False}),
+    ({'x': 'to_map'}, {'to_map': None}),
+    ({'x': 'to_map'}, {'to_map': 'y'}),
+    ({'x': {'y': 'to_map'}}, {'to_map': 'z'}),
+    ({'x': 1}, {'not_mapped': 'value'}),
+    ({'x': 1}, {1: 'y'}),
+    ({1.0: 1}, {1: 'y'}),
+    ({'x': 1.0}, {'not_mapped': 'value'}),
+    ({'x': [1, 2]}, {}),
+    ({'a': 'to_map', 'b': None, 'c': 'other', 'd': 'to_map'}, {'to_map': 1, 'other': 2}),
+]
+
+
+@pytest.mark.parametrize('to_compile, data', cases)
+def test_compile_schema(to_compile, data):
+    mapper = item_mapper.Mapper()
+    assert schema.compile_schema(to_compile)(data) == mapper._map_schema(to_compile, data)
+    assert list(schema.compile_schema(to_compile)(data)) == list(mapper._map_schema(to_compile, data))
+    mapper = mob_skill_mapper.Mapper()
+    compiled = schema.compile_schema(to_compile, keep_empty=True, parent=True)
+    assert compiled(data, {}) == mapper._map_schema(to_compile, data, {})
+
+
+def test_compile_schema_callables():
+    calls = list()
+
+    def count(data):
+        calls.append(data)
+        return len(data)
+    compiled = schema.compile_schema({'x': count, 'y': lambda d: None})
+    assert compiled({'a': 1}) == {'x': 1}
+    assert len(calls) == 1
+    compiled = schema.compile_schema({'x': lambda d, p: p['id'], 'y': lambda d, p: None}, keep_empty=True, parent=True)
+    assert compiled({}, {'id': 1}) == {'x': 1, 'y': None}
+
+
+def test_compiled_mappers(fixture):
+    item = json.loads(open(fixture('item_1101.json'), encoding='utf-8').read())
+    mapper = item_mapper.Mapper()
+    assert mapper.map_item(item) == mapper._map_schema(mapper.schema, item)
+    for mobid in [1002, 1049]:
+        mob = json.loads(open(fixture(f'mob_{mobid}.json'), encoding='utf-8').read())
+        mapper = mob_mapper.Mapper()
+        assert mapper.map_mob(mob) == mapper._map_schema(mapper.schema, mob)
+        mapper = mob_skill_mapper.Mapper()
+        assert mapper.map_mob_skill(mob) == [mapper._map_schema(mapper.schema, s, mob) for s in mob['skill']]
@@ -0,0 +1,88 @@
+import pickle
+
+import pytest
+
+from dp2rathena import tables
+
+
+def test_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(tables, 'DB_PATH', tmp_path)
+    source = tmp_path / 'test_db.yml'
+    source.write_text('items:\n  501: Red_Potion\n', encoding='utf-8')
+    assert tables.load('test_db') == {'items': {501: 'Red_Potion'}}
+    compiled = list(tables.cache.cache_dir().glob('tables/test_db-*.pickle'))
+    assert len(compiled) == 1
+    with open(compiled[0], 'rb') as f:
+        assert pickle.load(f) == {'items': {501: 'Red_Potion'}}
+
+    # Compiled copy is reused while the source is unchanged
+    with open(compiled[0], 'wb') as f:
+        pickle.dump({'items': {501: 'Cached'}}, f)
+    assert tables.load('test_db') == {'items': {501: 'Cached'}}
+
+    # Changing the source recompiles and removes the stale copy
+    source.write_text('items:\n  502: Orange_Potion\n', encoding='utf-8')
+    assert tables.load('test_db') == {'items': {502: 'Orange_Potion'}}
+    assert not compiled[0].exists()
+    assert len(list(tables.cache.cache_dir().glob('tables/test_db-*.pickle'))) == 1
+
+    # Copies compiled by other installs are kept
+    other = tables.cache.cache_dir() / 'tables' / 'test_db-0.1.0-000000000000-0.pickle'
+    other.write_bytes(b'')
+    source.write_text('items:\n  503: Yellow_Potion\n', encoding='utf-8')
+    assert tables.load('test_db') == {'items': {503: 'Yellow_Potion'}}
+    assert other.exists()
+    other.unlink()
+
+    # Corrupt compiled copies fall back to parsing the source
+    compiled = list(tables.cache.cache_dir().glob('tables/test_db-*.pickle'))
+    compiled[0].write_bytes(b'not a pickle')
+    assert tables.load('test_db') == {'items': {503: 'Yellow_Potion'}}
+
+
+def test_load_bundled():
+    assert tables.load('item_db')['items'][501] == 'Red_Potion'
+    assert tables.load('skill_db')[1]['Name'] == 'NV_BASIC'
+
+
+def test_shared(tmp_path, monkeypatch):
+    monkeypatch.setattr(tables, 'DB_PATH', tmp_path)
+    monkeypatch.setattr(tables, '_shared', dict())
+    source = tmp_path / 'test_db.yml'
+    source.write_text('1:\n  Name: NV_BASIC\n', encoding='utf-8')
+    table = tables.get('test_db')
+    assert table == {1: {'Name': 'NV_BASIC'}}
+    assert tables.get('test_db') is table
+    assert tables.index('test_db', 'Name') == {'NV_BASIC': 1}
+
+    # Loaded tables are kept until reloaded
+    source.write_text('2:\n  Name: SM_SWORD\n', encoding='utf-8')
+    assert tables.get('test_db') is table
+    generation = tables.generation
+    tables.reload()
+    assert tables.generation == generation + 1
+    assert tables.get('test_db') == {2: {'Name': 'SM_SWORD'}}
+    assert tables.index('test_db', 'Name') == {'SM_SWORD': 2}
+
+
+def test_shared_mappers(monkeypatch):
+    from dp2rathena import mob_mapper, mob_skill_mapper
+
+    monkeypatch.setattr(tables, '_shared', dict())
+    tables.preload()
+    first, second = mob_skill_mapper.Mapper(), mob_skill_mapper.Mapper()
+    first._require_skill_db()
+    second._require_skill_db()
+    assert first.skill_db is second.skill_db is tables.get('skill_db')
+    assert first.skill_name_db is tables.index('skill_db', 'Name')
+    mapper = mob_mapper.Mapper()
+    mapper._require_item_db()
+    assert mapper.item_db is tables.get('item_db')['items']
+
+    # Mappers pick up reloaded tables
+    tables.reload(['skill_db'])
+    first._require_skill_db()
+    assert first.skill_db is tables.get('skill_db')
+    assert first.skill_db is not second.skill_db
+    mapper._require_item_db()
+    assert mapper.item_db is tables.get('item_db')['items']
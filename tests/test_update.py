@@ -0,0 +1,100 @@
+import io
+
+import yaml
+
+from dp2rathena import update
+
+
+HEADER = '# rathena item_db\nHeader:\n  Type: ITEM_DB\n  Version: 1\n'
+
+
+def splice(existing, records, numeric_strings=False):
+    out = io.StringIO()
+    update.splice(io.StringIO(existing), records, out, numeric_strings)
+    return out.getvalue()
+
+
+def test_record_ids():
+    text = HEADER + 'Body:\n- Id: 1\n  Name: A\n- Id: 20\n  Drops:\n  - Item: B\n'
+    assert update.record_ids(io.StringIO(text)) == {1, 20}
+
+
+def test_splice():
+    # Untouched entries are copied as is, even when not formatted as dumped
+    existing = HEADER + 'Body:\n- Id: 1\n  Name:   "A"\n- Id: 3\n  Name: C\n- Id: 5\n  Name: E  # kept\n'
+    records = {3: {'Id': 3, 'Name': 'New C'}, 4: {'Id': 4, 'Name': 'D'}, 9: {'Id': 9, 'Name': 'I'}, 0: {'Id': 0}}
+    assert splice(existing, records) == HEADER + 'Body:\n- Id: 0\n- Id: 1\n  Name:   "A"\n' \
+        + '- Id: 3\n  Name: New C\n- Id: 4\n  Name: D\n- Id: 5\n  Name: E  # kept\n- Id: 9\n  Name: I\n'
+    assert splice(existing, {}) == existing
+
+
+def test_splice_sections():
+    records = {2: {'Id': 2, 'Ai': '02'}}
+    assert splice(HEADER + 'Body: []\n', records, True) == HEADER + 'Body:\n- Id: 2\n  Ai: 02\n'
+    assert splice('[]\n', records) == "- Id: 2\n  Ai: '02'\n"
+    assert splice(HEADER + 'Body: []\n', {}) == HEADER + 'Body: []\n'
+    footer = 'Footer:\n  Imports:\n  - Path: db/import/item_db.yml\n'
+    assert splice(HEADER + 'Body:\n- Id: 1\n' + footer, records) \
+        == HEADER + 'Body:\n- Id: 1\n- Id: 2\n  Ai: \'02\'\n' + footer
+    assert splice(HEADER + 'Body:\n- Id: 3', records) == HEADER + "Body:\n- Id: 2\n  Ai: '02'\n- Id: 3\n"
+    assert splice(HEADER + 'Body:\n- Id: 1', records) == HEADER + "Body:\n- Id: 1\n- Id: 2\n  Ai: '02'\n"
+
+
+def test_splice_comments(monkeypatch):
+    # Comments and blank lines in front of an entry go with that entry
+    existing = HEADER + 'Body:\n# ===== Usable =====\n- Id: 501\n  Name: Red Potion\n\n' \
+        + '# ===== Equipment section =====\n- Id: 1101\n  Name: Sword\n  # Note\n# Footer\n' \
+        + 'Footer:\n  Imports: []\n# End\n'
+    records = {
+        500: {'Id': 500, 'Name': 'Green Potion'},
+        501: {'Id': 501, 'Name': 'New Red Potion'},
+        502: {'Id': 502, 'Name': 'Orange Potion'},
+        1101: {'Id': 1101, 'Name': 'New Sword'},
+        1102: {'Id': 1102},
+    }
+    expected = HEADER + 'Body:\n- Id: 500\n  Name: Green Potion\n# ===== Usable =====\n' \
+        + '- Id: 501\n  Name: New Red Potion\n- Id: 502\n  Name: Orange Potion\n\n' \
+        + '# ===== Equipment section =====\n- Id: 1101\n  Name: New Sword\n- Id: 1102\n' \
+        + '  # Note\n# Footer\nFooter:\n  Imports: []\n# End\n'
+    for size in [1, 7, 1024]:
+        monkeypatch.setattr(update, '_CHUNK_SIZE', size)
+        assert splice(existing, {501: records[501]}) == existing.replace('Red Potion', 'New Red Potion')
+        assert splice(existing, records) == expected
+    existing = HEADER + 'Body:\n- Id: 1\n  Name: A\n# Last\n'
+    assert splice(existing, {1: {'Id': 1}, 2: {'Id': 2}}) == HEADER + 'Body:\n- Id: 1\n- Id: 2\n# Last\n'
+
+
+def test_splice_indented(monkeypatch):
+    # rathena indents Body entries, unlike yaml.dump
+    existing = HEADER + 'Body:\n  - Id: 501\n    Name: Red Potion\n    Jobs:\n      All: true\n' \
+        + '  - Id: 503\n    Name: Yellow Potion\n' \
+        + 'Footer:\n  Imports:\n    - Path: db/import/item_db.yml\n'
+    records = {
+        501: {'Id': 501, 'Name': 'New Red Potion', 'Flags': {'BuyingStore': True}},
+        502: {'Id': 502, 'Name': 'Orange Potion', 'Drops': [{'Item': 'Apple'}]},
+        504: {'Id': 504, 'Name': 'White Potion'},
+    }
+    expected = HEADER + 'Body:\n  - Id: 501\n    Name: New Red Potion\n    Flags:\n      BuyingStore: true\n' \
+        + '  - Id: 502\n    Name: Orange Potion\n    Drops:\n    - Item: Apple\n' \
+        + '  - Id: 503\n    Name: Yellow Potion\n  - Id: 504\n    Name: White Potion\n' \
+        + 'Footer:\n  Imports:\n    - Path: db/import/item_db.yml\n'
+    assert update.record_ids(io.StringIO(existing)) == {501, 503}
+    assert splice(existing, records) == expected
+    data = yaml.safe_load(expected)
+    assert [entry['Id'] for entry in data['Body']] == [501, 502, 503, 504]
+    assert data['Footer'] == {'Imports': [{'Path': 'db/import/item_db.yml'}]}
+    for size in [1, 7, 64]:
+        monkeypatch.setattr(update, '_CHUNK_SIZE', size)
+        assert splice(existing, records) == expected
+
+
+def test_splice_chunks(monkeypatch):
+    body = ''.join(f'- Id: {i}\n  Name: Item {i}\n  Jobs:\n    All: true\n' for i in range(0, 40, 2))
+    existing = HEADER + 'Body:\n' + body + 'Footer:\n  Imports: []\n'
+    records = {5: {'Id': 5, 'Name': 'Five'}, 6: {'Id': 6}, 99: {'Id': 99}}
+    expected = splice(existing, records)
+    assert expected.count('- Id:') == 22
+    for size in [1, 2, 7, 64]:
+        monkeypatch.setattr(update, '_CHUNK_SIZE', size)
+        assert update.record_ids(io.StringIO(existing)) == set(range(0, 40, 2))
+        assert splice(existing, records) == expected
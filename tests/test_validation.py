@@ -0,0 +1,50 @@
+import json
+
+from dp2rathena import item_mapper
+from dp2rathena import mob_mapper
+from dp2rathena import validation
+
+
+def load(fixture, name):
+    return json.loads(open(fixture(name), encoding='utf-8').read())
+
+
+def test_validate_batch_items(fixture):
+    mapper = item_mapper.Mapper()
+    valid = load(fixture, 'item_1101.json')
+    bad_type = dict(valid, id=1, itemTypeId=99)
+    bad_many = dict(valid, id=2, itemTypeId=99, locationId=-1, job='x')
+    missing = {k: v for k, v in valid.items() if k != 'weight'}
+    payloads = [valid, bad_type, {'Id': 3, 'Error': 'Item not found'}, bad_many, missing]
+    report = validation.Report()
+    invalid = validation.validate_batch(mapper, payloads, report)
+    assert invalid == {
+        1: 'Unrecognised itemTypeId: 99',
+        3: 'Unrecognised itemTypeId: 99',
+        4: 'Missing weight',
+    }
+    result = report.to_dict()
+    assert result['Records'] == 4
+    assert result['Invalid'] == 3
+    assert result['Summary'] == {
+        'itemTypeId': {'99': 2},
+        'job': {'x': 1},
+        'locationId': {'-1': 1},
+        'weight': {'None': 1},
+    }
+    assert {'Id': 2, 'Field': 'job', 'Value': 'x', 'Error': 'Unrecognised job: x'} in result['Errors']
+    assert len(result['Errors']) == 5
+
+
+def test_validate_batch_mobs(fixture):
+    mapper = mob_mapper.Mapper()
+    valid = load(fixture, 'mob_1002.json')
+    bad = dict(valid, id=1, stats=dict(valid['stats'], element=15, ai='AGGRESSIVE'))
+    no_stats = dict(valid, id=2, stats={})
+    invalid = validation.validate_batch(mapper, [valid, bad, no_stats, 'Id: 3, Error: Mob not found'])
+    assert invalid == {1: 'Unrecognised element: 15'}
+
+
+def test_windows():
+    assert list(validation.windows([], 2)) == []
+    assert list(validation.windows(range(5), 2)) == [[0, 1], [2, 3], [4]]
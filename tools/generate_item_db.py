@@ -2,6 +2,8 @@ import os
 import urllib.request
 import yaml
 
+from dp2rathena import codec
+
 # rathena renewal item_db yaml files)
 sources = [
     'https://raw.githubusercontent.com/rathena/rathena/master/db/re/item_db_usable.yml',
@@ -13,7 +15,7 @@ results = dict()
 for url in sources:
     # 1. fetch and parse source file
     response = urllib.request.urlopen(url).read().decode('utf-8')
-    db = yaml.load(response, Loader=yaml.FullLoader)
+    db = codec.load_yaml(response)
 
     # 2. ingest records
     for record in db['Body']:
@@ -22,5 +24,5 @@ for url in sources:
 # 3. output into db directory
 filename = os.path.join(os.path.dirname(__file__), '../dp2rathena/db/item_db.yml')
 with open(filename, 'w') as f:
-    output = yaml.dump({'items': results}, sort_keys=True)
+    output = codec.dump_yaml({'items': results}, sort_keys=True)
     f.write(output)
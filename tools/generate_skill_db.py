@@ -2,6 +2,8 @@ import os
 import urllib.request
 import yaml
 
+from dp2rathena import codec
+
 # custom dumper to match rathena yaml formatting
 class MyDumper(yaml.Dumper):
     def increase_indent(self, flow=False, indentless=False):
@@ -13,7 +15,7 @@ results = dict()
 
 # 1. fetch and parse source file
 response = urllib.request.urlopen(source).read().decode('utf-8')
-db = yaml.load(response, Loader=yaml.FullLoader)
+db = codec.load_yaml(response)
 
 # 2. ingest records
 for record in db['Body']: